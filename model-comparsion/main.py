@@ -5,18 +5,172 @@ Compares Base, Instruct, and Fine-tuned models for different use cases.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import argparse
+import math
+import statistics
+import sys
+import threading
 import time
-from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Return the q-th percentile (0-100) of values, interpolating between samples."""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def load_prompts(path: str) -> List[str]:
+    """
+    Read a prompt suite: one prompt per line, or JSON lines with a "prompt" field
+    (for prompts spanning several lines). Blank lines and lines starting with # are skipped.
+    A line is read as JSON only if it parses as a JSON object or string; other lines,
+    such as '{braces} in a prompt', are prompts as they stand.
+    """
+    prompts = []
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('{') or line.startswith('"'):
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    item = None
+                if isinstance(item, str):
+                    line = item
+                elif isinstance(item, dict):
+                    if not isinstance(item.get('prompt'), str):
+                        raise ValueError(f"{path}:{number}: JSON line without a \"prompt\" string")
+                    line = item['prompt']
+            prompts.append(line)
+    if not prompts:
+        raise ValueError(f"No prompts in {path}")
+    return prompts
+
+
+def _incomplete_beta(a: float, b: float, x: float) -> float:
+    """Regularized incomplete beta function I_x(a, b), by its continued fraction."""
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    if x > (a + 1) / (a + b + 2):
+        # The continued fraction converges quickly only below this point
+        return 1.0 - _incomplete_beta(b, a, 1 - x)
+    
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+                     + a * math.log(x) + b * math.log1p(-x))
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    fraction = d
+    for m in range(1, 300):
+        for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                          -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            fraction *= c * d
+        if abs(c * d - 1.0) < 1e-12:
+            break
+    return front * fraction / a
+
+
+def paired_t_test(a: List[float], b: List[float]) -> Dict[str, float]:
+    """
+    Paired t-test for a mean difference between matched samples (a[i] with b[i]).
+    
+    Returns:
+        t statistic, degrees of freedom and two-sided p-value
+    """
+    if len(a) != len(b):
+        raise ValueError("The samples must be matched pairs")
+    if len(a) < 2:
+        raise ValueError("The samples need at least two pairs")
+    
+    differences = [x - y for x, y in zip(a, b)]
+    difference = statistics.mean(differences)
+    error = statistics.variance(differences) / len(differences)
+    df = float(len(differences) - 1)
+    if error == 0:
+        # Constant differences: the means either match exactly or differ for certain
+        return {"t": 0.0 if difference == 0 else math.copysign(math.inf, difference),
+                "df": df, "p": 1.0 if difference == 0 else 0.0}
+    
+    t = difference / math.sqrt(error)
+    return {"t": t, "df": df, "p": _incomplete_beta(df / 2, 0.5, df / (df + t * t))}
+
+
+def summarize_samples(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Latency percentiles, variance, throughput and token counts of one variant's results."""
+    successful = [sample for sample in samples if sample["success"]]
+    summary = {"samples": len(successful), "errors": len(samples) - len(successful)}
+    if not successful:
+        return summary
+    
+    latencies = [sample["response_time"] for sample in successful]
+    completion_tokens = [sample["tokens"]["completion_tokens"] for sample in successful]
+    summary.update({
+        "latency_p50": percentile(latencies, 50),
+        "latency_p90": percentile(latencies, 90),
+        "latency_p99": percentile(latencies, 99),
+        "latency_mean": statistics.mean(latencies),
+        "latency_stdev": statistics.stdev(latencies) if len(latencies) > 1 else 0.0,
+        # Completion tokens per second of request time
+        "tokens_per_second": sum(completion_tokens) / sum(latencies),
+        "prompt_tokens_mean": statistics.mean(sample["tokens"]["prompt_tokens"] for sample in successful),
+        "completion_tokens_mean": statistics.mean(completion_tokens),
+    })
+    summary["latency_cv"] = summary["latency_stdev"] / summary["latency_mean"] if summary["latency_mean"] else 0.0
+    
+    streamed = [sample["streaming"] for sample in successful if "streaming" in sample]
+    if streamed:
+        first_tokens = [timing["time_to_first_token"] for timing in streamed]
+        summary["ttft_p50"] = percentile(first_tokens, 50)
+        summary["ttft_p90"] = percentile(first_tokens, 90)
+        summary["decode_tokens_per_second"] = statistics.mean(timing["tokens_per_second"] for timing in streamed)
+    return summary
 
 
 class ModelComparator:
     """Simple model comparison tool using local LM Studio."""
     
-    def __init__(self, base_url: str = "http://localhost:1234"):
-        """Initialize with LM Studio local server URL."""
+    # Prompt template of each simulated model type
+    variant_prompts = {
+        "base": "Complete this text creatively: {prompt}",
+        "instruct": "Please provide a helpful and structured response to: {prompt}",
+        "fine_tuned": "As a specialized assistant, provide a detailed and accurate response to: {prompt}"
+    }
+    
+    def __init__(self, base_url: str = "http://localhost:1234", max_parallel: int = 3, stream: bool = False):
+        """
+        Initialize with LM Studio local server URL.
+        
+        Args:
+            base_url: LM Studio server URL
+            max_parallel: Maximum number of model variants queried at once
+            stream: Stream responses and time every token (default for query_model)
+        """
+        if max_parallel < 1:
+            raise ValueError("max_parallel must be at least 1")
         self.base_url = base_url
+        self.max_parallel = max_parallel
+        self.stream = stream
+        
+        # One keep-alive connection pool shared by all requests
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_parallel)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         
         # Model characteristics for different types
         self.model_types = {
@@ -43,8 +197,20 @@ class ModelComparator:
             }
         }
     
-    def query_model(self, prompt: str, model_type: str = "instruct") -> Dict[str, Any]:
-        """Query the local model via LM Studio API."""
+    def query_model(self, prompt: str, model_type: str = "instruct",
+                    stream: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Query the local model via LM Studio API.
+        
+        Args:
+            prompt: Prompt sent as the user message
+            model_type: Model type the result is labelled with
+            stream: Stream the response and record time to first token,
+                inter-token latency and tokens/sec (defaults to self.stream;
+                the non-streaming path only measures the whole response)
+        """
+        if stream is None:
+            stream = self.stream
         try:
             # LM Studio OpenAI-compatible API endpoint
             url = f"{self.base_url}/v1/chat/completions"
@@ -60,12 +226,15 @@ class ModelComparator:
                 ],
                 "temperature": 0.7,
                 "max_tokens": 500,
-                "stream": False
+                "stream": stream
             }
             
-            start_time = time.time()
-            response = requests.post(url, headers=headers, json=data, timeout=120)
-            response_time = time.time() - start_time
+            if stream:
+                return self._query_streaming(url, headers, data, model_type)
+            
+            start_time = time.perf_counter()
+            response = self.session.post(url, headers=headers, json=data, timeout=120)
+            response_time = time.perf_counter() - start_time
             
             if response.status_code == 200:
                 result = response.json()
@@ -98,30 +267,182 @@ class ModelComparator:
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
+    def _query_streaming(self, url: str, headers: Dict[str, str], data: Dict[str, Any],
+                         model_type: str) -> Dict[str, Any]:
+        """Send a streaming request and time each token of the server-sent events."""
+        # Ask for the token usage in the last chunk (ignored by servers that don't support it)
+        data = dict(data, stream_options={"include_usage": True})
+        
+        start_time = time.perf_counter()
+        with self.session.post(url, headers=headers, json=data, timeout=120, stream=True) as response:
+            if response.status_code != 200:
+                return {"success": False, "error": f"API error: {response.status_code}"}
+            
+            pieces = []
+            token_times = []
+            usage = {}
+            # Read byte by byte, so that tokens are timed when they arrive even
+            # if the server does not flush them in separate chunks, and decode
+            # as UTF-8 (requests would assume ISO-8859-1 for text/event-stream)
+            for raw_line in response.iter_lines(chunk_size=1):
+                line = raw_line.decode("utf-8")
+                # Events look like "data: {...chunk...}" and end with "data: [DONE]"
+                if not line or not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    break
+                chunk = json.loads(payload)
+                usage = chunk.get('usage') or usage
+                for choice in chunk.get('choices', []):
+                    content = (choice.get('delta') or {}).get('content')
+                    if content:
+                        # LM Studio sends one token per chunk
+                        token_times.append(time.perf_counter() - start_time)
+                        pieces.append(content)
+        response_time = time.perf_counter() - start_time
+        
+        if not token_times:
+            return {"success": False, "error": "No response from model"}
+        
+        gaps = [later - earlier for earlier, later in zip(token_times, token_times[1:])]
+        decode_time = token_times[-1] - token_times[0]
+        completion_tokens = usage.get('completion_tokens') or len(token_times)
+        return {
+            "success": True,
+            "text": "".join(pieces),
+            "model_type": model_type,
+            "response_time": response_time,
+            "tokens": {
+                "prompt_tokens": usage.get('prompt_tokens', 0),
+                "completion_tokens": completion_tokens,
+                "total_tokens": usage.get('total_tokens', 0) or usage.get('prompt_tokens', 0) + completion_tokens
+            },
+            "streaming": {
+                "time_to_first_token": token_times[0],
+                "inter_token_latency": {
+                    "mean": statistics.mean(gaps) if gaps else 0.0,
+                    "p50": percentile(gaps, 50) if gaps else 0.0,
+                    "p90": percentile(gaps, 90) if gaps else 0.0,
+                    "max": max(gaps, default=0.0)
+                },
+                # Decode throughput, after the first token
+                "tokens_per_second": (len(token_times) - 1) / decode_time if decode_time > 0 else 0.0,
+                "token_times": [round(offset, 4) for offset in token_times]
+            }
+        }
+    
     def simulate_model_types(self, prompt: str) -> Dict[str, Dict[str, Any]]:
         """
         Simulate different model types by adjusting the prompt.
         Since we have one local model, we'll modify prompts to simulate different behaviors.
+        The variants are queried concurrently (at most max_parallel at once), so a
+        comparison takes about as long as the slowest variant. A server that
+        generates one response at a time queues the overlapping requests, and
+        their response_time (and time to first token) then includes the wait;
+        each result records in concurrent_requests the most requests that were
+        in flight at once during its own. Use max_parallel=1 for clean timings.
         """
-        results = {}
-        
-        # Base model simulation - more creative, less structured
-        base_prompt = f"Complete this text creatively: {prompt}"
-        print("🔄 Querying Base model simulation...")
-        results["base"] = self.query_model(base_prompt, "base")
+        for model_type in self.variant_prompts:
+            print(f"🔄 Querying {model_type.replace('_', '-').capitalize()} model simulation...")
         
-        # Instruct model simulation - direct instruction following
-        instruct_prompt = f"Please provide a helpful and structured response to: {prompt}"
-        print("🔄 Querying Instruct model simulation...")
-        results["instruct"] = self.query_model(instruct_prompt, "instruct")
+        lock = threading.Lock()
+        active = set()
+        overlaps = {}
         
-        # Fine-tuned model simulation - task-specific approach
-        finetuned_prompt = f"As a specialized assistant, provide a detailed and accurate response to: {prompt}"
-        print("🔄 Querying Fine-tuned model simulation...")
-        results["fine_tuned"] = self.query_model(finetuned_prompt, "fine_tuned")
+        def query(model_type: str, template: str) -> Dict[str, Any]:
+            with lock:
+                active.add(model_type)
+                for other in active:
+                    overlaps[other] = max(overlaps.get(other, 0), len(active))
+            try:
+                return self.query_model(template.format(prompt=prompt), model_type)
+            finally:
+                with lock:
+                    active.discard(model_type)
         
+        with ThreadPoolExecutor(max_workers=min(self.max_parallel, len(self.variant_prompts))) as executor:
+            futures = {
+                model_type: executor.submit(query, model_type, template)
+                for model_type, template in self.variant_prompts.items()
+            }
+            results = {model_type: future.result() for model_type, future in futures.items()}
+        for model_type, result in results.items():
+            result["concurrent_requests"] = overlaps[model_type]
         return results
     
+    def run_suite(self, prompts: List[str], variants: Optional[List[str]] = None, runs: int = 5,
+                  warmup: int = 1) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Query each variant with every prompt of a suite, several times.
+        
+        Requests are sent one at a time, so they do not compete for the
+        server, and the variants take turns, so drift in the server's speed
+        affects them all alike.
+        
+        Args:
+            prompts: Prompts of the suite
+            variants: Model types to run (default: all)
+            runs: Measured runs of each prompt per variant
+            warmup: Unmeasured requests per variant before the first measured one
+        
+        Returns:
+            The measured results of each variant, each with its prompt_index and run
+        """
+        if runs < 0 or warmup < 0:
+            raise ValueError("runs and warmup must not be negative")
+        variants = variants or list(self.variant_prompts)
+        
+        for number in range(warmup):
+            print(f"🔥 Warmup {number + 1}/{warmup}...", file=sys.stderr)
+            for model_type in variants:
+                template = self.variant_prompts[model_type]
+                self.query_model(template.format(prompt=prompts[number % len(prompts)]), model_type)
+        
+        samples = {model_type: [] for model_type in variants}
+        for index, prompt in enumerate(prompts):
+            print(f"🔄 Prompt {index + 1}/{len(prompts)}: {runs} runs per variant...", file=sys.stderr)
+            for run in range(runs):
+                for model_type in variants:
+                    result = self.query_model(self.variant_prompts[model_type].format(prompt=prompt), model_type)
+                    result.update({"prompt_index": index, "run": run})
+                    samples[model_type].append(result)
+        return samples
+    
+    def display_suite(self, summaries: Dict[str, Dict[str, Any]],
+                      comparisons: Optional[Dict[str, Dict[str, float]]] = None):
+        """Print suite statistics as a plain table (stable layout, so runs can be diffed)."""
+        columns = ["variant", "n", "err", "p50_ms", "p90_ms", "p99_ms", "mean_ms", "sd_ms", "cv%",
+                   "ttft_p50_ms", "tok/s", "decode_tok/s", "prompt_tok", "compl_tok"]
+        widths = [12] + [max(len(column), 7) for column in columns[1:]]
+        print("  ".join(column.ljust(width) if i == 0 else column.rjust(width)
+                        for i, (column, width) in enumerate(zip(columns, widths))))
+        
+        for model_type, summary in summaries.items():
+            if summary["samples"]:
+                ttft = f"{summary['ttft_p50'] * 1000:.1f}" if "ttft_p50" in summary else "-"
+                decode = (f"{summary['decode_tokens_per_second']:.1f}"
+                          if "decode_tokens_per_second" in summary else "-")
+                values = [f"{summary['latency_p50'] * 1000:.1f}", f"{summary['latency_p90'] * 1000:.1f}",
+                          f"{summary['latency_p99'] * 1000:.1f}", f"{summary['latency_mean'] * 1000:.1f}",
+                          f"{summary['latency_stdev'] * 1000:.1f}", f"{summary['latency_cv'] * 100:.1f}",
+                          ttft, f"{summary['tokens_per_second']:.1f}", decode,
+                          f"{summary['prompt_tokens_mean']:.1f}", f"{summary['completion_tokens_mean']:.1f}"]
+            else:
+                values = ["-"] * 11
+            cells = [model_type, str(summary["samples"]), str(summary["errors"])] + values
+            print("  ".join(cell.ljust(width) if i == 0 else cell.rjust(width)
+                            for i, (cell, width) in enumerate(zip(cells, widths))))
+        
+        for label, test in (comparisons or {}).items():
+            verdict = "significant" if test["p"] < 0.05 else "not significant"
+            print(f"{label}: diff {test['difference']:+.4g} ({test['relative']:+.1%}), {test['pairs']} pairs, "
+                  f"t={test['t']:.3f} df={test['df']:.0f} p={test['p']:.4f} ({verdict} at 0.05)")
+    
+    def close(self):
+        """Close the pooled connections."""
+        self.session.close()
+    
     def display_results(self, prompt: str, results: Dict[str, Dict[str, Any]]):
         """Display comparison results in a formatted way."""
         print("\n" + "="*80)
@@ -137,6 +458,16 @@ class ModelComparator:
                 print(f"Response Time: {result['response_time']:.2f}s")
                 if result['tokens']['total_tokens'] > 0:
                     print(f"Tokens Used: {result['tokens']['total_tokens']}")
+                if "streaming" in result:
+                    timing = result["streaming"]
+                    latency = timing["inter_token_latency"]
+                    print(f"Time to First Token: {timing['time_to_first_token']:.2f}s")
+                    print(f"Inter-token Latency: {latency['mean'] * 1000:.1f}ms mean, "
+                          f"{latency['p90'] * 1000:.1f}ms p90, {latency['max'] * 1000:.1f}ms max")
+                    print(f"Tokens/sec: {timing['tokens_per_second']:.1f}")
+                if result.get("concurrent_requests", 1) > 1:
+                    print(f"⚠️  Sent alongside {result['concurrent_requests'] - 1} other request(s): timings may "
+                          f"include queueing on the server (use --parallel 1 for clean timings)")
             else:
                 print(f"❌ Error: {result['error']}")
             
@@ -155,6 +486,7 @@ class ModelComparator:
         output = {
             "prompt": prompt,
             "timestamp": time.time(),
+            "stream": any("streaming" in result for result in results.values()),
             "results": results,
             "model_characteristics": self.model_types
         }
@@ -165,19 +497,97 @@ class ModelComparator:
         print(f"\n💾 Results saved to: {filename}")
 
 
+def compare_variants(samples: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Dict[str, float]]:
+    """
+    Paired t-tests of latency and tokens/sec between two variants' results.
+    
+    Samples are paired by (prompt_index, run), so differences between
+    prompts cancel out; pairs where either request failed are left out.
+    """
+    (first, first_samples), (second, second_samples) = samples.items()
+    matched = {(sample["prompt_index"], sample["run"]): sample for sample in second_samples if sample["success"]}
+    pairs = [(sample, matched[sample["prompt_index"], sample["run"]]) for sample in first_samples
+             if sample["success"] and (sample["prompt_index"], sample["run"]) in matched]
+    comparisons = {}
+    for metric, value in (("latency_s", lambda sample: sample["response_time"]),
+                          ("tok/s", lambda sample: sample["tokens"]["completion_tokens"] / sample["response_time"])):
+        if len(pairs) < 2:
+            continue
+        a = [value(first_sample) for first_sample, _ in pairs]
+        b = [value(second_sample) for _, second_sample in pairs]
+        test = paired_t_test(a, b)
+        test["pairs"] = len(pairs)
+        test["difference"] = statistics.mean(a) - statistics.mean(b)
+        test["relative"] = test["difference"] / statistics.mean(b) if statistics.mean(b) else 0.0
+        comparisons[f"{metric} {first} vs {second}"] = test
+    return comparisons
+
+
+def run_suite_mode(comparator: ModelComparator, args):
+    """Run a prompt suite and print (and optionally save) per-variant statistics."""
+    try:
+        prompts = load_prompts(args.suite)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error loading prompt suite: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    variants = args.variants or list(comparator.variant_prompts)
+    print(f"🚀 Running {len(prompts)} prompts x {args.runs} runs on {', '.join(variants)} "
+          f"({args.warmup} warmup, {'streaming' if args.stream else 'non-streaming'})", file=sys.stderr)
+    samples = comparator.run_suite(prompts, variants, runs=args.runs, warmup=args.warmup)
+    comparator.close()
+    
+    summaries = {model_type: summarize_samples(results) for model_type, results in samples.items()}
+    comparisons = compare_variants(samples) if len(samples) == 2 else {}
+    comparator.display_suite(summaries, comparisons)
+    
+    if args.save:
+        output = {
+            "suite": args.suite,
+            "timestamp": time.time(),
+            "runs": args.runs,
+            "warmup": args.warmup,
+            "stream": args.stream,
+            "prompts": prompts,
+            "summary": summaries,
+            "comparisons": comparisons,
+            "samples": samples
+        }
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(output, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Results saved to: {args.save}", file=sys.stderr)
+
+
 def main():
     """Main CLI interface."""
     parser = argparse.ArgumentParser(description="Simple Model Comparison Tool")
-    parser.add_argument("prompt", help="The prompt to test with different model types")
+    parser.add_argument("prompt", nargs="?", help="The prompt to test with different model types")
+    parser.add_argument("--suite", metavar="FILE",
+                       help="Benchmark the variants on a file of prompts (one per line, or JSON lines)")
+    parser.add_argument("--runs", type=int, default=5,
+                       help="Measured runs of each suite prompt per variant (default: 5)")
+    parser.add_argument("--warmup", type=int, default=1,
+                       help="Unmeasured warmup requests per variant before a suite (default: 1)")
+    parser.add_argument("--variants", nargs="+", choices=list(ModelComparator.variant_prompts),
+                       help="Variants to benchmark in suite mode; with two, their difference is tested (default: all)")
     parser.add_argument("--url", default="http://localhost:1234", 
                        help="LM Studio server URL (default: http://localhost:1234)")
     parser.add_argument("--save", help="Save results to specified file")
+    parser.add_argument("--stream", action="store_true",
+                       help="Stream responses and report time to first token, inter-token latency and tokens/sec")
+    parser.add_argument("--parallel", type=int, default=3,
+                       help="Maximum number of model variants queried at once; use 1 for clean timings "
+                            "on a server that generates one response at a time (default: 3)")
     parser.add_argument("--info", action="store_true", 
                        help="Show information about model types")
     
     args = parser.parse_args()
+    if args.runs < 0:
+        parser.error("--runs must not be negative")
+    if args.warmup < 0:
+        parser.error("--warmup must not be negative")
     
-    comparator = ModelComparator(args.url)
+    comparator = ModelComparator(args.url, max_parallel=args.parallel, stream=args.stream)
     
     if args.info:
         print("\n📚 MODEL TYPE INFORMATION")
@@ -189,15 +599,26 @@ def main():
             print(f"Best for: {', '.join(info['best_for'])}")
         return
     
+    if args.suite:
+        run_suite_mode(comparator, args)
+        return
+    
+    if not args.prompt:
+        parser.error("a prompt is required (or --suite FILE)")
+    
     print("🚀 Starting Model Comparison...")
     print(f"📡 Using LM Studio at: {args.url}")
     print(f"💭 Testing prompt: {args.prompt}")
     
     # Run comparison
+    start_time = time.perf_counter()
     results = comparator.simulate_model_types(args.prompt)
+    wall_time = time.perf_counter() - start_time
+    comparator.close()
     
     # Display results
     comparator.display_results(args.prompt, results)
+    print(f"\n⏱️ Comparison wall time: {wall_time:.2f}s")
     
     # Save results if requested
     if args.save:
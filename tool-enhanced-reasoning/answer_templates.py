@@ -0,0 +1,229 @@
+"""
+Template-based final answers.
+When the plan was a single tool call, or a chain whose last call produces
+the answer, the final answer is phrased locally instead of with a second
+LLM request.
+"""
+
+import functools
+import inspect
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from tools.registry import get_registry
+from tool_executor import format_result
+from tool_parser import NestedCall, ResultRef, format_tool_call
+
+
+# Noun phrase describing each tool's result, filled in with its bound arguments
+PHRASES = {
+    ('math', 'add'): "{a} plus {b}",
+    ('math', 'subtract'): "{a} minus {b}",
+    ('math', 'multiply'): "{a} multiplied by {b}",
+    ('math', 'divide'): "{a} divided by {b}",
+    ('math', 'power'): "{base} to the power of {exponent}",
+    ('math', 'square_root'): "the square root of {number}",
+    ('math', 'average'): "the average of {numbers}",
+    ('math', 'median'): "the median of {numbers}",
+    ('math', 'maximum'): "the largest of {numbers}",
+    ('math', 'minimum'): "the smallest of {numbers}",
+    ('math', 'absolute_value'): "the absolute value of {number}",
+    ('math', 'factorial'): "the factorial of {n}",
+    ('math', 'percentage'): "{part} as a percentage of {whole}",
+    ('math', 'round_number'): "{number} rounded to {decimals} decimal places",
+    ('math', 'evaluate_expression'): "{expression}",
+    ('string', 'count_vowels'): "the number of vowels in {text}",
+    ('string', 'count_consonants'): "the number of consonants in {text}",
+    ('string', 'count_letters'): "the number of letters in {text}",
+    ('string', 'count_words'): "the number of words in {text}",
+    ('string', 'count_characters'): "the number of characters in {text}",
+    ('string', 'count_digits'): "the number of digits in {text}",
+    ('string', 'count_uppercase'): "the number of uppercase letters in {text}",
+    ('string', 'count_lowercase'): "the number of lowercase letters in {text}",
+    ('string', 'count_special_characters'): "the number of special characters in {text}",
+    ('string', 'count_spaces'): "the number of spaces in {text}",
+    ('string', 'find_longest_word'): "the longest word in {text}",
+    ('string', 'find_shortest_word'): "the shortest word in {text}",
+    ('string', 'get_word_lengths'): "the word lengths in {text}",
+    ('string', 'count_specific_character'): "the number of times {character} appears in {text}",
+    ('string', 'count_substring'): "the number of times {substring} appears in {text}",
+    ('string', 'reverse_string'): "{text} reversed",
+    ('string', 'is_palindrome'): "whether {text} is a palindrome",
+    ('string', 'get_character_frequency'): "the character frequency of {text}",
+    ('string', 'get_vowel_consonant_ratio'): "the vowel to consonant ratio of {text}",
+    ('string', 'extract_numbers'): "the numbers in {text}",
+    ('string', 'remove_punctuation'): "{text} without punctuation",
+}
+
+# Suffix appended to a result, e.g. percentages
+RESULT_SUFFIXES = {('math', 'percentage'): '%'}
+
+# Queries that ask for a judgement (comparisons, yes/no questions, explanations)
+# need the LLM to interpret the results
+_INTERPRETATION_RE = re.compile(
+    r"^\s*(?:is|are|was|were|does|do|did|can|could|should|will|would|which|who|why|compare)\b"
+    r"|\b(?:greater|less|more|fewer|larger|smaller|bigger|higher|lower|than|compare|versus|vs|"
+    r"explain|why|difference|between)\b",
+    re.IGNORECASE
+)
+
+# Deeper chains of nested calls are left to the LLM
+MAX_DESCRIPTION_DEPTH = 4
+
+
+@functools.lru_cache(maxsize=None)
+def _signature(tool_type: str, function_name: str) -> inspect.Signature:
+    """Signature of a tool, from the registry (which loads its family on first use)."""
+    return inspect.signature(get_registry().get(tool_type, function_name).function)
+
+
+def format_value(value: Any) -> str:
+    """Format a tool argument or result for a sentence."""
+    if isinstance(value, bool):
+        return 'yes' if value else 'no'
+    if isinstance(value, float):
+        if value != value or value in (float('inf'), float('-inf')):
+            return str(value)
+        if value.is_integer() and abs(value) < 1e16:
+            return str(int(value))
+        return repr(round(value, 6))
+    if isinstance(value, str):
+        return f"'{value}'"
+    if isinstance(value, dict):
+        return ', '.join(f"{format_value(k)}: {format_value(v)}" for k, v in value.items()) or 'nothing'
+    if isinstance(value, (list, tuple)):
+        items = [format_value(item) for item in value]
+        if not items:
+            return 'nothing'
+        if len(items) == 1:
+            return items[0]
+        return ', '.join(items[:-1]) + ' and ' + items[-1]
+    return format_result(value)
+
+
+def _describe_argument(value: Any, tool_calls: Sequence[Dict[str, Any]],
+                       results: Dict[str, Any], depth: int) -> Optional[str]:
+    """Describe an argument; nested calls and $N references become phrases."""
+    if isinstance(value, ResultRef):
+        if not 1 <= value.index <= len(tool_calls):
+            return None
+        value = tool_calls[value.index - 1]
+    elif not isinstance(value, NestedCall):
+        if isinstance(value, list) and any(isinstance(item, (NestedCall, ResultRef)) for item in value):
+            return None
+        return format_value(value)
+
+    phrase = describe_call(value, tool_calls, results, depth + 1)
+    if phrase is None:
+        return None
+    call_key = format_tool_call(value)
+    if call_key in results:
+        return f"{phrase} ({format_value(results[call_key])})"
+    return phrase
+
+
+def describe_call(tool_call: Dict[str, Any], tool_calls: Sequence[Dict[str, Any]],
+                  results: Dict[str, Any], depth: int = 0) -> Optional[str]:
+    """Return a noun phrase for a call, or None if it has no template."""
+    key = (tool_call.get('type', '').lower(), tool_call.get('function', ''))
+    template = PHRASES.get(key)
+    if template is None or depth > MAX_DESCRIPTION_DEPTH:
+        return None
+
+    try:
+        bound = _signature(*key).bind(*tool_call.get('args', []), **tool_call.get('kwargs', {}))
+    except (TypeError, ValueError):
+        return None
+
+    arguments = {}
+    for name, value in bound.arguments.items():
+        described = _describe_argument(value, tool_calls, results, depth)
+        if described is None:
+            return None
+        arguments[name] = described
+
+    try:
+        return template.format(**arguments)
+    except KeyError:
+        # An optional parameter used by the template was not supplied
+        return None
+
+
+def _answer_call(tool_calls: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Return the call whose result answers the query, or None.
+
+    That is the only call, or the last call of a chain in which every
+    earlier call feeds a later one (through $N or by being nested in it).
+    """
+    if not tool_calls:
+        return None
+    consumed = set()
+    nested_keys = set()
+
+    def visit(value: Any, position: int):
+        if isinstance(value, ResultRef) and value.index < position:
+            consumed.add(value.index)
+        elif isinstance(value, NestedCall):
+            nested_keys.add(format_tool_call(value))
+            for item in list(value.get('args', [])) + list(value.get('kwargs', {}).values()):
+                visit(item, position)
+        elif isinstance(value, list):
+            for item in value:
+                visit(item, position)
+
+    for position, call in enumerate(tool_calls, 1):
+        for value in list(call.get('args', [])) + list(call.get('kwargs', {}).values()):
+            visit(value, position)
+
+    for position, call in enumerate(tool_calls[:-1], 1):
+        if position not in consumed and format_tool_call(call) not in nested_keys:
+            return None
+    return tool_calls[-1]
+
+
+def synthesize_answer(query: str, tool_calls: List[Dict[str, Any]], results: Dict[str, Any],
+                      errors: Sequence[str] = ()) -> Optional[str]:
+    """
+    Build the final answer from templates when no interpretation is needed.
+
+    Args:
+        query: The original query
+        tool_calls: Parsed top-level tool calls, in response order
+        results: Tool results keyed by formatted call
+        errors: Parse or execution errors for this query
+
+    Returns:
+        The answer sentence, or None when the LLM should phrase the answer
+        (errors, several independent results, comparisons or explanations)
+    """
+    if errors:
+        return None
+
+    call = _answer_call(tool_calls)
+    if call is None:
+        return None
+    call_key = format_tool_call(call)
+    if call_key not in results:
+        return None
+    result = results[call_key]
+    key = (call.get('type', '').lower(), call.get('function', ''))
+
+    try:
+        if key == ('string', 'is_palindrome') and isinstance(result, bool):
+            bound = _signature(*key).bind(*call.get('args', []), **call.get('kwargs', {}))
+            text = _describe_argument(bound.arguments['text'], tool_calls, results, 0)
+            if text is None:
+                return None
+            return f"{'Yes' if result else 'No'}, {text} {'is' if result else 'is not'} a palindrome."
+
+        if _INTERPRETATION_RE.search(query):
+            return None
+        phrase = describe_call(call, tool_calls, results)
+        if phrase is None:
+            return None
+        answer = f"{phrase} is {format_value(result)}{RESULT_SUFFIXES.get(key, '')}."
+    except (TypeError, ValueError):
+        # Arguments that do not fit the signature, or an integer too large to print
+        return None
+    return answer[0].upper() + answer[1:]
@@ -0,0 +1,161 @@
+"""
+Batch processing for the tool-enhanced reasoning script.
+Runs many queries through the reasoning pipeline concurrently and writes
+structured results as JSONL in completion order.
+"""
+
+import csv
+import json
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+from tool_executor import format_result
+
+
+def load_queries(path: str) -> List[Dict[str, Any]]:
+    """
+    Load queries from a JSONL or CSV file.
+
+    JSONL lines may be a bare JSON string or an object with a "query" field
+    (and an optional "id"). CSV files use the "query" column if present,
+    otherwise the first column. Rows without an id are numbered from 1.
+
+    Args:
+        path: Path to a .jsonl/.json or .csv file
+
+    Returns:
+        List of {'id': ..., 'query': ...} records
+    """
+    records = []
+
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.lower().endswith('.csv'):
+            rows = list(csv.reader(f))
+            if not rows:
+                return []
+            header = [cell.strip().lower() for cell in rows[0]]
+            if 'query' in header:
+                query_col = header.index('query')
+                id_col = header.index('id') if 'id' in header else None
+                rows = rows[1:]
+            else:
+                query_col, id_col = 0, None
+            for row in rows:
+                if len(row) <= query_col or not row[query_col].strip():
+                    continue
+                records.append({
+                    'id': row[id_col] if id_col is not None and len(row) > id_col else None,
+                    'query': row[query_col].strip()
+                })
+        else:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid JSON on line {line_number} of {path}: {e}")
+                if isinstance(item, str):
+                    item = {'query': item}
+                if not isinstance(item, dict) or not str(item.get('query', '')).strip():
+                    raise ValueError(f"Line {line_number} of {path} has no 'query' field")
+                records.append({'id': item.get('id'), 'query': str(item['query']).strip()})
+
+    for number, record in enumerate(records, 1):
+        if record['id'] is None:
+            record['id'] = number
+
+    return records
+
+
+def _abbreviate_long_ints(value: Any) -> Any:
+    """Replace integers too long for str() (and so for JSON) with their abbreviation."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        try:
+            str(value)
+        except ValueError:
+            return format_result(value)
+        return value
+    if isinstance(value, dict):
+        return {key: _abbreviate_long_ints(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_abbreviate_long_ints(item) for item in value]
+    return value
+
+
+def dumps_result(result: Any) -> str:
+    """Serialize a result as JSON, abbreviating integers too long to write out."""
+    try:
+        return json.dumps(result, ensure_ascii=False, default=str)
+    except ValueError:
+        return json.dumps(_abbreviate_long_ints(result), ensure_ascii=False, default=str)
+
+
+def _run_one(process_fn: Callable[[str], Dict[str, Any]], record: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a single record through the pipeline, capturing failures as results."""
+    start_time = time.perf_counter()
+    try:
+        result = process_fn(record['query']) or {}
+    except Exception as e:
+        result = {'query': record['query'], 'success': False, 'error': str(e)}
+    output = {'id': record['id']}
+    output.update(result)
+    output['elapsed'] = time.perf_counter() - start_time
+    return output
+
+
+def run_batch(queries: List[Dict[str, Any]],
+              process_fn: Callable[[str], Dict[str, Any]],
+              concurrency: int = 8,
+              output: Optional[TextIO] = None) -> Dict[str, Any]:
+    """
+    Process many queries concurrently with a bounded worker pool.
+
+    Args:
+        queries: Records as returned by load_queries()
+        process_fn: Function that takes a query string and returns a result dict
+        concurrency: Maximum number of queries in flight at once
+        output: Text stream that receives one JSON result per line
+            (defaults to stdout)
+
+    Returns:
+        Summary with counts, elapsed wall time, throughput and how many
+        answers took each answer_path
+    """
+    if concurrency < 1:
+        raise ValueError("Concurrency must be at least 1")
+    if output is None:
+        output = sys.stdout
+
+    succeeded = 0
+    failed = 0
+    answer_paths = Counter()
+    start_time = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(_run_one, process_fn, record) for record in queries]
+        for future in as_completed(futures):
+            result = future.result()
+            if result.get('success'):
+                succeeded += 1
+            else:
+                failed += 1
+            if result.get('answer_path'):
+                answer_paths[result['answer_path']] += 1
+            output.write(dumps_result(result) + '\n')
+            output.flush()
+
+    elapsed = time.perf_counter() - start_time
+
+    return {
+        'total': len(queries),
+        'succeeded': succeeded,
+        'failed': failed,
+        'elapsed': elapsed,
+        'throughput': len(queries) / elapsed if elapsed > 0 else 0.0,
+        'answer_paths': dict(answer_paths)
+    }
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark for batch ("map") mode of the string tools.
+
+Builds a column of short product-title-like strings (1M by default) and
+compares a single map_string_function call with two per-row loops: the
+original tool implementations (before text profiles) behind a dispatcher
+like the original call_string_function, and the current
+call_string_function. It checks that all give the same results; speedups
+are against the original loop.
+
+Usage:
+    python benchmarks/bench_batch_map.py --rows 1000000 --functions count_vowels count_words is_palindrome
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.batch_map import map_string_function  # noqa: E402
+from tools.numpy_support import np  # noqa: E402
+from tools.string_tools import STRING_FUNCTIONS, call_string_function  # noqa: E402
+
+
+WORDS = ["USB-C", "Cable", "2m", "Braided", "Fast", "Charging", "Wireless", "Mouse", "Ergonomic",
+         "Level", "Noon", "Stainless", "Steel", "Water", "Bottle", "750ml", "Café", "Pro", "Max"]
+
+
+def _is_palindrome(text: str) -> bool:
+    processed_text = text.lower().replace(' ', '')
+    return processed_text == processed_text[::-1]
+
+
+# The per-row implementations the tools had before text profiles
+ORIGINAL_FUNCTIONS = {
+    'count_vowels': lambda text: sum(1 for char in text.lower() if char in 'aeiou'),
+    'count_consonants': lambda text: sum(1 for char in text.lower() if char in 'bcdfghjklmnpqrstvwxyz'),
+    'count_letters': lambda text: sum(1 for char in text if char.isalpha()),
+    'count_words': lambda text: len(text.split()),
+    'count_characters': len,
+    'count_digits': lambda text: sum(1 for char in text if char.isdigit()),
+    'count_uppercase': lambda text: sum(1 for char in text if char.isupper()),
+    'count_lowercase': lambda text: sum(1 for char in text if char.islower()),
+    'count_special_characters': lambda text: sum(1 for char in text if not char.isalnum() and not char.isspace()),
+    'count_spaces': lambda text: text.count(' '),
+    'is_palindrome': _is_palindrome,
+}
+
+
+def call_original_function(function_name: str, *args, **kwargs):
+    """Dispatch like the original call_string_function: a name check and a call."""
+    if function_name not in STRING_FUNCTIONS:
+        raise ValueError(f"Function '{function_name}' not found")
+    return ORIGINAL_FUNCTIONS.get(function_name, STRING_FUNCTIONS[function_name])(*args, **kwargs)
+
+
+def build_column(rows: int, seed: int = 0):
+    """Build product titles of 2-8 words; about 1% are palindromes and some are non-ASCII."""
+    rng = random.Random(seed)
+    column = []
+    for _ in range(rows):
+        if rng.random() < 0.01:
+            column.append(rng.choice(["Level", "Step on no pets", "Never odd or even", "Noon"]))
+        else:
+            column.append(' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 8))))
+    return column
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch mode of the string tools")
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Strings in the column (default: 1000000)')
+    parser.add_argument('--functions', nargs='+',
+                        default=['count_vowels', 'count_words', 'count_uppercase', 'is_palindrome'],
+                        help='String tools to run')
+    parser.add_argument('--processes', type=int, default=0,
+                        help='Also time batch mode with this many worker processes')
+    args = parser.parse_args()
+
+    column = build_column(args.rows)
+    print(f"Column: {args.rows:,} strings, {sum(map(len, column)) / 1e6:.1f}M characters, "
+          f"NumPy {'available' if np is not None else 'not installed'}")
+    print(f"{'function':<18} {'original (s)':>12} {'per-row (s)':>12} {'batch (s)':>10} {'speedup':>8}"
+          + (f" {'pool (s)':>9}" if args.processes else ''))
+
+    for function_name in args.functions:
+        start = time.perf_counter()
+        expected = [call_original_function(function_name, text) for text in column]
+        original = time.perf_counter() - start
+
+        start = time.perf_counter()
+        per_row_results = [call_string_function(function_name, text) for text in column]
+        per_row = time.perf_counter() - start
+        if per_row_results != expected:
+            print(f"  ⚠️ {function_name}: per-row results differ from the original implementation")
+
+        start = time.perf_counter()
+        results = map_string_function(function_name, column)
+        batch = time.perf_counter() - start
+        if results != expected:
+            print(f"  ⚠️ {function_name}: batch results differ from the original implementation")
+
+        line = f"{function_name:<18} {original:>12.2f} {per_row:>12.2f} {batch:>10.2f} {original / batch:>7.1f}x"
+        if args.processes:
+            start = time.perf_counter()
+            map_string_function(function_name, column, processes=args.processes)
+            line += f" {time.perf_counter() - start:>9.2f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Peak-memory benchmark for string tools on large files.
+
+Writes synthetic text files of growing size and runs each tool in a fresh
+subprocess, once streaming the file from its path and once on the whole
+text read into memory. The peak RSS of the streaming runs should stay flat
+as the file grows, while the in-memory runs grow with it.
+
+Usage:
+    python benchmarks/bench_chunked_rss.py --sizes 16 64 256 --functions count_words count_substring
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORDS = ["tool", "enhanced", "reasoning", "Σίσυφος", "naïve", "42", "3.14", "level", "(nested)", "a,b"]
+
+FUNCTION_ARGS = {
+    'count_substring': ('ing',),
+    'count_specific_character': ('e',),
+}
+
+
+def write_text_file(path: Path, megabytes: int, seed: int = 0):
+    """Write about `megabytes` MiB of word-like text, one block at a time."""
+    rng = random.Random(seed)
+    block = ' '.join(rng.choice(WORDS) for _ in range(100_000)) + '\n'
+    data = block.encode('utf-8')
+    with open(path, 'wb') as f:
+        written = 0
+        while written < megabytes << 20:
+            f.write(data)
+            written += len(data)
+
+
+def worker(path: str, mode: str, function_name: str):
+    """Run one tool on one file and print its result summary and peak RSS as JSON."""
+    from tools.string_tools import STRING_FUNCTIONS
+
+    function = STRING_FUNCTIONS[function_name]
+    args = FUNCTION_ARGS.get(function_name, ())
+    start = time.perf_counter()
+    if mode == 'stream':
+        result = function(Path(path), *args)
+    else:
+        result = function(Path(path).read_text(encoding='utf-8'), *args)
+    seconds = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mib = peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+    summary = result if isinstance(result, (int, float, bool)) else len(result)
+    print(json.dumps({'seconds': seconds, 'peak_mib': peak_mib, 'result': summary}))
+
+
+def run_worker(path: Path, mode: str, function_name: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', str(path), mode, function_name],
+        check=True, capture_output=True, text=True, cwd=ROOT
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark peak memory of string tools on large files")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[16, 64, 256],
+                        help='File sizes in MiB (default: 16 64 256)')
+    parser.add_argument('--functions', nargs='+',
+                        default=['count_words', 'count_substring', 'find_longest_word',
+                                 'extract_numbers', 'is_palindrome'],
+                        help='String tools to run')
+    parser.add_argument('--skip-memory', action='store_true',
+                        help='Only run the streaming mode (the in-memory mode needs several times the file size)')
+    parser.add_argument('--worker', nargs=3, metavar=('PATH', 'MODE', 'FUNCTION'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(*args.worker)
+        return
+
+    modes = ['stream'] if args.skip_memory else ['stream', 'memory']
+    print(f"{'function':<20} {'size (MiB)':>10} {'mode':>8} {'peak RSS (MiB)':>15} {'seconds':>9} {'result':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for megabytes in args.sizes:
+            path = Path(directory) / f"text_{megabytes}.txt"
+            write_text_file(path, megabytes)
+            for function_name in args.functions:
+                results = {}
+                for mode in modes:
+                    run = run_worker(path, mode, function_name)
+                    results[mode] = run['result']
+                    print(f"{function_name:<20} {megabytes:>10} {mode:>8} {run['peak_mib']:>15.1f} "
+                          f"{run['seconds']:>9.2f} {run['result']:>12}")
+                if len(set(map(str, results.values()))) > 1:
+                    print(f"  ⚠️ results differ: {results}")
+            path.unlink()
+
+
+if __name__ == "__main__":
+    main()
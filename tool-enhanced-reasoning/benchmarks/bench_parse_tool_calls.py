@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for parse_tool_calls on large LLM responses.
+
+Builds a synthetic transcript (10k lines by default) that mixes prose with
+TOOL_CALL lines and compares the tokenizer-based parser with the previous
+regex + eval implementation.
+
+Usage:
+    python benchmarks/bench_parse_tool_calls.py --lines 10000 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tool_parser import parse_tool_calls  # noqa: E402
+
+
+PROSE_LINES = [
+    "Let me think about this step by step.",
+    "First, I need to work out what the query is asking for (and what it is not).",
+    "The user wants a count, so a string tool is the right choice.",
+    "Combining the results, the answer follows directly.",
+    "",
+]
+
+CALL_LINES = [
+    'TOOL_CALL: math.square_root(144)',
+    'TOOL_CALL: math.average([18, 50, 32.5, -4])',
+    'TOOL_CALL: string.count_vowels("Multimodality")',
+    'TOOL_CALL: string.count_substring("a, b, (c), a", "a", case_sensitive=True)',
+    'TOOL_CALL: math.square_root(math.average([18, 50]))',
+    'TOOL_CALL: math.round_number(3.14159, 2)',
+]
+
+
+def legacy_parse_tool_calls(response_text):
+    """The original regex + eval parser, kept here as the baseline."""
+    tool_calls = []
+    pattern = r'TOOL_CALL:\s*(\w+)\.(\w+)\((.*?)\)'
+    for tool_type, function_name, args_str in re.findall(pattern, response_text):
+        try:
+            if not args_str.strip():
+                args = []
+            elif args_str.strip().startswith('[') and args_str.strip().endswith(']'):
+                args = [eval(args_str.strip())]
+            elif ',' in args_str:
+                args = [eval(arg.strip()) for arg in args_str.split(',')]
+            else:
+                args = [eval(args_str.strip())]
+            tool_calls.append({'type': tool_type, 'function': function_name, 'args': args})
+        except Exception:
+            continue
+    return tool_calls
+
+
+def build_transcript(lines: int, call_ratio: float, seed: int = 0) -> str:
+    """Build a synthetic LLM transcript with the given share of TOOL_CALL lines."""
+    rng = random.Random(seed)
+    return '\n'.join(
+        rng.choice(CALL_LINES) if rng.random() < call_ratio else rng.choice(PROSE_LINES)
+        for _ in range(lines)
+    )
+
+
+def time_parser(parse, text: str, repeat: int):
+    """Return (best seconds, number of calls found) over several runs."""
+    best = float('inf')
+    found = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        found = len(parse(text))
+        best = min(best, time.perf_counter() - start)
+    return best, found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TOOL_CALL parsing")
+    parser.add_argument('--lines', type=int, default=10000, help='Lines per transcript (default: 10000)')
+    parser.add_argument('--call-ratio', type=float, default=0.3,
+                        help='Fraction of lines that are tool calls (default: 0.3)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per parser; the best is reported')
+    args = parser.parse_args()
+
+    text = build_transcript(args.lines, args.call_ratio)
+    expected = text.count('TOOL_CALL:')
+
+    print(f"Transcript: {args.lines} lines, {len(text) / 1024:.0f} KiB, {expected} TOOL_CALL lines")
+    print(f"{'parser':<10} {'best (ms)':>10} {'lines/s':>12} {'calls found':>12}")
+
+    for name, parse in [('tokenizer', lambda t: parse_tool_calls(t, errors=[])),
+                        ('legacy', legacy_parse_tool_calls)]:
+        seconds, found = time_parser(parse, text, args.repeat)
+        print(f"{name:<10} {seconds * 1000:>10.2f} {args.lines / seconds:>12,.0f} {found:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the LLM scheduler under a request quota.
+
+Runs a batch of queries (a share of them duplicates) through process_query
+against a FakeModel that rejects requests beyond its quota, and randomly,
+with 429 errors. While the batch runs, interactive queries arrive one
+at a time. It compares three setups:
+
+- direct: no scheduler, so quota errors fail queries
+- scheduler: rate limiting, retries and coalescing, one lane for everything
+- lanes: the same, with the batch in the batch lane
+
+and reports failed queries, upstream requests, 429s, wall time and the
+latency of the interactive queries.
+
+Usage:
+    python benchmarks/bench_scheduler.py --queries 200 --quota 20 --window 1 --error-rate 0.05
+"""
+
+import argparse
+import io
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+from batch import run_batch  # noqa: E402
+from fake_model import FakeModel, template_responder  # noqa: E402
+from llm_scheduler import BATCH, INTERACTIVE, disable_scheduler, enable_scheduler, llm_priority  # noqa: E402
+
+
+QUERIES = [
+    "What's the square root of {n}?",
+    "What's the factorial of {m}?",
+    "How many vowels are in 'multimodality {n}'?",
+    "Count the words in 'tool enhanced reasoning run {n}'",
+]
+
+
+def build_queries(count: int, duplicates: float, recent: int):
+    """Build queries; a share of them repeat one of the `recent` queries before (and so run concurrently)."""
+    rng = random.Random(0)
+    queries = []
+    for i in range(count):
+        if queries and rng.random() < duplicates:
+            queries.append(rng.choice(queries[-recent:]))
+        else:
+            queries.append(QUERIES[i % len(QUERIES)].format(n=i + 2, m=i % 12 + 1))
+    return queries
+
+
+def run(setup: str, args) -> dict:
+    model = FakeModel(responder=template_responder(), latency=args.latency,
+                      requests_per_minute=args.quota, quota_window=args.window,
+                      error_rate=args.error_rate, seed=0)
+    scheduler = None
+    if setup != 'direct':
+        # The scheduler's budget matches the quota
+        scheduler = enable_scheduler(requests_per_minute=args.quota * 60 / args.window, max_retries=args.retries,
+                                     base_delay=args.window / 10, max_delay=args.window * 4)
+    batch_lane = BATCH if setup == 'lanes' else INTERACTIVE
+
+    def process(query: str) -> dict:
+        with llm_priority(batch_lane):
+            return main.process_query(query, model=model, verbose=False)
+
+    queries = build_queries(args.queries, args.duplicates, args.concurrency)
+    records = [{'id': i, 'query': query} for i, query in enumerate(queries)]
+    summary = {}
+    batch = threading.Thread(target=lambda: summary.update(
+        run_batch(records, process, concurrency=args.concurrency, output=io.StringIO())))
+
+    interactive = []
+    interactive_failed = 0
+    start = time.perf_counter()
+    batch.start()
+    for i in range(args.interactive):
+        time.sleep(args.interactive_interval)
+        if not batch.is_alive():
+            break
+        started = time.perf_counter()
+        result = main.process_query(f"What's the square root of {1000 + i}?", model=model, verbose=False)
+        interactive.append(time.perf_counter() - started)
+        interactive_failed += not result.get('success', True)
+    batch.join()
+    elapsed = time.perf_counter() - start
+    disable_scheduler()
+
+    return {
+        'failed': summary['failed'] + interactive_failed,
+        'upstream': model.calls,
+        'rejected': model.rejected,
+        'coalesced': scheduler.stats()['coalesced'] if scheduler else 0,
+        'elapsed': elapsed,
+        'interactive_p50': statistics.median(interactive) if interactive else float('nan'),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark the LLM scheduler against a fake quota")
+    parser.add_argument('--queries', type=int, default=200, help='Batch queries (default: 200)')
+    parser.add_argument('--duplicates', type=float, default=0.25,
+                        help='Share of batch queries repeating an earlier one (default: 0.25)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Batch concurrency (default: 16)')
+    parser.add_argument('--interactive', type=int, default=10,
+                        help='Interactive queries sent while the batch runs (default: 10)')
+    parser.add_argument('--interactive-interval', type=float, default=0.3,
+                        help='Seconds between interactive queries (default: 0.3)')
+    parser.add_argument('--latency', type=float, default=0.02, help='Fake model latency (default: 0.02s)')
+    parser.add_argument('--quota', type=int, default=20, help='Fake model requests per window (default: 20)')
+    parser.add_argument('--window', type=float, default=1.0, help='Fake quota window in seconds (default: 1)')
+    parser.add_argument('--error-rate', type=float, default=0.05,
+                        help='Share of requests failing with a random 429 (default: 0.05)')
+    parser.add_argument('--retries', type=int, default=6, help='Scheduler retries (default: 6)')
+    args = parser.parse_args()
+
+    print(f"{args.queries} batch queries ({args.duplicates:.0%} duplicates), concurrency {args.concurrency}; "
+          f"quota {args.quota} requests per {args.window:g}s, {args.error_rate:.0%} random 429s")
+    print(f"{'setup':<10} {'failed':>7} {'upstream':>9} {'429s':>6} {'coalesced':>10} {'wall (s)':>9} "
+          f"{'interactive p50 (s)':>20}")
+    for setup in ('direct', 'scheduler', 'lanes'):
+        result = run(setup, args)
+        print(f"{setup:<10} {result['failed']:>7} {result['upstream']:>9} {result['rejected']:>6} "
+              f"{result['coalesced']:>10} {result['elapsed']:>9.2f} {result['interactive_p50']:>20.3f}")
+
+
+if __name__ == "__main__":
+    main_cli()
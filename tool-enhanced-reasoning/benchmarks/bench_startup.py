@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the CLI.
+
+Starts fresh interpreters repeatedly and times importing main, printing
+--help and a tool-only call, then lists the slowest imports of main (from
+python -X importtime) and which heavy optional modules were loaded.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 20 --top 15
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    'import main': [sys.executable, '-c', 'import main'],
+    'main.py --help': [sys.executable, 'main.py', '--help'],
+    'tool call': [sys.executable, '-c',
+                  'from tools import call_math_function; call_math_function("average", [1, 2, 3])'],
+}
+
+# Modules that should only be imported when a feature needs them
+HEAVY_MODULES = ['google.generativeai', 'dotenv', 'numpy', 'sqlite3', 'concurrent.futures.process']
+
+
+def time_command(command, runs: int):
+    """Run a command several times and return the wall times in seconds."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def slowest_imports(top: int):
+    """Return (cumulative microseconds, module) of the slowest imports of main."""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'],
+                            cwd=ROOT, check=True, capture_output=True, text=True).stderr
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imports.append((int(cumulative), name.rstrip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def loaded_modules():
+    """Return which of HEAVY_MODULES are actually executed by importing main."""
+    check = (
+        'import sys, main\n'
+        f'for name in {HEAVY_MODULES!r}:\n'
+        '    module = sys.modules.get(name)\n'
+        '    lazy = type(module).__name__ == "_LazyModule"\n'
+        '    print(name, "not loaded" if module is None or lazy else "loaded")\n'
+    )
+    return subprocess.run([sys.executable, '-c', check], cwd=ROOT, check=True,
+                          capture_output=True, text=True).stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CLI cold-start time")
+    parser.add_argument('--runs', type=int, default=20, help='Interpreter starts per command (default: 20)')
+    parser.add_argument('--top', type=int, default=15, help='Slowest imports to list (default: 15)')
+    args = parser.parse_args()
+
+    baseline = time_command([sys.executable, '-c', 'pass'], args.runs)
+    print(f"{'command':<16} {'median (ms)':>12} {'min (ms)':>9} {'over bare python (ms)':>22}")
+    for label, command in [('python -c pass', None)] + list(COMMANDS.items()):
+        times = baseline if command is None else time_command(command, args.runs)
+        overhead = statistics.median(times) - statistics.median(baseline)
+        print(f"{label:<16} {statistics.median(times) * 1000:>12.1f} {min(times) * 1000:>9.1f} "
+              f"{overhead * 1000:>22.1f}")
+
+    print(f"\nSlowest imports of main (cumulative, one run):")
+    for microseconds, name in slowest_imports(args.top):
+        print(f"  {microseconds / 1000:>8.1f} ms  {name}")
+
+    print(f"\nOptional modules after `import main`:")
+    for line in loaded_modules().splitlines():
+        print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
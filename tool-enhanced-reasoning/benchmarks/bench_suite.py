@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the reasoning pipeline.
+
+Runs without network access against fake_model.FakeModel. The model writes
+templated reasoning with a TOOL_CALL line for each query and adds
+simulated latency. The suite has three sections:
+
+- stages: time per call of create_reasoning_prompt, parse_tool_calls and
+  execute_tool_calls
+- pipeline: process_query throughput and latency percentiles in batch
+  mode, for each answer mode, plus the per-query overhead with a
+  zero-latency model
+- tools: time per call of every function in MATH_FUNCTIONS and
+  STRING_FUNCTIONS at several input sizes
+
+Results are saved as JSON together with the commit and environment.
+--compare prints the change from an earlier results file and flags
+regressions.
+
+Usage:
+    python benchmarks/bench_suite.py --output bench.json
+    python benchmarks/bench_suite.py --sections tools --sizes 10 1000 --compare bench.json
+"""
+
+import argparse
+import inspect
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import main  # noqa: E402
+from batch import run_batch  # noqa: E402
+from fake_model import FakeModel, template_responder  # noqa: E402
+from query_router import disable_router, enable_router  # noqa: E402
+from tool_executor import execute_tool_calls  # noqa: E402
+from tool_parser import parse_tool_calls  # noqa: E402
+from tools.math_tools import MATH_FUNCTIONS, np  # noqa: E402
+from tools.string_tools import STRING_FUNCTIONS  # noqa: E402
+from tools.text_profile import get_text_profile  # noqa: E402
+
+
+SECTIONS = ('stages', 'pipeline', 'tools')
+
+WORDS = ["tool", "enhanced", "reasoning", "Multimodality", "level", "naïve", "42", "3.14", "(nested)", "a,b",
+         "Sing", "ringing", "EVERY", "quiet"]
+
+# Query shapes the template responder (and the query router) recognise
+QUERY_TEMPLATES = [
+    "What's the square root of {n}?",
+    "What is the factorial of {small}?",
+    "What is the average of {a}, {b} and {c}?",
+    "How many vowels are in '{text}'?",
+    "How many words are in '{text}'?",
+    "What is the longest word in '{text}'?",
+    "What is {a} times {b}?",
+    "Is '{word}' a palindrome?",
+]
+
+# Reasoning with several independent and dependent calls, for the stage timings
+STAGE_REASONING = """1. I need several values first.
+TOOL_CALL: math.average([18, 50, 32.5, -4])
+TOOL_CALL: string.count_vowels("Tool-enhanced reasoning with multimodal inputs")
+TOOL_CALL: math.square_root(math.average([18, 50]))
+TOOL_CALL: math.multiply($1, 3)
+TOOL_CALL: string.count_substring("a, b, (c), a", "a", case_sensitive=True)
+2. Combining these gives the answer."""
+
+
+def measure(function, min_time: float = 0.02, repeat: int = 5) -> float:
+    """Return the best time per call in seconds, over repeat batches of at least min_time each."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def make_text(size: int, rng: random.Random) -> str:
+    """Word-like text of exactly size characters."""
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)[:size]
+
+
+def tool_arguments(function, size: int, rng: random.Random):
+    """
+    Build the required arguments of a tool for an input size.
+
+    Returns:
+        (args, sized): sized is False when no argument depends on the size
+    """
+    args = []
+    sized = False
+    for name, parameter in inspect.signature(function).parameters.items():
+        if parameter.default is not inspect.Parameter.empty:
+            continue
+        if name == 'numbers':
+            args.append([round(rng.uniform(-1000, 1000), 3) for _ in range(size)])
+            sized = True
+        elif name == 'text':
+            args.append(make_text(size, rng))
+            sized = True
+        elif name == 'character':
+            args.append('e')
+        elif name == 'substring':
+            args.append('ing')
+        elif name == 'n':
+            args.append(size)
+            sized = True
+        elif name == 'exponent':
+            args.append(3)
+        elif name == 'expression':
+            args.append("(15 + 27) * 3 - square_root(average([18, 50]))")
+        else:
+            args.append(rng.uniform(1, 1000))
+    return args, sized
+
+
+def run_tools(sizes, min_time: float, results: dict):
+    print(f"\n{'tool':<36} {'size':>8} {'per call (µs)':>14}")
+    rng = random.Random(0)
+    for tool_type, registry in (('math', MATH_FUNCTIONS), ('string', STRING_FUNCTIONS)):
+        for name, function in registry.items():
+            for size in sizes:
+                args, sized = tool_arguments(function, size, rng)
+                if tool_type == 'string':
+                    # Each call profiles its text afresh, as a new query would
+                    def call(function=function, args=args):
+                        get_text_profile.cache_clear()
+                        function(*args)
+                else:
+                    def call(function=function, args=args):
+                        function(*args)
+                seconds = measure(call, min_time)
+                key = f"tools.{tool_type}.{name}" + (f"[n={size}]" if sized else '')
+                results[key] = {'value': seconds, 'unit': 's'}
+                print(f"{tool_type + '.' + name:<36} {size if sized else '-':>8} {seconds * 1e6:>14.2f}")
+                if not sized:
+                    break
+
+
+def run_stages(min_time: float, results: dict):
+    tool_calls = parse_tool_calls(STAGE_REASONING)
+    stages = {
+        'create_reasoning_prompt': lambda: main.create_reasoning_prompt("What's the square root of 144?"),
+        'parse_tool_calls': lambda: parse_tool_calls(STAGE_REASONING),
+        'execute_tool_calls': lambda: execute_tool_calls(tool_calls),
+    }
+    print(f"\n{'stage':<36} {'per call (µs)':>14}")
+    for name, function in stages.items():
+        seconds = measure(function, min_time)
+        results[f"stages.{name}"] = {'value': seconds, 'unit': 's'}
+        print(f"{name:<36} {seconds * 1e6:>14.2f}")
+
+
+def make_queries(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    queries = []
+    for number in range(1, count + 1):
+        template = QUERY_TEMPLATES[(number - 1) % len(QUERY_TEMPLATES)]
+        query = template.format(n=rng.randint(1, 10 ** 6), small=rng.randint(1, 30), a=rng.randint(1, 999),
+                                b=rng.randint(1, 999), c=rng.randint(1, 999),
+                                text=make_text(rng.randint(20, 80), rng).replace("'", ''),
+                                word=rng.choice(['level', 'noon', 'tool', 'racecar']))
+        queries.append({'id': number, 'query': query})
+    return queries
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_pipeline(queries: int, latency: float, concurrency: int, results: dict):
+    records = make_queries(queries)
+    modes = {
+        'default': {},
+        'fast_path': {'fast_path': True},
+        'stream': {'stream': True},
+        'function_calling': {'function_calling': True},
+        'router': {},
+    }
+    runs = [(mode, options, latency, concurrency) for mode, options in modes.items()]
+    # Pipeline overhead alone: no model latency, one query at a time
+    runs.append(('overhead', {}, 0.0, 1))
+
+    print(f"\n{'mode':<18} {'queries/s':>10} {'p50 (ms)':>9} {'p95 (ms)':>9} {'failed':>7}")
+    for mode, options, model_latency, workers in runs:
+        model = FakeModel(responder=template_responder(), latency=model_latency, chunk_size=64)
+        if mode == 'router':
+            enable_router()
+        output = io.StringIO()
+        try:
+            summary = run_batch(records, lambda query: main.process_query(query, verbose=False, model=model, **options),
+                                concurrency=workers, output=output)
+        finally:
+            disable_router()
+        latencies = [json.loads(line)['elapsed'] for line in output.getvalue().splitlines()]
+        p50, p95 = percentile(latencies, 0.5), percentile(latencies, 0.95)
+        if mode == 'overhead':
+            results['pipeline.overhead.per_query'] = {'value': statistics.mean(latencies), 'unit': 's'}
+        else:
+            results[f"pipeline.{mode}.throughput"] = {'value': summary['throughput'], 'unit': 'queries/s',
+                                                      'higher_is_better': True}
+            results[f"pipeline.{mode}.p50"] = {'value': p50, 'unit': 's'}
+            results[f"pipeline.{mode}.p95"] = {'value': p95, 'unit': 's'}
+        print(f"{mode:<18} {summary['throughput']:>10.1f} {p50 * 1000:>9.2f} {p95 * 1000:>9.2f} "
+              f"{summary['failed']:>7}")
+
+
+def environment() -> dict:
+    """Commit, interpreter and library versions the results were measured with."""
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        'commit': git('rev-parse', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__ if np is not None else None,
+    }
+
+
+def compare(previous: dict, current: dict, threshold: float) -> int:
+    """Print the change of every result present in both runs; return the number of regressions."""
+    print(f"\nCompared with {(previous.get('environment') or {}).get('commit') or 'previous run'}:")
+    changed = [key for key in ('queries', 'latency', 'concurrency', 'min_time')
+               if key in previous.get('config', {}) and previous['config'][key] != current['config'].get(key)]
+    if changed:
+        print(f"  Note: the runs used different settings ({', '.join(changed)})")
+    print(f"{'benchmark':<44} {'before':>12} {'after':>12} {'change':>8}")
+    regressions = 0
+    for key, result in current['results'].items():
+        before = previous.get('results', {}).get(key)
+        if before is None or not before['value']:
+            continue
+        change = result['value'] / before['value'] - 1
+        worse = -change if result.get('higher_is_better') else change
+        flag = ''
+        if worse > threshold:
+            flag = '  ⚠️ regression'
+            regressions += 1
+        elif worse < -threshold:
+            flag = '  faster'
+        print(f"{key:<44} {before['value']:>12.6g} {result['value']:>12.6g} {change:>+7.1%}{flag}")
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite for the reasoning pipeline")
+    parser.add_argument('--sections', nargs='+', choices=SECTIONS, default=list(SECTIONS),
+                        help='Sections to run (default: all)')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100000],
+                        help='Input sizes for the tool benchmarks (default: 10 1000 100000)')
+    parser.add_argument('--queries', type=int, default=200, help='Queries per pipeline mode (default: 200)')
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help='Simulated model latency per request in seconds (default: 0.02)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Batch concurrency (default: 16)')
+    parser.add_argument('--min-time', type=float, default=0.02,
+                        help='Minimum seconds per timing batch in micro-benchmarks (default: 0.02)')
+    parser.add_argument('--output', '-o', metavar='FILE', help='Save the results as JSON')
+    parser.add_argument('--compare', metavar='FILE', help='Compare with results saved by an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative slowdown reported as a regression (default: 0.10)')
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help='Exit with status 1 if --compare finds a regression')
+    args = parser.parse_args()
+
+    results = {}
+    if 'stages' in args.sections:
+        run_stages(args.min_time, results)
+    if 'pipeline' in args.sections:
+        run_pipeline(args.queries, args.latency, args.concurrency, results)
+    if 'tools' in args.sections:
+        run_tools(args.sizes, args.min_time, results)
+
+    report = {
+        'environment': environment(),
+        'config': {key: value for key, value in vars(args).items()
+                   if key not in ('output', 'compare', 'fail_on_regression')},
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nSaved {len(results)} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        regressions = compare(previous, report, args.threshold)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
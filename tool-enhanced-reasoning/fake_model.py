@@ -0,0 +1,259 @@
+"""
+Local stand-in for a Gemini GenerativeModel.
+Returns canned responses with simulated latency, with or without streaming,
+so the pipeline can be exercised and timed without network access.
+Requests with function declarations (tools=...) get the TOOL_CALL lines of
+the canned reasoning back as native function calls. template_responder()
+writes reasoning for the actual query instead of a fixed text. A request
+quota and random failures can be injected to exercise rate limiting.
+"""
+
+import collections
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from tool_parser import TOOL_CALL_MARKER, parse_tool_calls
+from tool_schemas import function_call_from_tool_call
+
+
+DEFAULT_REASONING = """1. The query asks for the square root of an average.
+2. I need the average of 18 and 50 first.
+TOOL_CALL: math.average([18, 50])
+3. Then I take the square root of that average.
+TOOL_CALL: math.square_root(34)
+4. The second result is the final answer."""
+
+DEFAULT_FINAL_ANSWER = "The square root of the average of 18 and 50 is about 5.83."
+
+# Final-answer prompts built by process_query start with this text
+FINAL_PROMPT_PREFIX = "Based on your previous reasoning"
+
+# "- call: value" lines listing the tool results in a final-answer prompt
+_TOOL_RESULT_RE = re.compile(r'^- (.+?\)): (.*)$', re.MULTILINE)
+
+
+def template_responder(fallback: str = DEFAULT_REASONING,
+                       final_answer: str = DEFAULT_FINAL_ANSWER) -> Callable[[str], str]:
+    """
+    Build a responder that reasons about the query in the prompt.
+
+    Queries in a shape the query router knows ("What's the square root of
+    144?", "How many vowels are in 'hello'?") get reasoning with the
+    matching TOOL_CALL line; other queries get the fallback reasoning.
+    Final-answer prompts get a sentence quoting the tool results they list.
+    """
+    from query_router import QueryRouter
+
+    router = QueryRouter()
+
+    def respond(prompt: str) -> str:
+        if prompt.startswith(FINAL_PROMPT_PREFIX):
+            results = _TOOL_RESULT_RE.findall(prompt)
+            if not results:
+                return final_answer
+            return ' '.join(f"{call} gives {value}." for call, value in results)
+
+        query = prompt.rsplit('Query: ', 1)[-1].strip()
+        tool_call = router.match(query)
+        if tool_call is None:
+            return fallback
+        return (f"1. The query asks: {query}\n"
+                f"2. The {tool_call['type']} tool {tool_call['function']} answers this directly.\n"
+                f"TOOL_CALL: {tool_call['source']}\n"
+                f"3. Its result is the final answer.")
+
+    return respond
+
+
+class FakeRateLimitError(Exception):
+    """Quota error, like the SDK's ResourceExhausted (HTTP 429)."""
+
+    code = 429
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class FakeFunctionCall:
+    def __init__(self, name: str, args: Dict[str, Any]):
+        self.name = name
+        self.args = args
+
+
+class FakePart:
+    def __init__(self, text: str = '', function_call: Optional[FakeFunctionCall] = None):
+        self.text = text
+        self.function_call = function_call
+
+
+class _FakeContent:
+    def __init__(self, parts: List[FakePart]):
+        self.role = 'model'
+        self.parts = parts
+
+
+class _FakeCandidate:
+    def __init__(self, parts: List[FakePart]):
+        self.content = _FakeContent(parts)
+
+
+class FakeResponse:
+    """A complete (non-streamed) response, with .text and .candidates like the SDK's."""
+
+    def __init__(self, text: str, parts: Optional[List[FakePart]] = None):
+        self.text = text
+        self.candidates = [_FakeCandidate(parts if parts is not None else [FakePart(text)])]
+
+
+class FakeStreamingResponse:
+    """A streamed response: iterating yields chunks with a .text attribute."""
+
+    def __init__(self, chunks: List[str], first_chunk_delay: float, chunk_delay: float):
+        self._chunks = chunks
+        self._first_chunk_delay = first_chunk_delay
+        self._chunk_delay = chunk_delay
+        self.text = ''.join(chunks)
+
+    def __iter__(self) -> Iterator[FakeResponse]:
+        for index, chunk in enumerate(self._chunks):
+            time.sleep(self._first_chunk_delay if index == 0 else self._chunk_delay)
+            yield FakeResponse(chunk)
+
+
+class FakeModel:
+    """
+    Deterministic model with the generate_content interface used by main.py.
+
+    Latency is modelled as a fixed time to first chunk plus a delay per
+    chunk, so a streamed response delivers its first lines early while a
+    non-streamed one arrives all at once after the full generation time.
+    """
+
+    def __init__(self, responder: Optional[Callable[[str], str]] = None,
+                 reasoning: str = DEFAULT_REASONING,
+                 final_answer: str = DEFAULT_FINAL_ANSWER,
+                 latency: float = 0.0,
+                 chunk_size: int = 16,
+                 chunk_delay: float = 0.0,
+                 model_name: str = 'fake-model',
+                 requests_per_minute: Optional[int] = None,
+                 quota_window: float = 60.0,
+                 error_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        """
+        Create a fake model.
+
+        Args:
+            responder: Function mapping a prompt to the response text; by
+                default reasoning prompts get `reasoning` and final-answer
+                prompts get `final_answer`
+            reasoning: Canned response to reasoning prompts
+            final_answer: Canned response to final-answer prompts
+            latency: Seconds before the first chunk is produced
+            chunk_size: Characters per streamed chunk
+            chunk_delay: Seconds between chunks
+            model_name: Reported model name (used in response cache keys)
+            requests_per_minute: Quota; requests beyond it within any
+                quota_window seconds fail with FakeRateLimitError (None for
+                no quota)
+            quota_window: Length of the quota window (shorter windows make
+                rate limiting quicker to test)
+            error_rate: Fraction of requests failing with FakeRateLimitError
+                regardless of the quota
+            seed: Seed for choosing the failing requests
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+
+        self.responder = responder
+        self.reasoning = reasoning
+        self.final_answer = final_answer
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.model_name = model_name
+
+        self.requests_per_minute = requests_per_minute
+        self.quota_window = quota_window
+        self.error_rate = error_rate
+
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._recent = collections.deque()
+        self.calls = 0
+        self.rejected = 0
+
+    def _check_quota(self):
+        """Count a request against the quota, raising FakeRateLimitError if it fails."""
+        now = time.monotonic()
+        with self._lock:
+            self.calls += 1
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.rejected += 1
+                raise FakeRateLimitError("429 Resource has been exhausted (injected)")
+            if self.requests_per_minute is None:
+                return
+            while self._recent and self._recent[0] <= now - self.quota_window:
+                self._recent.popleft()
+            if len(self._recent) >= self.requests_per_minute:
+                self.rejected += 1
+                raise FakeRateLimitError("429 Quota exceeded for requests per minute",
+                                         retry_after=self._recent[0] + self.quota_window - now)
+            self._recent.append(now)
+
+    def respond(self, prompt: str) -> str:
+        """Return the response text for a prompt."""
+        if self.responder is not None:
+            return self.responder(prompt)
+        if prompt.startswith(FINAL_PROMPT_PREFIX):
+            return self.final_answer
+        return self.reasoning
+
+    def respond_with_functions(self, contents: List[Dict[str, Any]]) -> List[FakePart]:
+        """
+        Return the response parts for a function-calling conversation.
+
+        The first turn gets the reasoning, with its TOOL_CALL lines turned
+        into function calls (calls that depend on other calls are left
+        out); once function responses have been sent, the final answer.
+        """
+        last_parts = contents[-1].get('parts', []) if contents else []
+        if any('function_response' in part for part in last_parts):
+            return [FakePart(self.final_answer)]
+
+        prompt = '\n'.join(part['text'] for part in contents[0].get('parts', []) if 'text' in part)
+        reasoning = self.respond(prompt)
+        parts = []
+        text = '\n'.join(line for line in reasoning.split('\n') if TOOL_CALL_MARKER not in line)
+        if text:
+            parts.append(FakePart(text))
+        for tool_call in parse_tool_calls(reasoning, errors=[]):
+            try:
+                function_call = function_call_from_tool_call(tool_call)
+            except ValueError:
+                continue
+            parts.append(FakePart(function_call=FakeFunctionCall(function_call['name'], function_call['args'])))
+        return parts
+
+    def generate_content(self, prompt, generation_config=None, stream: bool = False, tools=None, **kwargs):
+        """Mimic GenerativeModel.generate_content (prompt is a string, or contents when tools are given)."""
+        self._check_quota()
+
+        if tools is not None:
+            parts = self.respond_with_functions(prompt)
+            text = ''.join(part.text for part in parts)
+            time.sleep(self.latency)
+            return FakeResponse(text, parts)
+
+        text = self.respond(prompt)
+        chunks = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)] or ['']
+
+        if stream:
+            return FakeStreamingResponse(chunks, self.latency, self.chunk_delay)
+
+        time.sleep(self.latency + self.chunk_delay * (len(chunks) - 1))
+        return FakeResponse(text)
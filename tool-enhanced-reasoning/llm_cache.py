@@ -0,0 +1,184 @@
+"""
+Persistent response cache for LLM calls.
+Responses are stored in SQLite, keyed on a hash of the model name, the prompt
+text and the generation config, so reruns of the same prompts skip the API.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache of LLM responses with TTL eviction.
+
+    The cache lives in a single SQLite database in WAL mode, so several
+    processes (and threads) can share it safely. Each thread gets its own
+    connection; writes take an immediate lock and SQLite's busy timeout
+    serialises concurrent writers.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000,
+                 max_bytes: Optional[int] = None, ttl: Optional[float] = 7 * 24 * 3600):
+        """
+        Open (or create) a response cache.
+
+        Args:
+            path: Path to the SQLite database file
+            max_entries: Maximum number of cached responses
+            max_bytes: Optional limit on the total size of cached responses
+            ttl: Seconds before an entry expires (None means never)
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                   key TEXT PRIMARY KEY,
+                   response TEXT NOT NULL,
+                   size INTEGER NOT NULL,
+                   created_at REAL NOT NULL,
+                   accessed_at REAL NOT NULL
+               )"""
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str, generation_config: Dict[str, Any]) -> str:
+        """Build a content-addressed key from the model, prompt and generation config."""
+        payload = json.dumps(
+            {'model': model_name, 'prompt': prompt, 'config': generation_config},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None on a miss."""
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute(
+            "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            row = None
+
+        with self._stats_lock:
+            if row is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+
+        if row is None:
+            return None
+
+        conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def put(self, key: str, response: str):
+        """Store a response and evict expired and least recently used entries."""
+        conn = self._connection()
+        now = time.time()
+        size = len(response.encode('utf-8'))
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now)
+            )
+            evicted = self._evict(conn, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if evicted:
+            with self._stats_lock:
+                self._evictions += evicted
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> int:
+        """Drop expired entries, then the least recently used ones over the limits."""
+        evicted = 0
+
+        if self.ttl is not None:
+            evicted += conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self.ttl,)
+            ).rowcount
+
+        count = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_entries:
+            evicted += conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,)
+            ).rowcount
+
+        if self.max_bytes is None:
+            return evicted
+        # Measured after the deletions above, so their space is not freed twice
+        total_size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total_size > self.max_bytes:
+            excess = total_size - self.max_bytes
+            victims = []
+            for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at ASC"):
+                if excess <= 0:
+                    break
+                victims.append((key,))
+                excess -= size
+            conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+            evicted += len(victims)
+
+        return evicted
+
+    def clear(self):
+        """Remove every cached response."""
+        self._connection().execute("DELETE FROM responses")
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for this process and the current cache size."""
+        with self._stats_lock:
+            hits, misses, evictions = self._hits, self._misses, self._evictions
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'evictions': evictions,
+            'entries': len(self)
+        }
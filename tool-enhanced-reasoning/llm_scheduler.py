@@ -0,0 +1,296 @@
+"""
+Shared scheduler for upstream LLM requests.
+While enabled (see enable_scheduler), every generate_content call made by
+main.py goes through one scheduler, which:
+- admits requests within a requests-per-minute and a tokens-per-minute
+  budget (token buckets), interactive requests before batch ones;
+- retries rate-limit (429) and transient server errors with jittered
+  exponential backoff, pausing all requests after a 429 because the
+  quota is shared;
+- coalesces identical requests in flight, so concurrent copies of one
+  prompt share a single upstream request and its response.
+"""
+
+import contextlib
+import contextvars
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+# Priority lanes (lower is served first)
+INTERACTIVE = 0
+BATCH = 1
+
+# Requests that may start back to back by default. A larger burst lets a
+# full bucket add that many requests on top of a minute's budget.
+DEFAULT_BURST = 1
+
+# HTTP statuses worth retrying
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Exception class names of the Google API client for the same conditions
+RETRYABLE_ERROR_NAMES = frozenset({
+    'ResourceExhausted', 'TooManyRequests', 'InternalServerError', 'BadGateway',
+    'ServiceUnavailable', 'GatewayTimeout', 'DeadlineExceeded',
+})
+
+
+def error_status(error: BaseException) -> Optional[int]:
+    """Return the HTTP status of an API error, if it has one."""
+    code = getattr(error, 'code', None)
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_rate_limit(error: BaseException) -> bool:
+    """Tell whether an error means the quota was exceeded (HTTP 429)."""
+    return error_status(error) == 429 or type(error).__name__ in ('ResourceExhausted', 'TooManyRequests')
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Tell whether a failed request may succeed if sent again."""
+    return error_status(error) in RETRYABLE_STATUS_CODES or type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+
+class TokenBucket:
+    """
+    Budget that refills continuously at a rate per minute, up to a capacity.
+
+    Not thread-safe on its own; the scheduler uses it under its lock.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.rate = per_minute / 60.0
+        self.capacity = float(capacity if capacity is not None else per_minute)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken (amounts above the capacity wait for a full bucket)."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def give(self, amount: float):
+        """Return (or, if negative, charge) part of an earlier take."""
+        self.level = min(self.capacity, self.level + amount)
+
+
+class LLMScheduler:
+    """
+    Rate limiting, retries, priority lanes and request coalescing for LLM calls.
+
+    Requests run in their callers' threads; the scheduler only decides when
+    each one may start. Thread-safe.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 burst: float = DEFAULT_BURST, max_retries: int = 4, base_delay: float = 1.0,
+                 max_delay: float = 30.0, rng: Optional[random.Random] = None):
+        """
+        Create a scheduler.
+
+        Args:
+            requests_per_minute: Request budget (None for no limit)
+            tokens_per_minute: Token budget, charged with the prompt
+                estimate plus max_output_tokens and settled with the
+                reported usage (None for no limit)
+            burst: Requests that may start back to back when the budget is
+                full; a minute may see up to requests_per_minute + burst
+            max_retries: Retries of a request that failed with a retryable error
+            base_delay: Backoff before the first retry, in seconds (doubled
+                for every further retry, with jitter)
+            max_delay: Upper bound of the backoff
+            rng: Random source for the jitter
+        """
+        if max_retries < 0:
+            raise ValueError("max_retries must not be negative")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self._requests = TokenBucket(requests_per_minute, burst) if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._random = rng or random.Random()
+
+        self._condition = threading.Condition()
+        self._waiting: list = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._stats = {'requests': 0, 'upstream_requests': 0, 'coalesced': 0, 'retries': 0,
+                       'rate_limited': 0, 'failed': 0, 'wait_seconds': 0.0}
+
+    def _admit(self, ticket: Tuple[int, int], tokens: int):
+        """Block until a request is first in line and the budgets allow it, then charge them."""
+        started = time.monotonic()
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    delay = None
+                    if self._waiting[0] == ticket:
+                        now = time.monotonic()
+                        delay = self._paused_until - now
+                        if self._requests is not None:
+                            delay = max(delay, self._requests.wait_time(1, now))
+                        if self._tokens is not None and tokens:
+                            delay = max(delay, self._tokens.wait_time(tokens, now))
+                        if delay <= 0:
+                            if self._requests is not None:
+                                self._requests.take(1, now)
+                            if self._tokens is not None and tokens:
+                                self._tokens.take(tokens, now)
+                            break
+                    self._condition.wait(delay)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._stats['wait_seconds'] += time.monotonic() - started
+                self._condition.notify_all()
+
+    def _backoff(self, attempt: int) -> float:
+        """Delay before a retry: half fixed, half random, doubling with each attempt."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return ceiling / 2 + self._random.uniform(0, ceiling / 2)
+
+    def _send(self, request: Callable[[], Any], priority: int, tokens: int,
+              used_tokens: Optional[Callable[[Any], Optional[int]]]) -> Any:
+        # The request keeps its place in line across retries
+        ticket = (priority, next(self._sequence))
+        for attempt in itertools.count():
+            self._admit(ticket, tokens)
+            with self._condition:
+                self._stats['upstream_requests'] += 1
+            try:
+                result = request()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    with self._condition:
+                        self._stats['failed'] += 1
+                    raise
+                delay = getattr(e, 'retry_after', None) or self._backoff(attempt)
+                with self._condition:
+                    self._stats['retries'] += 1
+                    if is_rate_limit(e):
+                        # The quota is shared, so everyone waits
+                        self._stats['rate_limited'] += 1
+                        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                        self._condition.notify_all()
+                if not is_rate_limit(e):
+                    time.sleep(delay)
+                continue
+
+            if self._tokens is not None and tokens and used_tokens is not None:
+                used = used_tokens(result)
+                if used is not None:
+                    with self._condition:
+                        self._tokens.give(tokens - used)
+                        self._condition.notify_all()
+            return result
+
+    def call(self, request: Callable[[], Any], key: Optional[Hashable] = None, tokens: int = 0,
+             priority: Optional[int] = None,
+             used_tokens: Optional[Callable[[Any], Optional[int]]] = None) -> Tuple[Any, bool]:
+        """
+        Run an upstream request under the scheduler.
+
+        Args:
+            request: Function that sends the request and returns the response
+            key: Identifies identical requests; while one with the same key
+                is in flight, the call waits for its response instead of
+                sending another (None to never coalesce)
+            tokens: Tokens the request may use (charged to the token budget)
+            priority: Lane (defaults to the current context's, see llm_priority)
+            used_tokens: Function returning the tokens a response actually
+                used, to settle the token budget
+
+        Returns:
+            (response, coalesced): coalesced is True when the response was
+            shared from another caller's request
+
+        Raises:
+            Exception: The request's last error, once retries are exhausted
+                or for errors that are not retryable
+        """
+        with self._condition:
+            self._stats['requests'] += 1
+            if key is not None:
+                shared = self._in_flight.get(key)
+                if shared is not None:
+                    self._stats['coalesced'] += 1
+                else:
+                    self._in_flight[key] = Future()
+        if key is not None and shared is not None:
+            return shared.result(), True
+
+        lane = _priority.get() if priority is None else priority
+        try:
+            result = self._send(request, lane, tokens, used_tokens)
+        except BaseException as e:
+            if key is not None:
+                with self._condition:
+                    self._in_flight.pop(key).set_exception(e)
+            raise
+        if key is not None:
+            with self._condition:
+                self._in_flight.pop(key).set_result(result)
+        return result, False
+
+    def stats(self) -> Dict[str, Any]:
+        """Return request, coalescing, retry and waiting counts."""
+        with self._condition:
+            return dict(self._stats)
+
+
+# The lane of LLM requests made in the current thread/context
+_priority: contextvars.ContextVar = contextvars.ContextVar('llm_priority', default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def llm_priority(priority: int) -> Iterator[None]:
+    """Send the LLM requests made inside the block in a priority lane (INTERACTIVE or BATCH)."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+# The shared scheduler (see enable_scheduler); None when disabled
+_scheduler: Optional[LLMScheduler] = None
+
+
+def enable_scheduler(**options) -> LLMScheduler:
+    """Send all LLM requests through a shared scheduler (options are passed to LLMScheduler)."""
+    global _scheduler
+    _scheduler = LLMScheduler(**options)
+    return _scheduler
+
+
+def disable_scheduler():
+    """Send LLM requests directly again."""
+    global _scheduler
+    _scheduler = None
+
+
+def get_scheduler() -> Optional[LLMScheduler]:
+    """Return the shared scheduler, or None if it is disabled."""
+    return _scheduler
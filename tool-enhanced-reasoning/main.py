@@ -12,35 +12,228 @@ Usage:
 
 Then enter your queries interactively, or use:
     python main.py --query "Your question here"
+
+To process a file of queries concurrently:
+    python main.py --batch queries.jsonl --concurrency 8 --output results.jsonl
+
+To keep a warmed process answering queries over local HTTP:
+    python main.py --serve 8000 --concurrency 8
 """
 
 import argparse
+import functools
+import json
+import math
 import sys
 import os
-import re
-from typing import Dict, Any, List, Optional
-import google.generativeai as genai
-from dotenv import load_dotenv
-from tools.math_tools import call_math_function, get_available_functions as get_math_functions
-from tools.string_tools import call_string_function, get_available_functions as get_string_functions
+import threading
+import time
+from collections.abc import Mapping, Sequence
+from concurrent.futures import Executor
+from typing import Dict, Any, Iterator, List, Optional
+from tools.registry import get_registry
+from tools.cache import enable_result_cache, get_result_cache
+from tools.text_index import enable_text_index, get_text_index
+from llm_cache import ResponseCache
+from tool_parser import parse_tool_calls
+from tool_executor import ToolExecutor, execute_tool_calls, format_result
+from streaming import stream_reasoning
+from answer_templates import synthesize_answer
+from query_router import enable_router, get_router
+from metrics import enable_profiling, estimate_tokens, get_metrics, lap, profiled, record_llm_call, record_parse_failures
+from llm_scheduler import BATCH, enable_scheduler, get_scheduler, llm_priority
+
+MODEL_NAME = 'gemini-1.5-flash'
+
+# The Gemini SDK and python-dotenv are imported on first use, so --help,
+# tool-only use and runs with another model do not pay for them
+_environment_loaded = False
+_model = None
+_model_lock = threading.Lock()
+
+
+def load_environment():
+    """Load variables from a .env file (once)."""
+    global _environment_loaded
+    if not _environment_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _environment_loaded = True
+
+
+def get_model():
+    """Return the Gemini model client shared by all queries, creating it on first use."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                load_environment()
+                import google.generativeai as genai
+                genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+                _model = genai.GenerativeModel(MODEL_NAME)
+    return _model
+
+
+def _generation_config(temperature: float, max_output_tokens: int) -> Dict[str, Any]:
+    """Generation settings as a plain dict (accepted by generate_content without importing the SDK types)."""
+    return {'temperature': temperature, 'max_output_tokens': max_output_tokens}
+
+# Optional persistent response cache shared by all LLM calls (see configure_response_cache)
+_response_cache: Optional[ResponseCache] = None
+
+
+def configure_response_cache(path: Optional[str], max_entries: int = 10000,
+                             ttl: Optional[float] = 7 * 24 * 3600) -> Optional[ResponseCache]:
+    """Enable the on-disk LLM response cache, or disable it when path is None."""
+    global _response_cache
+    _response_cache = ResponseCache(path, max_entries=max_entries, ttl=ttl) if path else None
+    return _response_cache
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the active LLM response cache, if any."""
+    return _response_cache
+
+
+# Optional pool shared by all queries for running tools (see configure_tool_pool);
+# when None, each query runs its tools in a small thread pool of its own
+_tool_pool: Optional[Executor] = None
+
+
+def configure_tool_pool(processes: int, sandbox: bool = False, **limits) -> Optional[Executor]:
+    """
+    Run tools in a shared pool of worker processes, or per-query threads when processes is 0.
+
+    Args:
+        processes: Number of worker processes (0 for per-query threads)
+        sandbox: Run each call in a SandboxPool worker with time, memory and result-size limits
+        **limits: Limits passed to SandboxPool (timeout, cpu_time, memory_mb, max_result_bytes)
+    """
+    global _tool_pool
+    if _tool_pool is not None:
+        _tool_pool.shutdown()
+    if sandbox:
+        from sandbox import SandboxPool
+        _tool_pool = SandboxPool(workers=processes or os.cpu_count() or 1, **limits)
+    elif processes > 0:
+        from concurrent.futures import ProcessPoolExecutor
+        _tool_pool = ProcessPoolExecutor(max_workers=processes)
+    else:
+        _tool_pool = None
+    return _tool_pool
 
-# Load environment variables
-load_dotenv()
 
-# Configure Gemini API
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+def _cache_key(cache: ResponseCache, model, prompt: str, temperature: float, max_output_tokens: int) -> str:
+    """Build the response cache key for a generation request."""
+    return cache.make_key(
+        getattr(model, 'model_name', MODEL_NAME),
+        prompt,
+        {'temperature': temperature, 'max_output_tokens': max_output_tokens}
+    )
 
 
-def create_reasoning_prompt(query: str) -> str:
-    """Create a chain-of-thought prompt for the LLM."""
-    math_functions = get_math_functions()
-    string_functions = get_string_functions()
+def _used_tokens(response) -> Optional[int]:
+    """Total tokens a response reports having used, if it does."""
+    return getattr(getattr(response, 'usage_metadata', None), 'total_token_count', None)
+
+
+def _send(request, prompt: str, max_output_tokens: int, key: Optional[tuple] = None):
+    """
+    Send a request upstream, through the LLM scheduler when it is enabled.
+
+    Returns (response, coalesced); a coalesced response was shared with an
+    identical request (same key) that was already in flight.
+    """
+    scheduler = get_scheduler()
+    if scheduler is None:
+        return request(), False
+    return scheduler.call(request, key=key, tokens=estimate_tokens(prompt) + max_output_tokens,
+                          used_tokens=_used_tokens)
+
+
+def generate_text(model, prompt: str, temperature: float, max_output_tokens: int) -> str:
+    """Generate a response for a prompt, serving it from the response cache when possible."""
+    start = time.perf_counter()
+    cache = _response_cache
+    if cache is not None:
+        key = _cache_key(cache, model, prompt, temperature, max_output_tokens)
+        cached = cache.get(key)
+        if cached is not None:
+            record_llm_call(start, prompt, cached, cached=True)
+            return cached
+
+    response, coalesced = _send(
+        lambda: model.generate_content(
+            prompt,
+            generation_config=_generation_config(temperature, max_output_tokens)
+        ),
+        prompt, max_output_tokens, key=(id(model), prompt, temperature, max_output_tokens)
+    )
+    text = response.text
+    record_llm_call(start, prompt, text, getattr(response, 'usage_metadata', None), cached=coalesced)
+
+    if cache is not None:
+        cache.put(key, text)
+    return text
+
+
+def generate_text_stream(model, prompt: str, temperature: float, max_output_tokens: int) -> Iterator[str]:
+    """Yield a response chunk by chunk as it is generated; cached responses are yielded whole."""
+    start = time.perf_counter()
+    cache = _response_cache
+    if cache is not None:
+        key = _cache_key(cache, model, prompt, temperature, max_output_tokens)
+        cached = cache.get(key)
+        if cached is not None:
+            record_llm_call(start, prompt, cached, cached=True)
+            yield cached
+            return
+
+    # Streams are rate limited and retried until they start, but not shared
+    response, _ = _send(
+        lambda: model.generate_content(
+            prompt,
+            generation_config=_generation_config(temperature, max_output_tokens),
+            stream=True
+        ),
+        prompt, max_output_tokens
+    )
+
+    parts = []
+    usage = None
+    for chunk in response:
+        # Token usage is reported on the last chunk
+        usage = getattr(chunk, 'usage_metadata', None) or usage
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunks without text parts (e.g. the closing finish_reason chunk)
+            continue
+        if text:
+            parts.append(text)
+            yield text
+    record_llm_call(start, prompt, ''.join(parts), usage)
+
+    if cache is not None:
+        cache.put(key, ''.join(parts))
+
 
-    prompt = f"""You are a helpful assistant that can reason through problems step by step and use tools when necessary.
+@functools.lru_cache(maxsize=None)
+def reasoning_prompt_prefix() -> str:
+    """
+    Build the query-independent part of the reasoning prompt.
+
+    Everything before the query is identical for every request, so providers
+    can reuse the cached prefix. It is built once, on first use, so that
+    importing main does not load every tool family.
+    """
+    tool_lists = '\n'.join(f"{family.upper()} TOOLS: {', '.join(functions)}"
+                           for family, functions in get_registry().all_functions().items())
+
+    return f"""You are a helpful assistant that can reason through problems step by step and use tools when necessary.
 
 Available Tools:
-MATH TOOLS: {', '.join(math_functions)}
-STRING TOOLS: {', '.join(string_functions)}
+{tool_lists}
 
 When you need to use a tool, format your tool call exactly like this:
 TOOL_CALL: tool_type.function_name(arguments)
@@ -49,137 +242,389 @@ Examples:
 - TOOL_CALL: math.square_root(25)
 - TOOL_CALL: string.count_vowels("hello")
 - TOOL_CALL: math.average([10, 20, 30])
+- TOOL_CALL: math.evaluate_expression("(15 + 27) * 3")
 
-Please analyze this query step by step using chain-of-thought reasoning:
+Arithmetic with several steps fits in one math.evaluate_expression call, which
+follows the usual order of operations and can call the other math tools, as in
+TOOL_CALL: math.evaluate_expression("square_root(average([18, 50])) * 2")
 
-Query: {query}
+A tool call can use the result of another: nest it, as in
+TOOL_CALL: math.square_root(math.average([18, 50]))
+or refer to the result of your N-th earlier TOOL_CALL with $N, as in
+TOOL_CALL: math.multiply($1, 3)
+Independent tool calls run in parallel.
 
+Please analyze the query below step by step using chain-of-thought reasoning.
 Think through this step by step:
 1. What is the query asking for?
 2. What information or calculations do I need?
 3. Do I need to use any tools? If so, which ones and with what arguments?
 4. How will I combine the results to get the final answer?
 
-Provide your reasoning and any necessary tool calls."""
-    return prompt
+Provide your reasoning and any necessary tool calls.
 
+Query: """
 
-def parse_tool_calls(response_text: str) -> List[Dict[str, Any]]:
-    """Parse tool calls from the LLM response."""
-    tool_calls = []
-    pattern = r'TOOL_CALL:\s*(\w+)\.(\w+)\((.*?)\)'
-    matches = re.findall(pattern, response_text)
+# Instructions for native function calling; the tools themselves are sent as
+# typed declarations (see tool_schemas.py)
+FUNCTION_CALLING_PROMPT = """You are a helpful assistant that reasons through problems step by step.
+Call the provided functions for any calculation or string analysis instead of doing it yourself; \
+independent calls can be made together. Explain your reasoning briefly, then give a clear, concise \
+final answer once you have the function results."""
 
-    for match in matches:
-        tool_type, function_name, args_str = match
-        try:
-            if not args_str.strip():
-                args = []
-            elif args_str.strip().startswith('[') and args_str.strip().endswith(']'):
-                args = [eval(args_str.strip())]
-            elif ',' in args_str:
-                args = [eval(arg.strip()) for arg in args_str.split(',')]
-            else:
-                args = [eval(args_str.strip())]
-
-            tool_calls.append({
-                'type': tool_type,
-                'function': function_name,
-                'args': args
-            })
-        except Exception as e:
-            print(f"Error parsing tool call: {e}")
-            continue
+# Rounds of function calls allowed per query before giving up
+MAX_FUNCTION_ROUNDS = 4
 
-    return tool_calls
 
+def create_reasoning_prompt(query: str) -> str:
+    """Create a chain-of-thought prompt for the LLM."""
+    return reasoning_prompt_prefix() + query
+
+
+def _plain(value: Any) -> Any:
+    """Convert SDK (protobuf) maps and lists in function call arguments to dicts and lists."""
+    if isinstance(value, Mapping):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, Sequence) and not isinstance(value, (str, bytes)):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _response_parts(response) -> List[Dict[str, Any]]:
+    """Return the parts of a response as {'text': ...} and {'function_call': {'name', 'args'}} dicts."""
+    parts = []
+    for part in response.candidates[0].content.parts:
+        function_call = getattr(part, 'function_call', None)
+        if function_call and function_call.name:
+            parts.append({'function_call': {'name': function_call.name, 'args': _plain(function_call.args)}})
+        elif getattr(part, 'text', ''):
+            parts.append({'text': part.text})
+    return parts
+
+
+def generate_parts(model, contents: List[Dict[str, Any]], temperature: float,
+                   max_output_tokens: int) -> List[Dict[str, Any]]:
+    """Generate a function-calling turn, serving it from the response cache when possible."""
+    from tool_schemas import SCHEMA_DIGEST, TOOLS
+
+    start = time.perf_counter()
+    prompt = json.dumps(contents, sort_keys=True)
+    cache = _response_cache
+    if cache is not None:
+        key = cache.make_key(
+            getattr(model, 'model_name', MODEL_NAME),
+            prompt,
+            {'temperature': temperature, 'max_output_tokens': max_output_tokens, 'tools': SCHEMA_DIGEST}
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            parts = json.loads(cached)
+            record_llm_call(start, contents, parts, cached=True)
+            return parts
+
+    response, coalesced = _send(
+        lambda: model.generate_content(
+            contents,
+            generation_config=_generation_config(temperature, max_output_tokens),
+            tools=TOOLS,
+            tool_config={'function_calling_config': {'mode': 'AUTO'}}
+        ),
+        prompt, max_output_tokens, key=(id(model), 'tools', prompt, temperature, max_output_tokens)
+    )
+    parts = _response_parts(response)
+    record_llm_call(start, contents, parts, getattr(response, 'usage_metadata', None), cached=coalesced)
+
+    if cache is not None:
+        cache.put(key, json.dumps(parts))
+    return parts
 
-def execute_tool_calls(tool_calls: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Execute the parsed tool calls."""
-    results = {}
-    errors = []
 
-    for tool_call in tool_calls:
-        tool_type = tool_call.get('type', '').lower()
-        function_name = tool_call.get('function', '')
-        args = tool_call.get('args', [])
-        call_key = f"{tool_type}.{function_name}({', '.join(map(str, args))})"
+def _json_safe(value: Any) -> Any:
+    """Make a tool result representable in a function response (JSON numbers are doubles)."""
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, int):
+        return value if abs(value) <= 2 ** 53 else format_result(value)
+    if isinstance(value, float):
+        return value if math.isfinite(value) else str(value)
+    if isinstance(value, dict):
+        return {str(key): _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    return str(value)
 
-        try:
-            if tool_type == 'math':
-                result = call_math_function(function_name, *args)
-                results[call_key] = result
-            elif tool_type == 'string':
-                result = call_string_function(function_name, *args)
-                results[call_key] = result
-            else:
-                errors.append(f"Unknown tool type: {tool_type}")
-        except Exception as e:
-            errors.append(f"Error executing {call_key}: {str(e)}")
 
-    return {'results': results, 'errors': errors}
+def _quiet(*args, **kwargs):
+    """Discard progress output (used when processing queries in batch)."""
+    pass
 
 
-def process_query(query: str) -> Dict[str, Any]:
-    """Process a single query through the complete pipeline."""
-    model = genai.GenerativeModel('gemini-1.5-flash')
+def _log_tool_results(log, tool_results: Dict[str, Any], timings: Dict[str, Dict[str, float]],
+                      errors: List[str]):
+    """Print tool results with their durations, and any errors."""
+    if tool_results:
+        log("Tool Results:")
+        for call, value in tool_results.items():
+            duration = timings.get(call, {}).get('duration')
+            took = f" ({duration * 1000:.2f} ms)" if duration is not None else ""
+            log(f"- {call} = {format_result(value)}{took}")
+
+    if errors:
+        log("Errors:")
+        for error in errors:
+            log(f"- {error}")
+
+
+def _run_function_calls(calls: List[Dict[str, Any]], result: Dict[str, Any], log) -> List[Dict[str, Any]]:
+    """
+    Execute one turn of model function calls.
+
+    Records the tool calls, results, timings and errors in result, and
+    returns the function_response parts to send back to the model.
+    """
+    from tool_schemas import tool_call_from_function_call
+
+    submitted = []
+    with ToolExecutor(pool=_tool_pool) as executor:
+        for call in calls:
+            try:
+                tool_call = tool_call_from_function_call(call['name'], call['args'])
+            except ValueError as e:
+                result['errors'].append(f"Invalid function call {call['name']}: {e}")
+                record_parse_failures(1)
+                submitted.append((call, None, e))
+                continue
+            result['tool_calls'].append(tool_call)
+            submitted.append((call, tool_call, executor.submit(tool_call)))
+        execution_results = executor.wait()
+
+    result['tool_results'].update(execution_results['results'])
+    result['tool_timings'].update(execution_results['timings'])
+    result['errors'].extend(execution_results['errors'])
+    _log_tool_results(log, execution_results['results'], execution_results['timings'], execution_results['errors'])
+
+    responses = []
+    for call, tool_call, outcome in submitted:
+        if tool_call is None:
+            response = {'error': str(outcome)}
+        elif outcome.exception() is not None:
+            response = {'error': str(outcome.exception())}
+        else:
+            response = {'result': _json_safe(outcome.result())}
+        responses.append({'function_response': {'name': call['name'], 'response': response}})
+    return responses
+
+
+def _process_with_function_calling(query: str, model, result: Dict[str, Any], log,
+                                   fast_path: bool) -> Dict[str, Any]:
+    """Answer a query with native function calling (see process_query)."""
+    log("\n🧠 REASONING PHASE (function calling):")
+    log("-" * 40)
+
+    contents = [{'role': 'user', 'parts': [{'text': FUNCTION_CALLING_PROMPT}, {'text': f"Query: {query}"}]}]
+    reasoning = []
+    final_answer = None
+
+    for _ in range(MAX_FUNCTION_ROUNDS):
+        try:
+            parts = generate_parts(model, contents, temperature=0.1, max_output_tokens=1000)
+        except Exception as e:
+            log(f"Error getting LLM response: {e}")
+            result['error'] = f"Error getting LLM response: {e}"
+            return result
+
+        text = ''.join(part['text'] for part in parts if 'text' in part).strip()
+        calls = [part['function_call'] for part in parts if 'function_call' in part]
+        if not calls:
+            lap('final_answer')
+            final_answer = text
+            break
+        lap('reasoning')
+
+        if text:
+            reasoning.append(text)
+            log(text)
+        log(f"\n🔧 TOOL EXECUTION PHASE:")
+        log("-" * 40)
+        responses = _run_function_calls(calls, result, log)
+        lap('tools')
+
+        if fast_path and result['tool_results']:
+            final_answer = synthesize_answer(query, result['tool_calls'], result['tool_results'], result['errors'])
+            if final_answer is not None:
+                result['answer_path'] = 'fast_path'
+                break
 
-    print(f"\n{'='*60}")
-    print(f"PROCESSING QUERY: {query}")
-    print(f"{'='*60}")
+        contents.append({'role': 'model', 'parts': parts})
+        contents.append({'role': 'user', 'parts': responses})
+    else:
+        error = f"No final answer after {MAX_FUNCTION_ROUNDS} rounds of function calls"
+        result['errors'].append(error)
+        final_answer = error
+
+    if result['answer_path'] is None:
+        result['answer_path'] = 'llm' if result['tool_calls'] else 'reasoning'
+    result['reasoning'] = '\n'.join(reasoning) if result['tool_calls'] else final_answer
+
+    log(f"\n💡 FINAL ANSWER PHASE:")
+    log("-" * 40)
+    log(final_answer)
+
+    result['final_answer'] = final_answer
+    result['success'] = True
+    return result
+
+
+@profiled
+def process_query(query: str, verbose: bool = True, stream: bool = False, model=None,
+                  fast_path: bool = False, function_calling: bool = False) -> Dict[str, Any]:
+    """
+    Process a single query through the complete pipeline.
+
+    Args:
+        query: Natural language query
+        verbose: Print each phase as it runs
+        stream: Stream the reasoning and run each tool call as soon as its
+            line is complete, overlapping tool execution with generation
+        model: Model to use (defaults to the shared Gemini client from
+            get_model(); any object with a compatible generate_content,
+            such as fake_model.FakeModel, works)
+        fast_path: Phrase the final answer from templates, without a second
+            LLM call, when the tool results need no interpretation
+        function_calling: Let the model call tools through typed function
+            declarations (see tool_schemas.py) instead of TOOL_CALL lines;
+            stream is ignored in this mode
+
+    When the query router is enabled (see query_router.enable_router),
+    queries it recognises are answered by a direct tool call and never
+    reach the LLM.
+
+    While profiling is on (see metrics.enable_profiling), the result also
+    has a 'profile' with per-phase timings, token counts and tool timings.
+
+    Returns:
+        Structured result with the reasoning, tool calls, tool results,
+        errors, final answer and answer_path: 'router' (no LLM call),
+        'llm' (second LLM call), 'fast_path' (local template) or
+        'reasoning' (no tools were used)
+    """
+    log = print if verbose else _quiet
+    result = {
+        'query': query,
+        'success': False,
+        'reasoning': None,
+        'tool_calls': [],
+        'tool_results': {},
+        'tool_timings': {},
+        'errors': [],
+        'final_answer': None,
+        'answer_path': None
+    }
+
+    log(f"\n{'='*60}")
+    log(f"PROCESSING QUERY: {query}")
+    log(f"{'='*60}")
+
+    router = get_router()
+    routed = router.route(query, pool=_tool_pool) if router is not None else None
+    lap('routing')
+    if routed is not None:
+        tool_call = routed['tool_call']
+        result['tool_calls'] = [tool_call]
+        result['tool_results'] = {tool_call['source']: routed['result']}
+        result['final_answer'] = routed['answer']
+        result['answer_path'] = 'router'
+        result['success'] = True
+        log(f"\n🧭 ROUTED: {tool_call['source']} = {routed['result']}")
+        log(f"\n💡 FINAL ANSWER PHASE:")
+        log("-" * 40)
+        log(routed['answer'])
+        lap('final_answer')
+        return result
+
+    if model is None:
+        model = get_model()
+
+    if function_calling:
+        return _process_with_function_calling(query, model, result, log, fast_path)
 
     # Step 1: Get reasoning from LLM
-    print("\n🧠 REASONING PHASE:")
-    print("-" * 40)
+    log("\n🧠 REASONING PHASE:")
+    log("-" * 40)
 
     prompt = create_reasoning_prompt(query)
+    parse_errors = []
 
     try:
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.1,
-                max_output_tokens=1000,
+        if stream:
+            streamed = stream_reasoning(
+                generate_text_stream(model, prompt, temperature=0.1, max_output_tokens=1000),
+                errors=parse_errors,
+                on_text=lambda text: log(text, end='', flush=True),
+                pool=_tool_pool
             )
-        )
-        reasoning = response.text
-        print(reasoning)
+            reasoning = streamed['reasoning']
+            if not reasoning.endswith('\n'):
+                log()
+        else:
+            reasoning = generate_text(model, prompt, temperature=0.1, max_output_tokens=1000)
+            log(reasoning)
     except Exception as e:
-        print(f"Error getting LLM response: {e}")
-        return
+        log(f"Error getting LLM response: {e}")
+        result['error'] = f"Error getting LLM response: {e}"
+        return result
+    lap('reasoning')
+
+    result['reasoning'] = reasoning
 
-    # Step 2: Parse and execute tools
-    tool_calls = parse_tool_calls(reasoning)
+    # Step 2: Parse and execute tools (already done while streaming)
+    if stream:
+        tool_calls = streamed['tool_calls']
+    else:
+        tool_calls = parse_tool_calls(reasoning, errors=parse_errors)
+    result['tool_calls'] = tool_calls
+    record_parse_failures(len(parse_errors))
+    lap('parsing')
 
-    print(f"\n🔧 TOOL EXECUTION PHASE:")
-    print("-" * 40)
+    log(f"\n🔧 TOOL EXECUTION PHASE:")
+    log("-" * 40)
 
     if tool_calls:
-        execution_results = execute_tool_calls(tool_calls)
+        execution_results = streamed if stream else execute_tool_calls(tool_calls, pool=_tool_pool)
         tool_results = execution_results['results']
-
-        if tool_results:
-            print("Tool Results:")
-            for call, result in tool_results.items():
-                print(f"- {call} = {result}")
-
-        if execution_results['errors']:
-            print("Errors:")
-            for error in execution_results['errors']:
-                print(f"- {error}")
+        timings = execution_results['timings']
+        result['tool_timings'] = timings
+        result['errors'] = parse_errors + execution_results['errors']
+        _log_tool_results(log, tool_results, timings, execution_results['errors'])
     else:
-        print("No tools were needed for this query.")
+        log("No tools were needed for this query.")
         tool_results = {}
+        result['errors'] = parse_errors
+
+    if parse_errors and not tool_results:
+        for error in parse_errors:
+            log(f"- {error}")
+
+    result['tool_results'] = tool_results
+    lap('tools')
 
     # Step 3: Get final answer
-    print(f"\n💡 FINAL ANSWER PHASE:")
-    print("-" * 40)
+    log(f"\n💡 FINAL ANSWER PHASE:")
+    log("-" * 40)
+
+    final_answer = None
+    if tool_results and fast_path:
+        final_answer = synthesize_answer(query, tool_calls, tool_results, result['errors'])
+
+    if final_answer is not None:
+        result['answer_path'] = 'fast_path'
+    elif tool_results:
+        result['answer_path'] = 'llm'
 
-    if tool_results:
         # Create final answer prompt
         tool_results_str = "\nTool Results:\n"
-        for call, result in tool_results.items():
-            tool_results_str += f"- {call}: {result}\n"
+        for call, value in tool_results.items():
+            tool_results_str += f"- {call}: {format_result(value)}\n"
 
         final_prompt = f"""Based on your previous reasoning and the tool results, provide a clear final answer.
 
@@ -192,17 +637,13 @@ Your Previous Reasoning:
 Now provide a clear, concise final answer to the original query."""
 
         try:
-            response = model.generate_content(
-                final_prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.1,
-                    max_output_tokens=500,
-                )
-            )
-            final_answer = response.text
+            final_answer = generate_text(model, final_prompt, temperature=0.1, max_output_tokens=500)
         except Exception as e:
             final_answer = f"Error getting final answer: {e}"
+            result['errors'].append(final_answer)
     else:
+        result['answer_path'] = 'reasoning'
+
         # Extract answer from reasoning
         lines = reasoning.split('\n')
         final_answer = "Based on the reasoning above, the answer can be found in the analysis."
@@ -211,10 +652,16 @@ Now provide a clear, concise final answer to the original query."""
                 final_answer = line.strip()
                 break
 
-    print(final_answer)
+    log(final_answer)
+    lap('final_answer')
+
+    result['final_answer'] = final_answer
+    result['success'] = True
+    return result
 
-def interactive_mode():
-    """Run the script in interactive mode."""
+
+def interactive_mode(**options):
+    """Run the script in interactive mode (options are passed to process_query)."""
     print("🤖 Tool-Enhanced Reasoning System")
     print("=" * 50)
     print("Enter your queries and I'll reason through them step by step!")
@@ -240,7 +687,7 @@ def interactive_mode():
                 continue
 
             # Process the query
-            process_query(query)
+            process_query(query, **options)
 
         except KeyboardInterrupt:
             print("\n\n👋 Goodbye!")
@@ -251,19 +698,17 @@ def interactive_mode():
 
 def show_help():
     """Show available tools and example queries."""
-    math_functions = get_math_functions()
-    string_functions = get_string_functions()
+    icons = {'math': '📊', 'string': '📝'}
 
     print("\n🔧 AVAILABLE TOOLS:")
     print("-" * 30)
 
-    print("📊 Math Tools:")
-    for func in math_functions:
-        print(f"  - {func}")
-
-    print("\n📝 String Tools:")
-    for func in string_functions:
-        print(f"  - {func}")
+    for index, (family, functions) in enumerate(get_registry().all_functions().items()):
+        if index:
+            print()
+        print(f"{icons.get(family, '🧩')} {family.title()} Tools:")
+        for func in functions:
+            print(f"  - {func}")
 
     print("\n💡 EXAMPLE QUERIES:")
     print("-" * 30)
@@ -281,6 +726,117 @@ def show_help():
         print(f"  {i}. {example}")
 
 
+def run_batch_mode(path: str, concurrency: int, output_path: Optional[str] = None, **options):
+    """Run every query in a JSONL/CSV file and report throughput (options are passed to process_query)."""
+    from batch import load_queries, run_batch
+
+    try:
+        queries = load_queries(path)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error loading batch file: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"📦 Processing {len(queries)} queries with concurrency {concurrency}...", file=sys.stderr)
+
+    def process(query: str) -> Dict[str, Any]:
+        # Interactive requests (e.g. to a server sharing the scheduler) go first
+        with llm_priority(BATCH):
+            return process_query(query, verbose=False, **options)
+
+    output = open(output_path, 'w', encoding='utf-8') if output_path else sys.stdout
+    try:
+        summary = run_batch(
+            queries,
+            process,
+            concurrency=concurrency,
+            output=output
+        )
+    finally:
+        if output_path:
+            output.close()
+
+    print(f"\n📊 BATCH SUMMARY:", file=sys.stderr)
+    print(f"- Queries: {summary['total']} ({summary['succeeded']} succeeded, {summary['failed']} failed)",
+          file=sys.stderr)
+    print(f"- Wall time: {summary['elapsed']:.2f}s", file=sys.stderr)
+    print(f"- Throughput: {summary['throughput']:.2f} queries/s", file=sys.stderr)
+    if summary['answer_paths']:
+        paths = ', '.join(f"{path}: {count}" for path, count in sorted(summary['answer_paths'].items()))
+        print(f"- Answer paths: {paths}", file=sys.stderr)
+
+    cache = get_response_cache()
+    if cache is not None:
+        stats = cache.stats()
+        print(f"- Response cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.0%} hit rate, {stats['entries']} entries)", file=sys.stderr)
+
+    router = get_router()
+    if router is not None:
+        stats = router.stats()
+        print(f"- Router: answered {stats['hits']} of {stats['lookups']} queries "
+              f"({stats['hit_rate']:.0%} hit rate)", file=sys.stderr)
+        for label, hits in stats['by_route'].items():
+            print(f"    {label}: {hits}", file=sys.stderr)
+
+    tool_cache = get_result_cache()
+    if tool_cache is not None:
+        stats = tool_cache.stats()
+        print(f"- Tool result cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.0%} hit rate)", file=sys.stderr)
+
+    text_index = get_text_index()
+    if text_index is not None:
+        stats = text_index.stats()
+        print(f"- Text index: {stats['indexed_queries']} indexed substring counts, "
+              f"{stats['builds']} built, {stats['loads']} loaded from disk", file=sys.stderr)
+
+    scheduler = get_scheduler()
+    if scheduler is not None:
+        stats = scheduler.stats()
+        print(f"- LLM scheduler: {stats['upstream_requests']} upstream requests for {stats['requests']} calls "
+              f"({stats['coalesced']} coalesced), {stats['retries']} retries "
+              f"({stats['rate_limited']} rate limited), {stats['failed']} failed, "
+              f"{stats['wait_seconds']:.2f}s total wait", file=sys.stderr)
+
+    metrics = get_metrics()
+    if metrics is not None:
+        counters = metrics.snapshot()
+        tokens = counters['llm_tokens_total']
+        print(f"- LLM: {counters['llm_requests_total'].get((), 0):.0f} requests "
+              f"({counters['llm_cached_responses_total'].get((), 0):.0f} cached), "
+              f"{tokens.get((('kind', 'prompt'),), 0):.0f} prompt and "
+              f"{tokens.get((('kind', 'response'),), 0):.0f} response tokens", file=sys.stderr)
+
+
+def run_server_mode(address: Optional[str], socket_path: Optional[str], workers: int, max_queued: int,
+                    **options):
+    """Serve process_query over HTTP until interrupted (options are defaults for every query)."""
+    from server import serve
+
+    host, port = '127.0.0.1', 8000
+    if address:
+        host_part, _, port_part = address.rpartition(':')
+        host = host_part or host
+        try:
+            port = int(port_part)
+        except ValueError:
+            print(f"❌ Error: invalid server address '{address}' (expected [HOST:]PORT)", file=sys.stderr)
+            sys.exit(1)
+
+    # Create the model client before the first request arrives
+    if options.get('model') is None:
+        options['model'] = get_model()
+
+    def process(query: str, **request_options) -> Dict[str, Any]:
+        return process_query(query, verbose=False, **dict(options, **request_options))
+
+    try:
+        serve(process, host=host, port=port, socket_path=socket_path, workers=workers, max_queued=max_queued)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error starting server: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(
@@ -291,6 +847,11 @@ Examples:
   python main.py
   python main.py --query "What's the square root of 144?"
   python main.py --query "How many vowels are in 'hello world'?"
+  python main.py --batch queries.jsonl --concurrency 16 --output results.jsonl
+  python main.py --stream --query "What's the square root of the average of 18 and 50?"
+  python main.py --batch queries.jsonl --profile profiles.jsonl --metrics-file metrics.prom
+  python main.py --serve 127.0.0.1:8000 --concurrency 8 --max-queued 64
+  python main.py --batch queries.jsonl --rpm 60 --tpm 100000
 
 Note: Requires Google Gemini API key in .env file
         """
@@ -301,21 +862,252 @@ Note: Requires Google Gemini API key in .env file
         type=str,
         help='Single query to process (non-interactive mode)'
     )
+
+    parser.add_argument(
+        '--batch', '-b',
+        type=str,
+        metavar='FILE',
+        help='Process all queries in a JSONL or CSV file concurrently'
+    )
+
+    parser.add_argument(
+        '--concurrency', '-c',
+        type=int,
+        default=8,
+        help='Maximum number of queries processed at once in batch and server mode (default: 8)'
+    )
+
+    parser.add_argument(
+        '--output', '-o',
+        type=str,
+        metavar='FILE',
+        help='Write batch results as JSONL to this file (default: stdout)'
+    )
+
+    parser.add_argument(
+        '--serve',
+        type=str,
+        metavar='[HOST:]PORT',
+        help='Serve queries over HTTP/JSON on this port (POST /query, GET /health, GET /metrics)'
+    )
+
+    parser.add_argument(
+        '--socket',
+        type=str,
+        metavar='PATH',
+        help='Serve queries over HTTP on this Unix socket instead of a TCP port'
+    )
+
+    parser.add_argument(
+        '--max-queued',
+        type=int,
+        default=32,
+        metavar='N',
+        help='Queries that may wait for a worker in server mode before requests get 429 (default: 32)'
+    )
+
+    parser.add_argument(
+        '--fake-model',
+        action='store_true',
+        help='Answer with the offline fake model instead of Gemini (for testing and benchmarks)'
+    )
+
+    parser.add_argument(
+        '--fake-rpm',
+        type=int,
+        metavar='N',
+        help='Make the fake model reject requests beyond N per minute with 429 errors'
+    )
+
+    parser.add_argument(
+        '--rpm',
+        type=float,
+        metavar='N',
+        help='Send at most N LLM requests per minute (enables the LLM scheduler)'
+    )
+
+    parser.add_argument(
+        '--tpm',
+        type=float,
+        metavar='N',
+        help='Send LLM requests for at most N tokens per minute (enables the LLM scheduler)'
+    )
+
+    parser.add_argument(
+        '--retries',
+        type=int,
+        metavar='N',
+        help='Retry LLM requests that fail with 429 or 5xx errors up to N times '
+             '(enables the LLM scheduler; default with --rpm/--tpm: 4)'
+    )
+
+    parser.add_argument(
+        '--cache',
+        type=str,
+        metavar='PATH',
+        default=os.getenv('LLM_CACHE_PATH'),
+        help='Cache LLM responses in this SQLite file (default: $LLM_CACHE_PATH, disabled if unset)'
+    )
+
+    parser.add_argument(
+        '--cache-ttl',
+        type=float,
+        default=7 * 24 * 3600,
+        metavar='SECONDS',
+        help='Expire cached responses after this many seconds (default: 7 days)'
+    )
+
+    parser.add_argument(
+        '--cache-max-entries',
+        type=int,
+        default=10000,
+        help='Maximum number of cached responses (default: 10000)'
+    )
+
+    parser.add_argument(
+        '--tool-cache',
+        action='store_true',
+        help='Memoize results of pure tool calls across queries'
+    )
+
+    parser.add_argument(
+        '--text-index',
+        type=str,
+        metavar='DIR',
+        help='Index large documents for repeated substring counts and save the indexes in DIR'
+    )
+
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Stream the reasoning and run tools as soon as each TOOL_CALL line arrives'
+    )
+
+    parser.add_argument(
+        '--router',
+        action='store_true',
+        help='Answer simple, recognised queries with a direct tool call (no LLM)'
+    )
+
+    parser.add_argument(
+        '--fast-path',
+        action='store_true',
+        help='Phrase simple answers from templates instead of a second LLM call'
+    )
+
+    parser.add_argument(
+        '--function-calling',
+        action='store_true',
+        help='Call tools through native function calling with typed schemas instead of TOOL_CALL text'
+    )
+
+    parser.add_argument(
+        '--tool-processes',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Run tool calls in a shared pool of N worker processes (default: threads)'
+    )
+
+    parser.add_argument(
+        '--sandbox',
+        action='store_true',
+        help='Run tool calls in pre-started worker processes that are killed and replaced when a call '
+             'exceeds --tool-timeout or --tool-memory (pool size: --tool-processes, default: CPU count)'
+    )
+
+    parser.add_argument(
+        '--tool-timeout',
+        type=float,
+        default=5.0,
+        metavar='SECONDS',
+        help='Wall-clock and CPU time limit of one sandboxed tool call (default: 5)'
+    )
+
+    parser.add_argument(
+        '--tool-memory',
+        type=int,
+        default=1024,
+        metavar='MB',
+        help='Memory limit of each sandbox worker process in MiB (default: 1024)'
+    )
+
+    parser.add_argument(
+        '--profile',
+        type=str,
+        nargs='?',
+        const='-',
+        metavar='FILE',
+        help='Record per-phase timings, token counts and tool timings of every query '
+             'and write them as JSON lines to FILE (default: stderr)'
+    )
+
+    parser.add_argument(
+        '--metrics-file',
+        type=str,
+        metavar='FILE',
+        help='Write aggregated metrics in the Prometheus text format to FILE when done (implies profiling)'
+    )
     
     args = parser.parse_args()
-    
+    load_environment()
+
     # Check for API key
-    if not os.getenv('GEMINI_API_KEY'):
+    if not args.fake_model and not os.getenv('GEMINI_API_KEY'):
         print("❌ Error: GEMINI_API_KEY environment variable not set.")
         print("Please create a .env file with your Gemini API key.")
         print("See .env.example for the format.")
         sys.exit(1)
     
-    # Process single query or run interactive mode
-    if args.query:
-        process_query(args.query)
-    else:
-        interactive_mode()
+    if args.cache:
+        configure_response_cache(args.cache, max_entries=args.cache_max_entries, ttl=args.cache_ttl)
+
+    if args.tool_cache:
+        enable_result_cache()
+
+    if args.text_index:
+        enable_text_index(args.text_index)
+
+    if args.sandbox:
+        configure_tool_pool(args.tool_processes, sandbox=True,
+                            timeout=args.tool_timeout, memory_mb=args.tool_memory)
+    elif args.tool_processes:
+        configure_tool_pool(args.tool_processes)
+
+    if args.router:
+        enable_router()
+
+    if args.rpm or args.tpm or args.retries is not None:
+        enable_scheduler(requests_per_minute=args.rpm, tokens_per_minute=args.tpm,
+                         max_retries=4 if args.retries is None else args.retries)
+
+    profile_output = None
+    if args.profile or args.metrics_file:
+        if args.profile == '-':
+            profile_output = sys.stderr
+        elif args.profile:
+            profile_output = open(args.profile, 'w', encoding='utf-8')
+        enable_profiling(profile_output)
+
+    # Process a batch file, a single query, or run interactive mode
+    options = {'stream': args.stream, 'fast_path': args.fast_path, 'function_calling': args.function_calling}
+    if args.fake_model:
+        from fake_model import FakeModel
+        options['model'] = FakeModel(requests_per_minute=args.fake_rpm)
+    try:
+        if args.serve or args.socket:
+            run_server_mode(args.serve, args.socket, args.concurrency, args.max_queued, **options)
+        elif args.batch:
+            run_batch_mode(args.batch, args.concurrency, args.output, **options)
+        elif args.query:
+            process_query(args.query, **options)
+        else:
+            interactive_mode(**options)
+    finally:
+        if args.metrics_file:
+            get_metrics().write_prometheus(args.metrics_file)
+        if profile_output is not None and profile_output is not sys.stderr:
+            profile_output.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,330 @@
+"""
+Instrumentation for the reasoning pipeline.
+While profiling is on, every query processed by process_query records the
+wall time of each phase, the prompt and response tokens of its LLM calls,
+the execution time of each tool, parse failures and response cache hits.
+The profile is added to the query's result as a JSON-ready dict and
+aggregated into counters and histograms that can be exported in the
+Prometheus text format. Profiling is opt-in (see enable_profiling); when
+it is off, each instrumentation point costs one context variable lookup.
+"""
+
+import contextvars
+import functools
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional, TextIO, Tuple
+
+# Pipeline phases, in the order they run
+PHASES = ('routing', 'reasoning', 'parsing', 'tools', 'final_answer')
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Used when a response does not report its token usage
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text (about four characters per token)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _as_text(value: Any) -> str:
+    return value if isinstance(value, str) else json.dumps(value, default=str, ensure_ascii=False)
+
+
+class QueryProfile:
+    """
+    Measurements for one query.
+
+    Phases are timed as laps: lap(name) charges the time since the previous
+    lap (or since the query started) to the named phase.
+    """
+
+    def __init__(self, query: str):
+        self.query = query
+        self.start = time.perf_counter()
+        self._last_lap = self.start
+        self.phases: Dict[str, float] = {}
+        self.llm_calls = 0
+        self.llm_cached = 0
+        self.llm_seconds = 0.0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.tokens_estimated = False
+        self.parse_failures = 0
+        self._lock = threading.Lock()
+
+    def lap(self, phase: str):
+        """Charge the time since the previous lap to a phase."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last_lap
+        self._last_lap = now
+
+    def record_llm_call(self, seconds: float, prompt_tokens: int, response_tokens: int,
+                        cached: bool = False, estimated: bool = False):
+        """Record one LLM request (cached responses are counted but use no tokens)."""
+        with self._lock:
+            self.llm_calls += 1
+            self.llm_seconds += seconds
+            if cached:
+                self.llm_cached += 1
+                return
+            self.prompt_tokens += prompt_tokens
+            self.response_tokens += response_tokens
+            self.tokens_estimated = self.tokens_estimated or estimated
+
+    def to_dict(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the JSON profile of a finished query from its result."""
+        tools: Dict[str, Dict[str, Any]] = {}
+        for call, timing in result.get('tool_timings', {}).items():
+            name = call.split('(', 1)[0]
+            entry = tools.setdefault(name, {'calls': 0, 'seconds': 0.0})
+            entry['calls'] += 1
+            entry['seconds'] += timing.get('duration') or 0.0
+
+        return {
+            'query': self.query,
+            'success': bool(result.get('success')),
+            'answer_path': result.get('answer_path'),
+            'total_seconds': time.perf_counter() - self.start,
+            'phases': {phase: self.phases[phase] for phase in PHASES if phase in self.phases},
+            'llm': {
+                'calls': self.llm_calls,
+                'cached': self.llm_cached,
+                'seconds': self.llm_seconds,
+                'prompt_tokens': self.prompt_tokens,
+                'response_tokens': self.response_tokens,
+                'tokens_estimated': self.tokens_estimated
+            },
+            'tools': tools,
+            'parse_failures': self.parse_failures,
+            'errors': len(result.get('errors', [])) + int('error' in result)
+        }
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label(str(value))}"' for name, value in labels) + '}'
+
+
+class _Histogram:
+    __slots__ = ('counts', 'count', 'total')
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class MetricsRegistry:
+    """
+    Counters and latency histograms aggregated over query profiles.
+
+    Thread-safe; render_prometheus() returns the Prometheus text exposition
+    format (version 0.0.4).
+    """
+
+    _COUNTERS = {
+        'queries_total': 'Queries processed',
+        'llm_requests_total': 'LLM requests, including those served from the response cache',
+        'llm_cached_responses_total': 'LLM responses served from the response cache',
+        'llm_tokens_total': 'Prompt and response tokens of LLM requests (estimated when not reported)',
+        'tool_calls_total': 'Tool executions',
+        'parse_failures_total': 'Tool call lines that could not be parsed',
+    }
+
+    _HISTOGRAMS = {
+        'query_duration_seconds': 'Wall time of a whole query',
+        'phase_duration_seconds': 'Wall time of each pipeline phase',
+        'tool_duration_seconds': 'Mean execution time of each tool within a query',
+    }
+
+    def __init__(self, prefix: str = 'tool_reasoning'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[tuple, float]] = {name: defaultdict(float) for name in self._COUNTERS}
+        self._histograms: Dict[str, Dict[tuple, _Histogram]] = {
+            name: defaultdict(_Histogram) for name in self._HISTOGRAMS
+        }
+
+    def observe(self, profile: Dict[str, Any]):
+        """Add one query profile (as returned by QueryProfile.to_dict) to the totals."""
+        counters, histograms = self._counters, self._histograms
+        with self._lock:
+            counters['queries_total'][(('answer_path', profile['answer_path'] or 'none'),
+                                       ('success', str(profile['success']).lower()))] += 1
+            llm = profile['llm']
+            counters['llm_requests_total'][()] += llm['calls']
+            counters['llm_cached_responses_total'][()] += llm['cached']
+            counters['llm_tokens_total'][(('kind', 'prompt'),)] += llm['prompt_tokens']
+            counters['llm_tokens_total'][(('kind', 'response'),)] += llm['response_tokens']
+            counters['parse_failures_total'][()] += profile['parse_failures']
+
+            histograms['query_duration_seconds'][()].observe(profile['total_seconds'])
+            for phase, seconds in profile['phases'].items():
+                histograms['phase_duration_seconds'][(('phase', phase),)].observe(seconds)
+            for tool, entry in profile['tools'].items():
+                counters['tool_calls_total'][(('tool', tool),)] += entry['calls']
+                histograms['tool_duration_seconds'][(('tool', tool),)].observe(entry['seconds'] / entry['calls'])
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the counters as plain dicts (label tuples as keys)."""
+        with self._lock:
+            return {name: dict(values) for name, values in self._counters.items()}
+
+    def render_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, help_text in self._COUNTERS.items():
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} counter")
+                for labels, value in sorted(self._counters[name].items()):
+                    lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+
+            for name, help_text in self._HISTOGRAMS.items():
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} histogram")
+                for labels, histogram in sorted(self._histograms[name].items()):
+                    for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+                        bucket_labels = labels + (('le', f"{bound:g}"),)
+                        lines.append(f"{metric}_bucket{_format_labels(bucket_labels)} {count}")
+                    lines.append(f"{metric}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{metric}_sum{_format_labels(labels)} {histogram.total:.6f}")
+                    lines.append(f"{metric}_count{_format_labels(labels)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        """Write the Prometheus exposition to a file (e.g. for node_exporter's textfile collector)."""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render_prometheus())
+        os.replace(temp_path, path)
+
+
+# The profile of the query being processed in the current thread/context
+_current_profile: contextvars.ContextVar = contextvars.ContextVar('query_profile', default=None)
+
+# The shared registry (see enable_profiling); None when profiling is off
+_registry: Optional[MetricsRegistry] = None
+_output: Optional[TextIO] = None
+_output_lock = threading.Lock()
+
+
+def enable_profiling(output: Optional[TextIO] = None) -> MetricsRegistry:
+    """
+    Turn on per-query profiling and return the registry profiles are aggregated into.
+
+    Args:
+        output: Text stream that receives each query's profile as one JSON line (optional)
+    """
+    global _registry, _output
+    _registry = MetricsRegistry()
+    _output = output
+    return _registry
+
+
+def disable_profiling():
+    """Turn off per-query profiling."""
+    global _registry, _output
+    _registry = None
+    _output = None
+
+
+def get_metrics() -> Optional[MetricsRegistry]:
+    """Return the active metrics registry, or None if profiling is off."""
+    return _registry
+
+
+def current_profile() -> Optional[QueryProfile]:
+    """Return the profile of the query being processed, if profiling is on."""
+    return _current_profile.get()
+
+
+def lap(phase: str):
+    """Charge the time since the previous lap of the current query to a phase."""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.lap(phase)
+
+
+def record_parse_failures(count: int):
+    """Record TOOL_CALL lines of the current query that could not be parsed."""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.parse_failures += count
+
+
+def record_llm_call(start: float, prompt: Any, response: Any, usage: Any = None, cached: bool = False):
+    """
+    Record an LLM request of the current query.
+
+    Args:
+        start: time.perf_counter() when the request was made
+        prompt: The prompt or contents sent (used to estimate tokens when usage is missing)
+        response: The response text or parts
+        usage: The response's usage_metadata, if the model reported it
+        cached: The response came from the response cache
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        return
+    prompt_tokens = getattr(usage, 'prompt_token_count', None)
+    response_tokens = getattr(usage, 'candidates_token_count', None)
+    estimated = prompt_tokens is None or response_tokens is None
+    if estimated:
+        prompt_tokens, response_tokens = estimate_tokens(_as_text(prompt)), estimate_tokens(_as_text(response))
+    profile.record_llm_call(time.perf_counter() - start, prompt_tokens, response_tokens,
+                            cached=cached, estimated=estimated)
+
+
+def profiled(function: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+    """
+    Profile a query-processing function while profiling is on.
+
+    The wrapped function takes the query as its first argument and returns
+    a result dict, which gets a 'profile' entry.
+    """
+    @functools.wraps(function)
+    def wrapper(query: str, *args, **kwargs) -> Dict[str, Any]:
+        registry = _registry
+        if registry is None:
+            return function(query, *args, **kwargs)
+
+        profile = QueryProfile(query)
+        token = _current_profile.set(profile)
+        try:
+            result = function(query, *args, **kwargs)
+        finally:
+            _current_profile.reset(token)
+
+        result['profile'] = profile.to_dict(result)
+        registry.observe(result['profile'])
+        output = _output
+        if output is not None:
+            with _output_lock:
+                output.write(json.dumps(result['profile'], ensure_ascii=False) + '\n')
+                output.flush()
+        return result
+
+    return wrapper
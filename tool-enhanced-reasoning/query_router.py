@@ -0,0 +1,250 @@
+"""
+Rule-based query router.
+Recognises common query shapes ("What's the factorial of 5?", "Count the
+consonants in 'artificial intelligence'") and answers them by calling the
+tool directly, without any LLM request. Queries that do not match a shape
+exactly fall through to the LLM pipeline.
+"""
+
+import re
+import threading
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from tools.registry import get_registry
+from tool_executor import call_tool
+from tool_parser import format_tool_call
+from answer_templates import synthesize_answer
+
+
+_NUM = r'-?\d+(?:\.\d+)?'
+_NUM_LIST = rf'{_NUM}(?:\s*,\s*(?:and\s+)?{_NUM}|\s+and\s+{_NUM})+'
+_TEXT = r'''(?:['"‘“](?P<text>[^'"‘’“”]+)['"’”]|(?P<word>\w+))'''
+_QUOTED = r'''['"‘“](?P<{name}>[^'"‘’“”]+)['"’”]'''
+_ASK = r"(?:(?:what(?:'s|\s+is)|calculate|compute|find|get|tell\s+me|give\s+me)\s+)?(?:the\s+)?"
+
+_COUNTED_THINGS = {
+    'count_vowels': 'vowels',
+    'count_consonants': 'consonants',
+    'count_letters': 'letters',
+    'count_words': 'words',
+    'count_characters': 'characters',
+    'count_digits': 'digits',
+    'count_uppercase': r'(?:uppercase|upper\s+case|capital)\s+letters',
+    'count_lowercase': r'(?:lowercase|lower\s+case)\s+letters',
+    'count_special_characters': r'special\s+characters',
+    'count_spaces': 'spaces',
+}
+
+
+def _count_shapes(thing: str) -> List[str]:
+    """Query shapes for a count_* string tool."""
+    return [
+        rf"how\s+many\s+{thing}\s+(?:are\s+)?(?:there\s+)?in\s+(?:the\s+(?:word|string|text|phrase)\s+)?{_TEXT}",
+        rf"(?:count|{_ASK}number\s+of)\s+(?:the\s+)?{thing}\s+in\s+(?:the\s+(?:word|string|text|phrase)\s+)?{_TEXT}",
+        rf"how\s+many\s+{thing}\s+(?:does|do)\s+{_TEXT}\s+(?:have|contain)",
+    ]
+
+
+# (tool type, function, argument groups in call order, query shapes).
+# Shapes are matched against the whole query, case-insensitively.
+ROUTES: List[Tuple[str, str, Tuple[str, ...], List[str]]] = [
+    ('math', 'factorial', ('n',), [rf"{_ASK}factorial\s+of\s+(?P<n>\d+)", r"(?P<n>\d+)\s*!"]),
+    ('math', 'square_root', ('number',), [rf"{_ASK}square\s+root\s+of\s+(?P<number>{_NUM})"]),
+    ('math', 'absolute_value', ('number',), [rf"{_ASK}absolute\s+value\s+of\s+(?P<number>{_NUM})"]),
+    ('math', 'average', ('numbers',), [rf"{_ASK}(?:average|mean)\s+of\s+(?P<numbers>{_NUM_LIST})"]),
+    ('math', 'median', ('numbers',), [rf"{_ASK}median\s+of\s+(?P<numbers>{_NUM_LIST})"]),
+    ('math', 'maximum', ('numbers',),
+     [rf"{_ASK}(?:maximum|max|largest|biggest)(?:\s+number)?\s+(?:of|in|among)\s+(?P<numbers>{_NUM_LIST})"]),
+    ('math', 'minimum', ('numbers',),
+     [rf"{_ASK}(?:minimum|min|smallest)(?:\s+number)?\s+(?:of|in|among)\s+(?P<numbers>{_NUM_LIST})"]),
+    ('math', 'add', ('a', 'b'), [rf"{_ASK}(?P<a>{_NUM})\s*(?:\+|plus)\s*(?P<b>{_NUM})",
+                                 rf"{_ASK}sum\s+of\s+(?P<a>{_NUM})\s+and\s+(?P<b>{_NUM})"]),
+    ('math', 'subtract', ('a', 'b'), [rf"{_ASK}(?P<a>{_NUM})\s*(?:-|minus)\s*(?P<b>{_NUM})"]),
+    ('math', 'multiply', ('a', 'b'),
+     [rf"{_ASK}(?P<a>{_NUM})\s*(?:\*|x|×|times|multiplied\s+by)\s*(?P<b>{_NUM})",
+      rf"{_ASK}product\s+of\s+(?P<a>{_NUM})\s+and\s+(?P<b>{_NUM})"]),
+    ('math', 'divide', ('a', 'b'), [rf"{_ASK}(?P<a>{_NUM})\s*(?:/|÷|divided\s+by)\s*(?P<b>{_NUM})"]),
+    ('math', 'power', ('base', 'exponent'),
+     [rf"{_ASK}(?P<base>{_NUM})\s*(?:\^|\*\*|to\s+the\s+power\s+of|raised\s+to\s+the\s+power\s+of)\s*"
+      rf"(?P<exponent>{_NUM})"]),
+    ('math', 'percentage', ('part', 'whole'),
+     [rf"what\s+percent(?:age)?\s+(?:of\s+(?P<whole>{_NUM})\s+is\s+(?P<part>{_NUM})|is\s+(?P<part2>{_NUM})\s+of\s+"
+      rf"(?P<whole2>{_NUM}))",
+      rf"(?P<part>{_NUM})\s+is\s+what\s+percent(?:age)?\s+of\s+(?P<whole>{_NUM})"]),
+] + [
+    ('string', function_name, ('text',), _count_shapes(thing))
+    for function_name, thing in _COUNTED_THINGS.items()
+] + [
+    ('string', 'find_longest_word', ('text',),
+     [rf"{_ASK}longest\s+word\s+in\s+(?:the\s+(?:string|text|sentence|phrase)\s+)?{_TEXT}"]),
+    ('string', 'find_shortest_word', ('text',),
+     [rf"{_ASK}shortest\s+word\s+in\s+(?:the\s+(?:string|text|sentence|phrase)\s+)?{_TEXT}"]),
+    ('string', 'reverse_string', ('text',),
+     [rf"(?:reverse|{_ASK}reverse\s+of)\s+(?:the\s+(?:word|string|text|phrase)\s+)?{_TEXT}"]),
+    ('string', 'is_palindrome', ('text',),
+     [rf"is\s+(?:the\s+(?:word|string|phrase)\s+)?{_TEXT}\s+a\s+palindrome"]),
+    ('string', 'count_substring', ('text', 'substring'),
+     [rf"how\s+many\s+times\s+does\s+{_QUOTED.format(name='substring')}\s+(?:appear|occur)\s+in\s+"
+      + _QUOTED.format(name='text')]),
+]
+
+# Groups that hold the same argument in alternative phrasings
+_GROUP_ALIASES = {'word': 'text', 'part2': 'part', 'whole2': 'whole'}
+
+
+def _number(text: str) -> Any:
+    return float(text) if '.' in text else int(text)
+
+
+def _numbers(text: str) -> List[Any]:
+    return [_number(item) for item in re.findall(_NUM, text)]
+
+
+_CONVERTERS: Dict[str, Callable[[str], Any]] = {
+    'numbers': _numbers,
+    'text': str,
+    'substring': str,
+}
+
+_GROUP_NAME_RE = re.compile(r'\(\?P<(\w+)>')
+
+# Trailing punctuation and politeness that do not change what is asked
+_TRAILER_RE = re.compile(r'(?:\s*[?.!]+|\s+please)+\s*$', re.IGNORECASE)
+
+
+class QueryRouter:
+    """
+    Answers simple queries with a direct tool call.
+
+    All query shapes are compiled into one alternation, so routing a query
+    is a single regex match. Only whole-query matches are accepted, and
+    only for tools that exist in the tool registry.
+    """
+
+    def __init__(self, routes: Optional[List[Tuple[str, str, Tuple[str, ...], List[str]]]] = None):
+        """
+        Build the pattern index.
+
+        Args:
+            routes: (tool type, function, argument groups, query shapes)
+                entries; defaults to ROUTES
+        """
+        registries = get_registry().all_functions()
+        self._routes: Dict[str, Tuple[str, str, Tuple[str, ...]]] = {}
+        alternatives = []
+
+        for tool_type, function_name, arg_names, shapes in (routes if routes is not None else ROUTES):
+            if function_name not in registries.get(tool_type, {}):
+                continue
+            for shape_number, shape in enumerate(shapes, 1):
+                route_name = f"r{len(self._routes)}"
+                prefixed = _GROUP_NAME_RE.sub(lambda m: f"(?P<{route_name}_{m.group(1)}>", shape)
+                alternatives.append(f"(?P<{route_name}>{prefixed})")
+                self._routes[route_name] = (tool_type, function_name, arg_names,
+                                            f"{tool_type}.{function_name}#{shape_number}")
+
+        self._pattern = re.compile('|'.join(alternatives), re.IGNORECASE)
+        self._lock = threading.Lock()
+        self._lookups = 0
+        self._hits = 0
+        self._tool_errors = 0
+        self._route_hits: Dict[str, int] = {}
+
+    def match(self, query: str) -> Optional[Dict[str, Any]]:
+        """Return the tool call for a query that matches a shape exactly, or None."""
+        text = _TRAILER_RE.sub('', query.strip())
+        match = self._pattern.fullmatch(text)
+        if match is None:
+            return None
+
+        route_name = match.lastgroup
+        tool_type, function_name, arg_names, label = self._routes[route_name]
+        values = {}
+        prefix = route_name + '_'
+        for group, value in match.groupdict().items():
+            if value is not None and group.startswith(prefix):
+                name = group[len(prefix):]
+                values[_GROUP_ALIASES.get(name, name)] = value
+
+        args = [_CONVERTERS.get(name, _number)(values[name]) for name in arg_names]
+        tool_call = {'type': tool_type, 'function': function_name, 'args': args, 'kwargs': {}}
+        tool_call['source'] = format_tool_call(tool_call)
+        tool_call['route'] = label
+        return tool_call
+
+    def route(self, query: str, pool: Optional[Executor] = None) -> Optional[Dict[str, Any]]:
+        """
+        Answer a query without the LLM if it matches a known shape.
+
+        Args:
+            query: The user's query
+            pool: Tool pool to run the call in (e.g. a sandbox.SandboxPool);
+                by default the call runs in this thread
+
+        Returns:
+            None to fall through to the LLM, or a dict with the 'tool_call',
+            its 'result' and the templated 'answer'
+        """
+        tool_call = self.match(query)
+        answer = None
+        if tool_call is not None:
+            try:
+                if pool is not None:
+                    result = pool.submit(call_tool, tool_call['type'], tool_call['function'],
+                                         *tool_call['args']).result()
+                else:
+                    result = call_tool(tool_call['type'], tool_call['function'], *tool_call['args'])
+            except Exception:
+                # Let the LLM explain invalid inputs such as a negative square root
+                # (or a call the sandbox stopped)
+                result = None
+                with self._lock:
+                    self._tool_errors += 1
+            else:
+                answer = synthesize_answer(query, [tool_call], {tool_call['source']: result})
+
+        with self._lock:
+            self._lookups += 1
+            if answer is not None:
+                self._hits += 1
+                label = tool_call['route']
+                self._route_hits[label] = self._route_hits.get(label, 0) + 1
+
+        if answer is None:
+            return None
+        return {'tool_call': tool_call, 'result': result, 'answer': answer}
+
+    def stats(self) -> Dict[str, Any]:
+        """Return how many queries the router answered, overall and per query shape."""
+        with self._lock:
+            return {
+                'lookups': self._lookups,
+                'hits': self._hits,
+                'misses': self._lookups - self._hits,
+                'hit_rate': self._hits / self._lookups if self._lookups else 0.0,
+                'tool_errors': self._tool_errors,
+                'by_route': dict(sorted(self._route_hits.items(), key=lambda item: -item[1]))
+            }
+
+
+# The shared router used by process_query (see enable_router)
+_router: Optional[QueryRouter] = None
+
+
+def enable_router() -> QueryRouter:
+    """Turn on rule-based routing and return the router."""
+    global _router
+    _router = QueryRouter()
+    return _router
+
+
+def disable_router():
+    """Turn off rule-based routing."""
+    global _router
+    _router = None
+
+
+def get_router() -> Optional[QueryRouter]:
+    """Return the active router, or None if routing is off."""
+    return _router
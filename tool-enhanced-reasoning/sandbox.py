@@ -0,0 +1,305 @@
+"""
+Sandboxed process pool for tool execution.
+Each tool call runs in one of a fixed set of pre-started worker processes
+with a wall-clock deadline, a CPU-time limit (RLIMIT_CPU), an address-space
+cap (RLIMIT_AS) and a limit on the size of the result sent back. A worker
+that overruns is killed and replaced, and only the call it was running
+fails, so one runaway call such as math.factorial(10**7) cannot stall the
+other queries. SandboxPool is a concurrent.futures.Executor, so it can be
+passed anywhere a tool pool is accepted (see main.configure_tool_pool).
+"""
+
+import multiprocessing
+import pickle
+import queue
+import signal
+import sys
+import threading
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; only the wall-clock deadline applies there
+    resource = None
+
+
+class ToolTimeoutError(TimeoutError):
+    """Raised when a tool call runs past its wall-clock deadline."""
+
+
+class ToolResourceError(RuntimeError):
+    """Raised when a tool call exceeds its CPU, memory or result-size limit."""
+
+
+def _result_error(result: Any, max_int_digits: int) -> Optional[str]:
+    """
+    Describe why a result is too large to return, or return None.
+
+    Tuples, lists and dicts are checked item by item, so the limit also
+    applies inside wrappers such as the (result, duration) pairs of
+    tool_executor._timed_call.
+    """
+    if not max_int_digits:
+        return None
+    if isinstance(result, int) and not isinstance(result, bool):
+        # bit_length is cheap; converting a huge int to decimal is not
+        digits = int(result.bit_length() * 0.30103) + 1
+        if digits > max_int_digits:
+            return f"Result has about {digits} digits (limit {max_int_digits})"
+    elif isinstance(result, (tuple, list)):
+        for item in result:
+            error = _result_error(item, max_int_digits)
+            if error:
+                return error
+    elif isinstance(result, dict):
+        for item in result.values():
+            error = _result_error(item, max_int_digits)
+            if error:
+                return error
+    return None
+
+
+def _limit_cpu(seconds: Optional[float]):
+    """Let the worker use `seconds` more CPU time before the kernel stops it with SIGXCPU."""
+    if resource is None or not seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime + seconds) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(conn, memory_bytes: Optional[int], cpu_seconds: Optional[float],
+                 max_result_bytes: int, max_int_digits: int):
+    """Serve calls from the pool until the connection closes."""
+    # Interrupts are handled by the parent, which stops the workers itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if resource is not None and memory_bytes:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, hard))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        if message is None:
+            return
+        function, args, kwargs = message
+
+        _limit_cpu(cpu_seconds)
+        exit_after = False
+        try:
+            result = function(*args, **kwargs)
+            error = _result_error(result, max_int_digits)
+            payload = pickle.dumps((False, ToolResourceError(error)) if error else (True, result),
+                                   pickle.HIGHEST_PROTOCOL)
+            if len(payload) > max_result_bytes:
+                payload = pickle.dumps((False, ToolResourceError(
+                    f"Result is {len(payload)} bytes (limit {max_result_bytes})")))
+        except MemoryError:
+            payload = pickle.dumps((False, ToolResourceError("Memory limit exceeded")))
+            # The heap may be fragmented or half-built; start afresh
+            exit_after = True
+        except Exception as e:
+            try:
+                payload = pickle.dumps((False, e), pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                payload = pickle.dumps((False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+        try:
+            conn.send_bytes(payload)
+        except (OSError, ValueError):
+            return
+        if exit_after:
+            return
+
+
+class _Worker:
+    """One worker process and the parent's end of its pipe."""
+
+    def __init__(self, context, limits: tuple):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, *limits), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def stop(self, kill: bool = False):
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        self.process.join(timeout=None if kill else 1.0)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+def _default_context():
+    # forkserver forks workers from a clean single-threaded process, which
+    # is safe although the pool itself runs threads
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+class SandboxPool(Executor):
+    """
+    Executor that runs each call in a resource-limited worker process.
+
+    Every worker has a dispatcher thread in this process that sends it one
+    call at a time and waits for the reply up to the deadline. Calls that
+    time out, run out of CPU time or memory, or die fail with
+    ToolTimeoutError or ToolResourceError; their worker is replaced before
+    the next call. Results must be picklable.
+    """
+
+    def __init__(self, workers: int = 4, timeout: float = 5.0, cpu_time: Optional[float] = None,
+                 memory_mb: Optional[int] = 1024, max_result_bytes: int = 1 << 20,
+                 max_int_digits: Optional[int] = None, context=None):
+        """
+        Start the worker processes.
+
+        Args:
+            workers: Number of worker processes (calls run at once)
+            timeout: Wall-clock seconds a call may take once a worker has it
+            cpu_time: CPU seconds a call may use (defaults to timeout)
+            memory_mb: Address-space cap per worker in MiB (None for no cap)
+            max_result_bytes: Largest pickled result a call may return
+            max_int_digits: Largest integer result, in decimal digits
+                (defaults to sys.get_int_max_str_digits(), the largest int
+                Python will format as a string)
+            context: multiprocessing context (defaults to forkserver where available)
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if timeout <= 0:
+            raise ValueError("timeout must be positive")
+        if max_int_digits is None:
+            max_int_digits = sys.get_int_max_str_digits() if hasattr(sys, 'get_int_max_str_digits') else 0
+
+        self.timeout = timeout
+        self._limits = (memory_mb << 20 if memory_mb else None, cpu_time or timeout,
+                        max_result_bytes, max_int_digits)
+        self._context = context or _default_context()
+        if self._context.get_start_method() == 'forkserver':
+            # Workers start with the tools already imported
+            self._context.set_forkserver_preload(['tool_executor'])
+
+        self._jobs: 'queue.SimpleQueue' = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self._stats = {'calls': 0, 'timeouts': 0, 'cpu_limit': 0, 'memory_limit': 0, 'crashes': 0, 'restarts': 0}
+
+        self._workers = [_Worker(self._context, self._limits) for _ in range(workers)]
+        self._threads = [threading.Thread(target=self._dispatch, args=(slot,), name=f"sandbox-dispatch-{slot}",
+                                          daemon=True) for slot in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Schedule fn(*args, **kwargs) in a worker process and return a Future."""
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit to a pool that has been shut down")
+            self._stats['calls'] += 1
+            self._jobs.put((future, fn, args, kwargs))
+        return future
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _replace(self, slot: int):
+        """Kill the worker in a slot and start a fresh one."""
+        self._workers[slot].stop(kill=True)
+        self._workers[slot] = _Worker(self._context, self._limits)
+        self._count('restarts')
+
+    def _dispatch(self, slot: int):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            future, fn, args, kwargs = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._run(slot, fn, args, kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def _run(self, slot: int, fn: Callable, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        worker = self._workers[slot]
+        if not worker.process.is_alive():
+            self._replace(slot)
+            worker = self._workers[slot]
+
+        try:
+            worker.conn.send((fn, args, kwargs))
+        except (BrokenPipeError, ConnectionResetError):
+            self._replace(slot)
+            worker = self._workers[slot]
+            worker.conn.send((fn, args, kwargs))
+
+        if not worker.conn.poll(self.timeout):
+            self._count('timeouts')
+            self._replace(slot)
+            raise ToolTimeoutError(f"Tool call timed out after {self.timeout:g}s")
+
+        try:
+            ok, value = pickle.loads(worker.conn.recv_bytes())
+        except (EOFError, OSError):
+            raise self._death(slot)
+        if not ok and isinstance(value, ToolResourceError) and str(value) == "Memory limit exceeded":
+            self._count('memory_limit')
+            self._replace(slot)
+        if ok:
+            return value
+        raise value
+
+    def _death(self, slot: int) -> Exception:
+        """Explain why the worker in a slot died mid-call, and replace it."""
+        process = self._workers[slot].process
+        process.join(timeout=1.0)
+        exitcode = process.exitcode
+        self._replace(slot)
+        if exitcode == -getattr(signal, 'SIGXCPU', 0):
+            self._count('cpu_limit')
+            return ToolResourceError(f"CPU time limit of {self._limits[1]:g}s exceeded")
+        self._count('crashes')
+        return ToolResourceError(f"Tool worker died (exit code {exitcode})")
+
+    def stats(self) -> Dict[str, int]:
+        """Return how many calls were run and how many hit each limit."""
+        with self._lock:
+            return dict(self._stats)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        """Stop the dispatcher threads and worker processes."""
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            if cancel_futures:
+                while True:
+                    try:
+                        job = self._jobs.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is not None:
+                        job[0].cancel()
+            for _ in self._threads:
+                self._jobs.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+            for worker in self._workers:
+                worker.stop()
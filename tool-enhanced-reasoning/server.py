@@ -0,0 +1,382 @@
+"""
+Long-running local server for the reasoning pipeline.
+Keeps one warmed process (SDK imported, model client created) and answers
+queries over HTTP/JSON on a TCP port or a Unix socket. Requests wait in a
+bounded queue for one of a fixed number of workers; when the queue is full
+the server answers 429 instead of piling up work. On SIGTERM/SIGINT it
+stops accepting queries, finishes the queued and running ones, and exits.
+
+Endpoints:
+    POST /query    {"query": "...", "fast_path": true, ...} -> process_query result
+    GET  /health   status, workers, queued and in-flight requests
+    GET  /metrics  Prometheus text exposition (when profiling is on)
+"""
+
+import json
+import os
+import queue
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from batch import dumps_result
+from metrics import get_metrics
+
+
+# Per-request options a client may set; everything else comes from the server's configuration
+REQUEST_OPTIONS = ('stream', 'fast_path', 'function_calling')
+
+
+class ServerBusy(Exception):
+    """Raised when the request queue is full."""
+
+
+class ServerDraining(Exception):
+    """Raised when the server is shutting down and accepts no new queries."""
+
+
+class QueryQueue:
+    """
+    A bounded queue of queries served by a fixed pool of worker threads.
+
+    submit() never blocks: it raises ServerBusy when max_queued queries are
+    already waiting, which the HTTP layer turns into a 429.
+    """
+
+    def __init__(self, process_fn: Callable[..., Dict[str, Any]], workers: int = 4, max_queued: int = 32):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if max_queued < 0:
+            raise ValueError("max_queued cannot be negative")
+        self.process_fn = process_fn
+        self.workers = workers
+        self.max_queued = max_queued
+        self._queue: 'queue.Queue[Optional[Tuple[str, Dict[str, Any], Future]]]' = queue.Queue()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._queued = 0
+        self._in_flight = 0
+        self._draining = False
+        self._completed = 0
+        self._rejected = 0
+        self._threads = [
+            threading.Thread(target=self._work, name=f"query-worker-{i}", daemon=True) for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, query: str, options: Dict[str, Any]) -> Future:
+        """
+        Queue a query and return a Future for its result.
+
+        Raises:
+            ServerDraining: If the queue is draining
+            ServerBusy: If every worker is busy and max_queued queries are waiting
+        """
+        future = Future()
+        with self._lock:
+            if self._draining:
+                raise ServerDraining("Server is shutting down")
+            # A query is admitted if a worker is free or there is room to wait
+            if self._queued + self._in_flight >= self.workers + self.max_queued:
+                self._rejected += 1
+                raise ServerBusy(f"{self._queued} queries already queued")
+            self._queued += 1
+        self._queue.put((query, options, future))
+        return future
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            query, options, future = item
+            with self._lock:
+                self._queued -= 1
+                self._in_flight += 1
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(self.process_fn(query, **options))
+                except BaseException as e:
+                    future.set_exception(e)
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+                if not self._queued and not self._in_flight:
+                    self._idle.notify_all()
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Stop admitting queries and wait for the queued and running ones.
+
+        Returns:
+            True if every query finished within the timeout
+        """
+        with self._lock:
+            self._draining = True
+            finished = self._idle.wait_for(lambda: not self._queued and not self._in_flight, timeout)
+        for _ in self._threads:
+            self._queue.put(None)
+        return finished
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of workers and queued, running, completed and rejected queries."""
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_queued': self.max_queued,
+                'queued': self._queued,
+                'in_flight': self._in_flight,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'draining': self._draining
+            }
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server_version = 'ToolReasoning/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    # Largest accepted request body
+    max_body = 1 << 20
+
+    def address_string(self) -> str:
+        # Unix socket peers have no (host, port) address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format: str, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: str, content_type: str = 'application/json',
+              headers: Optional[Dict[str, str]] = None):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+        self._send(status, dumps_result(payload), headers=headers)
+
+    def do_GET(self):
+        queries: QueryQueue = self.server.queries
+        if self.path == '/health':
+            stats = queries.stats()
+            status = HTTPStatus.SERVICE_UNAVAILABLE if stats['draining'] else HTTPStatus.OK
+            self._send_json(status, dict(stats, status='draining' if stats['draining'] else 'ok',
+                                         uptime=time.monotonic() - self.server.started))
+        elif self.path == '/metrics':
+            metrics = get_metrics()
+            if metrics is None:
+                self._send_json(HTTPStatus.NOT_FOUND, {'error': 'Profiling is off (start the server with --profile)'})
+            else:
+                self._send(HTTPStatus.OK, metrics.render_prometheus(), 'text/plain; version=0.0.4')
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/query':
+            self._send_json(HTTPStatus.NOT_FOUND, {'error': f"Unknown path {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            self._send_json(HTTPStatus.BAD_REQUEST, {'error': 'Invalid Content-Length'})
+            return
+        if length > self.max_body:
+            self.close_connection = True
+            self._send_json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'error': 'Request body too large'})
+            return
+        try:
+            request = json.loads(self.rfile.read(length) or b'null')
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            self._send_json(HTTPStatus.BAD_REQUEST, {'error': f"Invalid JSON: {e}"})
+            return
+        if isinstance(request, str):
+            request = {'query': request}
+        if not isinstance(request, dict) or not str(request.get('query', '')).strip():
+            self._send_json(HTTPStatus.BAD_REQUEST, {'error': "Request needs a 'query' field"})
+            return
+        options = {name: bool(request[name]) for name in REQUEST_OPTIONS if name in request}
+
+        # Counted from before the query is queued until its response is written
+        with self.server.responses:
+            self.server.pending_responses += 1
+        try:
+            self._answer(request, options)
+        finally:
+            with self.server.responses:
+                self.server.pending_responses -= 1
+                self.server.responses.notify_all()
+
+    def _answer(self, request: Dict[str, Any], options: Dict[str, Any]):
+        try:
+            future = self.server.queries.submit(str(request['query']).strip(), options)
+        except ServerBusy as e:
+            self._send_json(HTTPStatus.TOO_MANY_REQUESTS, {'error': str(e)},
+                            headers={'Retry-After': str(self.server.retry_after)})
+            return
+        except ServerDraining as e:
+            self.close_connection = True
+            self._send_json(HTTPStatus.SERVICE_UNAVAILABLE, {'error': str(e)}, headers={'Connection': 'close'})
+            return
+
+        try:
+            result = future.result()
+        except Exception as e:
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR,
+                            {'query': request['query'], 'success': False, 'error': str(e)})
+            return
+        if 'id' in request:
+            result = dict(result, id=request['id'])
+        self._send_json(HTTPStatus.OK, result)
+
+
+class _ServerMixin:
+    daemon_threads = True
+    verbose = False
+    retry_after = 1
+
+    def handle_error(self, request, client_address):
+        # Clients that hang up before their answer is written are not server errors
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class _TCPServer(_ServerMixin, ThreadingHTTPServer):
+    pass
+
+
+class _UnixServer(_ServerMixin, socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        super().server_bind()
+        os.chmod(self.server_address, 0o600)
+
+
+class QueryServer:
+    """
+    HTTP/JSON front end for process_query.
+
+    Handler threads only parse requests and wait for results; queries run
+    on the QueryQueue's workers, so worker concurrency and the queue bound
+    are what limit the load on the model.
+    """
+
+    def __init__(self, process_fn: Callable[..., Dict[str, Any]], host: str = '127.0.0.1', port: int = 8000,
+                 socket_path: Optional[str] = None, workers: int = 4, max_queued: int = 32,
+                 verbose: bool = False):
+        """
+        Create a server (it starts listening immediately).
+
+        Args:
+            process_fn: Called as process_fn(query, **options) on a worker thread
+            host: Interface to listen on (ignored with socket_path)
+            port: TCP port to listen on, 0 for any free port (ignored with socket_path)
+            socket_path: Listen on this Unix socket instead of TCP
+            workers: Queries processed at once
+            max_queued: Queries that may wait for a worker before requests get 429
+            verbose: Log every request to stderr
+        """
+        self.queries = QueryQueue(process_fn, workers=workers, max_queued=max_queued)
+        if socket_path is not None:
+            if not hasattr(socket, 'AF_UNIX'):
+                raise ValueError("Unix sockets are not supported on this platform")
+            self.httpd = _UnixServer(socket_path, _RequestHandler)
+        else:
+            self.httpd = _TCPServer((host, port), _RequestHandler)
+        self.httpd.queries = self.queries
+        self.httpd.verbose = verbose
+        self.httpd.started = time.monotonic()
+        # Responses still being written for accepted queries (waited for on shutdown)
+        self.httpd.responses = threading.Condition()
+        self.httpd.pending_responses = 0
+        self.socket_path = socket_path
+        self._shutdown_lock = threading.Lock()
+        self._shut_down = False
+
+    @property
+    def address(self) -> str:
+        """Where the server listens: 'http://host:port' or 'unix:PATH'."""
+        if self.socket_path is not None:
+            return f"unix:{self.socket_path}"
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self):
+        """Handle requests until shutdown() is called."""
+        self.httpd.serve_forever()
+
+    def shutdown(self, drain_timeout: Optional[float] = 30.0) -> bool:
+        """
+        Drain the queue, then stop serving and close the socket.
+
+        Must not be called from the thread running serve_forever(). Later
+        calls return False without waiting.
+
+        Returns:
+            True if every queued query finished and was answered before the timeout
+        """
+        with self._shutdown_lock:
+            if self._shut_down:
+                return False
+            self._shut_down = True
+
+        deadline = None if drain_timeout is None else time.monotonic() + drain_timeout
+        drained = self.queries.drain(drain_timeout)
+        with self.httpd.responses:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            drained = self.httpd.responses.wait_for(lambda: not self.httpd.pending_responses, remaining) and drained
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.socket_path is not None:
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+        return drained
+
+
+def serve(process_fn: Callable[..., Dict[str, Any]], drain_timeout: float = 30.0, **server_options):
+    """
+    Run a QueryServer in the foreground until SIGINT or SIGTERM, then drain and exit.
+
+    Args:
+        process_fn: Called as process_fn(query, **options) for each query
+        drain_timeout: Seconds to wait for queued queries on shutdown
+        **server_options: Passed to QueryServer
+    """
+    server = QueryServer(process_fn, **server_options)
+
+    def stop(signum, frame):
+        stats = server.queries.stats()
+        print(f"\n🛑 Draining ({stats['queued']} queued, {stats['in_flight']} running)...", flush=True)
+        # shutdown() waits for serve_forever(), so it cannot run on this (the serving) thread
+        threading.Thread(target=server.shutdown, args=(drain_timeout,), daemon=True).start()
+
+    previous = {sig: signal.signal(sig, stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+    stats = server.queries.stats()
+    print(f"🚀 Serving on {server.address} ({stats['workers']} workers, "
+          f"queue of {stats['max_queued']})", flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+    print(f"👋 Stopped after {server.queries.stats()['completed']} queries", flush=True)
@@ -0,0 +1,89 @@
+"""
+Streaming reasoning with incremental tool execution.
+TOOL_CALL lines are parsed as soon as they are complete in the token stream
+and their tools start right away, so tool execution overlaps with the rest
+of the generation.
+"""
+
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from tool_executor import ToolExecutor
+from tool_parser import parse_partial_tool_calls, parse_tool_calls
+
+
+class StreamingToolCallScanner:
+    """
+    Incrementally extracts tool calls from streamed text.
+
+    Only complete lines are parsed. A call that continues onto lines that
+    have not arrived yet is kept in the buffer and retried on the next
+    chunk, so text is never parsed more than once except for such calls.
+    """
+
+    def __init__(self, errors: Optional[List[str]] = None):
+        self.errors = errors if errors is not None else []
+        self._buffer = ''
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Add a chunk of text and return the tool calls it completed."""
+        self._buffer += text
+        line_end = self._buffer.rfind('\n') + 1
+        if not line_end:
+            return []
+
+        tool_calls, consumed = parse_partial_tool_calls(self._buffer[:line_end], errors=self.errors)
+        self._buffer = self._buffer[consumed:]
+        return tool_calls
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Parse whatever is left once the stream has ended."""
+        tool_calls = parse_tool_calls(self._buffer, errors=self.errors)
+        self._buffer = ''
+        return tool_calls
+
+
+def stream_reasoning(chunks: Iterable[str],
+                     errors: Optional[List[str]] = None,
+                     on_text: Optional[Callable[[str], None]] = None,
+                     max_workers: int = 4,
+                     pool: Optional[Executor] = None) -> Dict[str, Any]:
+    """
+    Consume a reasoning stream, executing each tool call as soon as it is parsed.
+
+    Calls go to a ToolExecutor, so a call that nests another or refers to
+    an earlier result with "$N" starts as soon as its inputs are ready.
+
+    Args:
+        chunks: Text chunks of the reasoning response, in order
+        errors: List that receives parse errors
+        on_text: Called with each chunk as it arrives (e.g. to echo it)
+        max_workers: Threads to use when no pool is given
+        pool: Optional shared thread or process pool for the tools
+
+    Returns:
+        Dict with the full 'reasoning' text, the parsed 'tool_calls', and
+        the 'results', execution 'errors' and 'timings' from the executor
+    """
+    scanner = StreamingToolCallScanner(errors)
+    parts = []
+    tool_calls = []
+
+    with ToolExecutor(max_workers=max_workers, pool=pool) as executor:
+        for chunk in chunks:
+            parts.append(chunk)
+            if on_text is not None:
+                on_text(chunk)
+            for tool_call in scanner.feed(chunk):
+                tool_calls.append(tool_call)
+                executor.submit(tool_call)
+
+        for tool_call in scanner.finish():
+            tool_calls.append(tool_call)
+            executor.submit(tool_call)
+
+        outcome = executor.wait()
+
+    outcome['reasoning'] = ''.join(parts)
+    outcome['tool_calls'] = tool_calls
+    return outcome
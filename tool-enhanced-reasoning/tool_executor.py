@@ -0,0 +1,256 @@
+"""
+Dependency-aware executor for parsed tool calls.
+Nested calls and "$N" references become edges of a DAG; every call starts as
+soon as its inputs are ready, and independent calls run concurrently in a
+thread or process pool.
+"""
+
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+from tools.registry import get_registry
+from tool_parser import NestedCall, ResultRef, format_tool_call
+
+
+class DependencyError(Exception):
+    """Raised for a call that could not run because one of its inputs failed."""
+
+
+def call_tool(tool_type: str, function_name: str, *args, **kwargs) -> Any:
+    """Validate the arguments of a call and dispatch it through the tool registry."""
+    return get_registry().call(tool_type.lower(), function_name, *args, **kwargs)
+
+
+def format_result(value: Any) -> str:
+    """
+    Format a tool result as text, like str().
+
+    Integers too long for str() (see sys.set_int_max_str_digits) are
+    abbreviated instead of raising ValueError.
+    """
+    try:
+        return str(value)
+    except ValueError:
+        if isinstance(value, int):
+            return f"<integer with about {int(value.bit_length() * 0.30103) + 1} digits>"
+        if isinstance(value, dict):
+            return '{' + ', '.join(f"{format_result(key)}: {format_result(item)}"
+                                   for key, item in value.items()) + '}'
+        if isinstance(value, (list, tuple)):
+            return '[' + ', '.join(map(format_result, value)) + ']'
+        raise
+
+
+def _timed_call(tool_type: str, function_name: str, args: list, kwargs: dict) -> Tuple[Any, float]:
+    """Run a tool in a worker and measure how long it took there."""
+    start_time = time.perf_counter()
+    result = call_tool(tool_type, function_name, *args, **kwargs)
+    return result, time.perf_counter() - start_time
+
+
+class _Node:
+    """One distinct call in the DAG."""
+
+    __slots__ = ('key', 'type', 'function', 'args', 'kwargs', 'dependencies',
+                 'waiting', 'future', 'start', 'duration')
+
+    def __init__(self, key: str, tool_type: str, function_name: str):
+        self.key = key
+        self.type = tool_type
+        self.function = function_name
+        self.args: List[Any] = []
+        self.kwargs: Dict[str, Any] = {}
+        self.dependencies: List['_Node'] = []
+        self.waiting = 0
+        self.future: Future = Future()
+        self.start: Optional[float] = None
+        self.duration: Optional[float] = None
+
+
+def _resolve(value: Any) -> Any:
+    """Replace dependency nodes in an argument with their results."""
+    if isinstance(value, _Node):
+        return value.future.result()
+    if isinstance(value, list):
+        return [_resolve(item) for item in value]
+    return value
+
+
+class ToolExecutor:
+    """
+    Runs tool calls as a dependency graph.
+
+    Calls are submitted in response order; a nested call or a "$N"
+    reference makes the outer call wait for that result. Identical calls
+    (same formatted text) are executed once. Scheduling is driven by
+    future callbacks, so no worker ever blocks waiting for another call.
+    """
+
+    def __init__(self, max_workers: int = 4, pool: Optional[Executor] = None):
+        """
+        Create an executor.
+
+        Args:
+            max_workers: Size of the thread pool created when no pool is given
+            pool: Existing thread or process pool to run the tools in; it is
+                not shut down by this executor
+        """
+        self._owns_pool = pool is None
+        self._pool = pool if pool is not None else ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._nodes: Dict[str, _Node] = {}
+        self._top_level: List[Tuple[str, Future]] = []
+        self._start_time = time.perf_counter()
+
+    def __enter__(self) -> 'ToolExecutor':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def submit(self, tool_call: Dict[str, Any]) -> Future:
+        """Schedule a top-level tool call and return a future for its result."""
+        key = format_tool_call(tool_call)
+        position = len(self._top_level) + 1
+        try:
+            future = self._node_for(tool_call, key, position).future
+        except (ValueError, DependencyError) as e:
+            future = Future()
+            future.set_exception(e)
+        self._top_level.append((key, future))
+        return future
+
+    def _node_for(self, call: Dict[str, Any], key: str, position: int) -> _Node:
+        """Return the node for a call, creating and scheduling it if it is new."""
+        node = self._nodes.get(key)
+        if node is not None:
+            return node
+
+        node = _Node(key, call.get('type', ''), call.get('function', ''))
+        node.args = [self._prepare(arg, node, position) for arg in call.get('args', [])]
+        node.kwargs = {name: self._prepare(value, node, position)
+                       for name, value in call.get('kwargs', {}).items()}
+        self._nodes[key] = node
+        self._schedule(node)
+        return node
+
+    def _prepare(self, value: Any, node: _Node, position: int) -> Any:
+        """Turn nested calls and references in an argument into dependency edges."""
+        if isinstance(value, NestedCall):
+            child = self._node_for(value, format_tool_call(value), position)
+            node.dependencies.append(child)
+            return child
+        if isinstance(value, ResultRef):
+            if not 1 <= value.index < position:
+                raise ValueError(f"{value!r} does not refer to an earlier tool call")
+            key, future = self._top_level[value.index - 1]
+            target = self._nodes.get(key)
+            if target is None:
+                # The referenced call failed before it could be scheduled
+                raise DependencyError(f"{value!r} ({key}) failed: {future.exception()}")
+            node.dependencies.append(target)
+            return target
+        if isinstance(value, list):
+            return [self._prepare(item, node, position) for item in value]
+        return value
+
+    def _schedule(self, node: _Node):
+        """Launch a node now, or once all of its dependencies have finished."""
+        dependencies = set(node.dependencies)
+        if not dependencies:
+            self._launch(node)
+            return
+        node.waiting = len(dependencies)
+        for dependency in dependencies:
+            dependency.future.add_done_callback(lambda _, node=node: self._dependency_done(node))
+
+    def _dependency_done(self, node: _Node):
+        with self._lock:
+            node.waiting -= 1
+            ready = node.waiting == 0
+        if ready:
+            self._launch(node)
+
+    def _launch(self, node: _Node):
+        """Submit a node whose inputs are all available to the pool."""
+        for dependency in node.dependencies:
+            error = dependency.future.exception()
+            if error is not None:
+                if not isinstance(error, DependencyError):
+                    error = DependencyError(f"{dependency.key} failed: {error}")
+                node.future.set_exception(error)
+                return
+
+        args = [_resolve(arg) for arg in node.args]
+        kwargs = {name: _resolve(value) for name, value in node.kwargs.items()}
+        node.start = time.perf_counter() - self._start_time
+        try:
+            work = self._pool.submit(_timed_call, node.type, node.function, args, kwargs)
+        except Exception as e:
+            # e.g. a broken process pool; fail the call rather than leave it pending
+            node.future.set_exception(e)
+            return
+        work.add_done_callback(lambda work, node=node: self._finish(node, work))
+
+    def _finish(self, node: _Node, work: Future):
+        """Record the outcome of a node's tool call."""
+        try:
+            result, node.duration = work.result()
+        except Exception as e:
+            node.duration = time.perf_counter() - self._start_time - node.start
+            node.future.set_exception(e)
+        else:
+            node.future.set_result(result)
+
+    def wait(self) -> Dict[str, Any]:
+        """
+        Wait for every submitted call.
+
+        Returns:
+            Dict with 'results' keyed by formatted top-level call (in
+            submission order), 'errors' for the calls that failed, and
+            'timings' with the start offset and duration in seconds of every
+            call that ran, nested calls included
+        """
+        wait([future for _, future in self._top_level] + [node.future for node in self._nodes.values()])
+
+        results = {}
+        errors = []
+        for key, future in self._top_level:
+            error = future.exception()
+            if error is None:
+                results[key] = future.result()
+            else:
+                errors.append(f"Error executing {key}: {str(error)}")
+
+        timings = {
+            node.key: {'start': node.start, 'duration': node.duration}
+            for node in self._nodes.values() if node.start is not None
+        }
+        return {'results': results, 'errors': errors, 'timings': timings}
+
+    def shutdown(self):
+        """Release the thread pool if this executor created it."""
+        if self._owns_pool:
+            self._pool.shutdown(wait=True)
+
+
+def execute_tool_calls(tool_calls: List[Dict[str, Any]], max_workers: int = 4,
+                       pool: Optional[Executor] = None) -> Dict[str, Any]:
+    """
+    Execute parsed tool calls, running independent calls concurrently.
+
+    Args:
+        tool_calls: Calls as returned by parse_tool_calls(), in response order
+        max_workers: Threads to use when no pool is given
+        pool: Optional shared thread or process pool
+
+    Returns:
+        Dict with 'results', 'errors' and per-call 'timings' (see ToolExecutor.wait)
+    """
+    with ToolExecutor(max_workers=max_workers, pool=pool) as executor:
+        for tool_call in tool_calls:
+            executor.submit(tool_call)
+        return executor.wait()
@@ -0,0 +1,439 @@
+"""
+Parser for TOOL_CALL lines in LLM responses.
+
+Grammar (whitespace, including newlines, is allowed between tokens):
+
+    tool_call := "TOOL_CALL:" ["`"] call
+    call      := NAME "." NAME "(" [argument ("," argument)* [","]] ")"
+    argument  := [NAME "="] value
+    value     := NUMBER | STRING | "[" [value ("," value)* [","]] "]"
+               | "True" | "False" | "None" | "$" DIGITS | call
+
+"$N" refers to the result of the N-th TOOL_CALL in the same response.
+
+The response is scanned once from left to right: each TOOL_CALL marker is
+found with str.find and the call after it is parsed in a single pass. Flat
+calls, the common case, are validated by one regex; nested or multi-line
+calls go through a token-level stack machine. Nothing is ever passed to
+eval, so arbitrary code in a response cannot run.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+
+TOOL_CALL_MARKER = 'TOOL_CALL:'
+
+# Deeper nesting than this is rejected
+MAX_NESTING_DEPTH = 32
+
+# Each match is one token with its leading whitespace. Exactly one of the
+# inner groups is non-empty, except for trailing whitespace at the end of a
+# segment, which matches the empty last alternative.
+_TOKEN_RE = re.compile(r'''
+    (
+        [ \t\r\n]*+
+        (?:
+            ([+-]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?)       # number
+          | ([A-Za-z_]\w*)                                      # name
+          | ("(?:[^"\\\n]|\\.)*+"|'(?:[^'\\\n]|\\.)*+')         # string
+          | ([()\[\],.=`])                                      # punctuation
+          | (\$\d+)                                             # result reference
+          | (.)                                                 # anything else
+          |                                                     # end of segment
+        )
+    )
+''', re.VERBOSE | re.DOTALL)
+
+# Fast path for the common case: a call on one line whose arguments are all
+# scalars or flat lists of scalars. One regex validates the whole call and
+# findall extracts the arguments; anything else goes to _parse_call_at.
+_NUMBER = r'[+-]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?'
+_STRING = r'"(?:[^"\\\n]|\\.)*+"|' + r"'(?:[^'\\\n]|\\.)*+'"
+_CONSTANT = r'(?:True|False|None|true|false|null)\b'
+_SCALAR = rf'(?:{_NUMBER}|{_STRING}|{_CONSTANT})'
+_FLAT_LIST = rf'\[[ \t]*+(?:{_SCALAR}[ \t]*+(?:,[ \t]*+{_SCALAR}[ \t]*+)*+,?[ \t]*+)?\]'
+_FLAT_ARGUMENT = rf'(?:[A-Za-z_]\w*[ \t]*+=[ \t]*+)?(?:{_SCALAR}|{_FLAT_LIST})'
+
+_FLAT_CALL_RE = re.compile(
+    rf'[ \t]*+`?[ \t]*+([A-Za-z_]\w*)[ \t]*+\.[ \t]*+([A-Za-z_]\w*)[ \t]*+\('
+    rf'[ \t]*+((?:{_FLAT_ARGUMENT}[ \t]*+(?:,[ \t]*+{_FLAT_ARGUMENT}[ \t]*+)*+,?[ \t]*+)?)\)'
+)
+_FLAT_ARGUMENT_RE = re.compile(
+    rf'(?:([A-Za-z_]\w*)[ \t]*+=[ \t]*+)?(?:({_NUMBER})|({_STRING})|({_CONSTANT})|({_FLAT_LIST}))'
+)
+_SCALAR_RE = re.compile(rf'({_NUMBER})|({_STRING})|({_CONSTANT})')
+
+_ESCAPE_RE = re.compile(r'\\(u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|.)', re.DOTALL)
+
+_SIMPLE_ESCAPES = {
+    'n': '\n', 't': '\t', 'r': '\r', '0': '\0', 'b': '\b', 'f': '\f',
+    '\\': '\\', '"': '"', "'": "'"
+}
+
+_CONSTANTS = {
+    'True': True, 'False': False, 'None': None,
+    'true': True, 'false': False, 'null': None
+}
+
+
+class ToolCallSyntaxError(ValueError):
+    """Raised when a TOOL_CALL does not match the grammar."""
+
+    def __init__(self, message: str, position: int):
+        super().__init__(f"{message} at position {position}")
+        self.position = position
+
+
+class NestedCall(dict):
+    """
+    A tool call used as an argument of another call.
+
+    It has the same keys as a top-level tool call ('type', 'function',
+    'args', 'kwargs', 'source'); the subclass lets executors tell it apart
+    from data.
+    """
+
+
+class ResultRef:
+    """A "$N" argument: the result of the N-th (1-based) TOOL_CALL in the response."""
+
+    __slots__ = ('index',)
+
+    def __init__(self, index: int):
+        self.index = index
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ResultRef) and other.index == self.index
+
+    def __hash__(self) -> int:
+        return hash((ResultRef, self.index))
+
+    def __repr__(self) -> str:
+        return f"${self.index}"
+
+
+class _CallFrame:
+    """A call whose arguments are being parsed."""
+
+    __slots__ = ('call', 'keyword', 'start')
+
+    def __init__(self, tool_type: str, start: int):
+        self.call = {'type': tool_type, 'function': None, 'args': [], 'kwargs': {}}
+        self.keyword = None
+        self.start = start
+
+
+def _decode_escape(match) -> str:
+    """Translate one backslash escape inside a string literal."""
+    escape = match.group(1)
+    if escape[0] in 'ux' and len(escape) > 1:
+        return chr(int(escape[1:], 16))
+    return _SIMPLE_ESCAPES.get(escape, '\\' + escape)
+
+
+def _scalar(number: str, string: str, constant: str) -> Any:
+    """Convert a number, string or constant token (ValueError for an invalid number)."""
+    if number:
+        if '.' in number or 'e' in number or 'E' in number:
+            return float(number)
+        return int(number)
+    if string:
+        value = string[1:-1]
+        return _ESCAPE_RE.sub(_decode_escape, value) if '\\' in value else value
+    return _CONSTANTS[constant]
+
+
+def _parse_flat_arguments(text: str) -> Optional[Tuple[List[Any], Dict[str, Any]]]:
+    """
+    Convert the arguments of a call matched by _FLAT_CALL_RE.
+
+    Returns None when the call needs the full parser, which then reports
+    the error (e.g. duplicate keywords or an out-of-range number).
+    """
+    args: List[Any] = []
+    kwargs: Dict[str, Any] = {}
+    try:
+        for keyword, number, string, constant, flat_list in _FLAT_ARGUMENT_RE.findall(text):
+            if flat_list:
+                value = [_scalar(*item) for item in _SCALAR_RE.findall(flat_list)]
+            else:
+                value = _scalar(number, string, constant)
+            if keyword:
+                if keyword in kwargs or keyword in _CONSTANTS:
+                    return None
+                kwargs[keyword] = value
+            elif kwargs:
+                return None
+            else:
+                args.append(value)
+    except ValueError:
+        return None
+    return args, kwargs
+
+
+def _unexpected(token: str, position: int, expected: Optional[str] = None) -> ToolCallSyntaxError:
+    """Build the error for a token the grammar does not allow here."""
+    if expected is None:
+        return ToolCallSyntaxError(f"Unexpected {token!r}", position)
+    return ToolCallSyntaxError(f"Expected {expected} but found {token!r}", position)
+
+
+def _parse_call_at(text: str, start: int) -> Tuple[Dict[str, Any], int]:
+    """
+    Parse the call that starts at the given position.
+
+    The text is tokenized one line at a time with findall, so tokenizing
+    runs in C and stops at the line where the call ends. Parsing is a stack
+    machine: '[' and call headers push frames and ']' and ')' pop them, so
+    nesting needs no recursion.
+
+    Returns:
+        The parsed call and the position just after its closing parenthesis
+
+    Raises:
+        ToolCallSyntaxError: If the text does not match the grammar
+    """
+    stack: List[Any] = []
+    header = 0             # 1: need '.', 2: need function name, 3: need '('
+    header_frame = None
+    pending = None         # (name, position) of a name that must be followed by '=' or '.'
+    expecting_value = True
+    allow_backtick = True
+    text_length = len(text)
+    segment_start = start
+
+    while segment_start < text_length:
+        newline = text.find('\n', segment_start)
+        segment_end = text_length if newline == -1 else newline + 1
+        token_end = segment_start
+
+        for full, number, name, string, punct, reference, other in _TOKEN_RE.findall(
+                text, segment_start, segment_end):
+            token_end += len(full)
+            token = punct or name or number or string or reference or other
+            if not token:
+                continue
+            position = token_end - len(token)
+
+            if other:
+                raise _unexpected(other, position)
+
+            if header:
+                if header == 1:
+                    if punct != '.':
+                        raise _unexpected(token, position, "'.'")
+                    header = 2
+                elif header == 2:
+                    if not name:
+                        raise _unexpected(token, position, "a function name")
+                    header_frame.call['function'] = name
+                    header = 3
+                else:
+                    if punct != '(':
+                        raise _unexpected(token, position, "'('")
+                    if len(stack) > MAX_NESTING_DEPTH:
+                        raise ToolCallSyntaxError("Tool calls are nested too deeply", position)
+                    stack.append(header_frame)
+                    header = 0
+                    expecting_value = True
+                continue
+
+            if not stack:
+                if allow_backtick and punct == '`':
+                    allow_backtick = False
+                    continue
+                if not name:
+                    raise _unexpected(token, position, "a tool type")
+                header_frame = _CallFrame(name, position)
+                header = 1
+                continue
+
+            frame = stack[-1]
+
+            if pending is not None:
+                if punct == '.':
+                    header_frame = _CallFrame(pending[0], pending[1])
+                    header = 2
+                    pending = None
+                    continue
+                if punct == '=' and type(frame) is _CallFrame and frame.keyword is None:
+                    frame.keyword = pending
+                    pending = None
+                    continue
+                raise ToolCallSyntaxError(f"Unknown name {pending[0]!r}", pending[1])
+
+            if expecting_value:
+                if number or string:
+                    try:
+                        value = _scalar(number, string, '')
+                    except ValueError as e:
+                        raise ToolCallSyntaxError(f"Invalid number: {e}", position)
+                elif name:
+                    if name not in _CONSTANTS:
+                        pending = (name, position)
+                        continue
+                    value = _CONSTANTS[name]
+                elif reference:
+                    value = ResultRef(int(reference[1:]))
+                elif punct == '[':
+                    if len(stack) > MAX_NESTING_DEPTH:
+                        raise ToolCallSyntaxError("Lists are nested too deeply", position)
+                    stack.append([])
+                    continue
+                elif punct == ']' and type(frame) is list:
+                    value = stack.pop()
+                elif punct == ')' and type(frame) is _CallFrame and frame.keyword is None:
+                    value = None
+                else:
+                    raise _unexpected(token, position)
+            elif punct == ',':
+                expecting_value = True
+                continue
+            elif punct == ']' and type(frame) is list:
+                value = stack.pop()
+            elif punct == ')' and type(frame) is _CallFrame:
+                value = None
+            else:
+                raise _unexpected(token, position, "',' or ']'" if type(frame) is list else "',' or ')'")
+
+            if punct == ')':
+                stack.pop()
+                call = frame.call
+                call['source'] = text[frame.start:token_end]
+                if not stack:
+                    return call, token_end
+                value = NestedCall(call)
+
+            target = stack[-1]
+            if type(target) is list:
+                target.append(value)
+            elif target.keyword is not None:
+                keyword, keyword_position = target.keyword
+                kwargs = target.call['kwargs']
+                if keyword in kwargs:
+                    raise ToolCallSyntaxError(f"Duplicate keyword argument {keyword!r}", keyword_position)
+                kwargs[keyword] = value
+                target.keyword = None
+            elif target.call['kwargs']:
+                raise ToolCallSyntaxError("Positional argument follows keyword argument", position)
+            else:
+                target.call['args'].append(value)
+            expecting_value = False
+
+        segment_start = segment_end
+
+    raise ToolCallSyntaxError("Unexpected end of text", text_length)
+
+
+def parse_tool_call(text: str) -> Dict[str, Any]:
+    """
+    Parse a single call such as 'math.add(1, 2)' (without the TOOL_CALL marker).
+
+    Raises:
+        ToolCallSyntaxError: If the text is not a valid call
+    """
+    call, end = _parse_call_at(text, 0)
+    rest = text[end:]
+    if rest.strip():
+        position = end + len(rest) - len(rest.lstrip())
+        raise ToolCallSyntaxError(f"Unexpected {text[position]!r} after tool call", position)
+    return call
+
+
+def _scan_tool_calls(response_text: str, errors: Optional[List[str]],
+                     partial: bool) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Parse the TOOL_CALLs in a response.
+
+    With partial=True, a call cut off by the end of the text is not an
+    error: scanning stops at its marker and that offset is returned so the
+    caller can retry once more text has arrived.
+    """
+    tool_calls = []
+    marker_length = len(TOOL_CALL_MARKER)
+    position = response_text.find(TOOL_CALL_MARKER)
+
+    while position != -1:
+        call_start = position + marker_length
+
+        match = _FLAT_CALL_RE.match(response_text, call_start)
+        if match is not None:
+            parsed = _parse_flat_arguments(match.group(3))
+            if parsed is not None:
+                tool_calls.append({
+                    'type': match.group(1),
+                    'function': match.group(2),
+                    'args': parsed[0],
+                    'kwargs': parsed[1],
+                    'source': response_text[match.start(1):match.end()]
+                })
+                position = response_text.find(TOOL_CALL_MARKER, match.end())
+                continue
+
+        try:
+            call, resume = _parse_call_at(response_text, call_start)
+            tool_calls.append(call)
+        except ToolCallSyntaxError as e:
+            if partial and e.position >= len(response_text):
+                return tool_calls, position
+            message = f"Error parsing tool call: {e}"
+            if errors is None:
+                print(message)
+            else:
+                errors.append(message)
+            # Resume where parsing failed so no text is tokenized twice
+            resume = max(call_start, e.position)
+        position = response_text.find(TOOL_CALL_MARKER, resume)
+
+    return tool_calls, len(response_text)
+
+
+def parse_tool_calls(response_text: str, errors: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Parse every TOOL_CALL in an LLM response.
+
+    Args:
+        response_text: Full text of the LLM response
+        errors: List that receives a message for each malformed call;
+            if omitted, the messages are printed
+
+    Returns:
+        List of {'type', 'function', 'args', 'kwargs', 'source'} dicts, in
+        the order they appear. Nested calls appear as NestedCall arguments.
+    """
+    return _scan_tool_calls(response_text, errors, partial=False)[0]
+
+
+def parse_partial_tool_calls(response_text: str,
+                             errors: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Parse the complete TOOL_CALLs in a response that is still being generated.
+
+    Returns:
+        The parsed calls and the offset up to which the text has been fully
+        consumed. If the text ends in the middle of a call, the offset is
+        the start of that call's TOOL_CALL marker; otherwise it is len(text).
+    """
+    return _scan_tool_calls(response_text, errors, partial=True)
+
+
+def _format_value(value: Any) -> str:
+    """Format an argument the way it would be written in a TOOL_CALL."""
+    if isinstance(value, NestedCall):
+        return format_tool_call(value)
+    if isinstance(value, ResultRef):
+        return repr(value)
+    if isinstance(value, str):
+        escaped = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        return f'"{escaped}"'
+    if isinstance(value, list):
+        return '[' + ', '.join(_format_value(item) for item in value) + ']'
+    return str(value)
+
+
+def format_tool_call(tool_call: Dict[str, Any]) -> str:
+    """Format a parsed tool call back into 'type.function(arguments)' text."""
+    parts = [_format_value(arg) for arg in tool_call.get('args', [])]
+    parts.extend(f"{name}={_format_value(value)}" for name, value in tool_call.get('kwargs', {}).items())
+    return f"{tool_call.get('type', '')}.{tool_call.get('function', '')}({', '.join(parts)})"
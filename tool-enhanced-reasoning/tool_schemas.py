@@ -0,0 +1,168 @@
+"""
+Typed tool schemas for native function calling.
+Function declarations for every tool in the tool registry are generated
+once at import time from their signatures and docstrings, so the tool
+part of every request is byte-identical. Function calls returned by the model
+are converted to the same tool call dicts as parse_tool_calls produces.
+"""
+
+import hashlib
+import inspect
+import json
+import typing
+from typing import Any, Dict, List, Tuple
+
+from tools.registry import get_registry
+from tool_parser import NestedCall, ResultRef, format_tool_call
+
+
+TOOL_REGISTRIES = get_registry().all_functions()
+
+
+def declaration_name(tool_type: str, function_name: str) -> str:
+    """Function-calling name of a tool ('math.square_root' -> 'math_square_root')."""
+    return f"{tool_type}_{function_name}"
+
+
+def _schema_for(annotation: Any) -> Dict[str, Any]:
+    """Map a type annotation to an OpenAPI-style schema as used by Gemini."""
+    if annotation is bool:
+        return {'type': 'BOOLEAN'}
+    if annotation is int:
+        return {'type': 'INTEGER'}
+    if annotation is float:
+        return {'type': 'NUMBER'}
+    if annotation is str:
+        return {'type': 'STRING'}
+
+    origin = typing.get_origin(annotation)
+    arguments = typing.get_args(annotation)
+    if origin in (list, List):
+        return {'type': 'ARRAY', 'items': _schema_for(arguments[0] if arguments else Any)}
+    if origin in (dict, Dict):
+        return {'type': 'OBJECT'}
+    if origin is typing.Union:
+        # A list member wins (e.g. NumberSeries = Union[List[number], ndarray-like])
+        for member in arguments:
+            if typing.get_origin(member) in (list, List):
+                return _schema_for(member)
+        if all(member in (int, float) for member in arguments):
+            return {'type': 'NUMBER'}
+    return {'type': 'STRING'}
+
+
+def _declaration(tool_type: str, function_name: str, function) -> Dict[str, Any]:
+    hints = typing.get_type_hints(function)
+    properties = {}
+    required = []
+    for name, parameter in inspect.signature(function).parameters.items():
+        schema = _schema_for(hints.get(name, Any))
+        if parameter.default is not inspect.Parameter.empty:
+            schema['description'] = f"Default: {json.dumps(parameter.default)}"
+        else:
+            required.append(name)
+        properties[name] = schema
+
+    description = inspect.getdoc(function) or function_name.replace('_', ' ')
+    return {
+        'name': declaration_name(tool_type, function_name),
+        'description': description.split('\n')[0],
+        'parameters': {'type': 'OBJECT', 'properties': properties, 'required': required}
+    }
+
+
+def _build_declarations() -> Tuple[List[Dict[str, Any]], Dict[str, Tuple[str, str]]]:
+    declarations = []
+    names = {}
+    for tool_type, registry in TOOL_REGISTRIES.items():
+        for function_name, function in registry.items():
+            declaration = _declaration(tool_type, function_name, function)
+            declarations.append(declaration)
+            names[declaration['name']] = (tool_type, function_name)
+    return declarations, names
+
+
+FUNCTION_DECLARATIONS, _DECLARED_TOOLS = _build_declarations()
+
+# The `tools` argument of generate_content
+TOOLS = [{'function_declarations': FUNCTION_DECLARATIONS}]
+
+# Changes whenever a tool or its signature changes (used in response cache keys)
+SCHEMA_DIGEST = hashlib.sha256(json.dumps(TOOLS, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+_PROPERTIES = {
+    declaration['name']: declaration['parameters']['properties'] for declaration in FUNCTION_DECLARATIONS
+}
+
+
+def _coerce(value: Any, schema: Dict[str, Any]) -> Any:
+    """
+    Convert a JSON argument to the type a tool expects.
+
+    JSON (and protobuf Struct) numbers are all floats, so whole numbers
+    become ints, as they would be when parsed from a TOOL_CALL line.
+    """
+    kind = schema['type']
+    if kind in ('INTEGER', 'NUMBER') and isinstance(value, float) and value.is_integer():
+        return int(value)
+    if kind == 'ARRAY' and isinstance(value, (list, tuple)):
+        return [_coerce(item, schema['items']) for item in value]
+    return value
+
+
+def tool_call_from_function_call(name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a model function call into a tool call dict.
+
+    Required parameters become positional arguments and optional ones
+    keyword arguments, in signature order.
+
+    Raises:
+        ValueError: If the function is unknown or the arguments do not fit it
+    """
+    if name not in _DECLARED_TOOLS:
+        raise ValueError(f"Unknown function '{name}'")
+    tool_type, function_name = _DECLARED_TOOLS[name]
+    properties = _PROPERTIES[name]
+
+    unknown = set(args) - set(properties)
+    if unknown:
+        raise ValueError(f"Unexpected arguments for {name}: {', '.join(sorted(unknown))}")
+
+    signature = inspect.signature(TOOL_REGISTRIES[tool_type][function_name])
+    positional = []
+    keywords = {}
+    for parameter_name, parameter in signature.parameters.items():
+        if parameter_name not in args:
+            if parameter.default is inspect.Parameter.empty:
+                raise ValueError(f"Missing argument '{parameter_name}' for {name}")
+            continue
+        value = _coerce(args[parameter_name], properties[parameter_name])
+        if parameter.default is inspect.Parameter.empty:
+            positional.append(value)
+        else:
+            keywords[parameter_name] = value
+
+    tool_call = {'type': tool_type, 'function': function_name, 'args': positional, 'kwargs': keywords}
+    tool_call['source'] = format_tool_call(tool_call)
+    return tool_call
+
+
+def function_call_from_tool_call(tool_call: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a tool call dict into a function call ({'name', 'args'}).
+
+    Raises:
+        ValueError: If the call is unknown or uses nested calls or $N
+            references, which function calls cannot express
+    """
+    name = declaration_name(tool_call['type'], tool_call['function'])
+    if name not in _DECLARED_TOOLS:
+        raise ValueError(f"Unknown function '{name}'")
+    values = list(tool_call.get('args', [])) + list(tool_call.get('kwargs', {}).values())
+    if any(isinstance(value, (NestedCall, ResultRef)) for value in values):
+        raise ValueError(f"{format_tool_call(tool_call)} depends on another call")
+
+    function = TOOL_REGISTRIES[tool_call['type']][tool_call['function']]
+    bound = inspect.signature(function).bind(*tool_call.get('args', []), **tool_call.get('kwargs', {}))
+    return {'name': name, 'args': dict(bound.arguments)}
@@ -1,9 +1,42 @@
 """
 Tools package for the tool-enhanced reasoning script.
 Contains mathematical and string analysis tools.
+
+The names below are imported from their submodules on first access, so that
+importing one part of the package (e.g. tools.registry) does not load every
+tool family.
 """
 
-from .math_tools import MATH_FUNCTIONS, call_math_function
-from .string_tools import STRING_FUNCTIONS, call_string_function
+import importlib
+
+# Exported name -> submodule defining it
+_EXPORTS = {
+    'MATH_FUNCTIONS': 'math_tools', 'call_math_function': 'math_tools',
+    'evaluate_expression_batch': 'math_tools',
+    'STRING_FUNCTIONS': 'string_tools', 'call_string_function': 'string_tools',
+    'ToolRegistry': 'registry', 'ToolArgumentError': 'registry', 'get_registry': 'registry',
+    'register_family': 'registry',
+    'map_string_function': 'batch_map',
+    'ToolResultCache': 'cache', 'enable_result_cache': 'cache', 'disable_result_cache': 'cache',
+    'get_result_cache': 'cache',
+    'TextProfile': 'text_profile', 'get_text_profile': 'text_profile',
+    'TextIndex': 'text_index', 'TextIndexStore': 'text_index', 'enable_text_index': 'text_index',
+    'disable_text_index': 'text_index', 'get_text_index': 'text_index',
+    'RunningStats': 'online_stats', 'P2Quantile': 'online_stats', 'running_mean': 'online_stats',
+    'approximate_median': 'online_stats', 'iter_number_chunks': 'online_stats',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = ['MATH_FUNCTIONS', 'STRING_FUNCTIONS', 'call_math_function', 'call_string_function']
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,349 @@
+"""
+Batch ("map") mode for the string tools.
+Applies one string tool to a whole column of strings and returns the
+results in order. Character-class counts and palindrome checks are
+vectorized with NumPy over a chunk of rows at a time (one table lookup
+per character and a cumulative sum per row). Chunks of Latin-1 text, and
+every chunk without NumPy, are instead joined with a separator and
+processed in one pass: counts with bytes.translate (str.translate beyond
+Latin-1) and palindromes by comparing the chunk with its reverse. Word
+counts use str.split on each row, which is faster than either. Other
+tools are called directly for each row, and large columns can be spread
+over a pool of worker processes.
+"""
+
+import inspect
+import operator
+from concurrent.futures import Executor
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .numpy_support import np
+from .string_tools import STRING_FUNCTIONS
+from .text_profile import CONSONANTS, VOWELS
+
+
+# Rows per vectorized chunk (and per task when a process pool is used)
+CHUNK_SIZE = 65536
+
+
+# Per-character contribution of each class-counting tool. Every count is a
+# sum over characters, so a column can be counted with one table lookup.
+def _vowel_weight(char: str, case_sensitive: bool) -> int:
+    if case_sensitive or char in VOWELS or char in CONSONANTS:
+        return int(char in VOWELS)
+    # Characters whose lowercase form contains vowels ('E', or 'İ' -> 'i̇')
+    return sum(1 for c in char.lower() if c in VOWELS)
+
+
+def _consonant_weight(char: str, case_sensitive: bool) -> int:
+    if case_sensitive or char in VOWELS or char in CONSONANTS:
+        return int(char in CONSONANTS)
+    return sum(1 for c in char.lower() if c in CONSONANTS)
+
+
+_CLASS_WEIGHTS: Dict[str, Callable[[str, bool], int]] = {
+    'count_vowels': _vowel_weight,
+    'count_consonants': _consonant_weight,
+    'count_letters': lambda char, case_sensitive: int(char.isalpha()),
+    'count_digits': lambda char, case_sensitive: int(char.isdigit()),
+    'count_uppercase': lambda char, case_sensitive: int(char.isupper()),
+    'count_lowercase': lambda char, case_sensitive: int(char.islower()),
+    'count_special_characters': lambda char, case_sensitive: int(not char.isalnum() and not char.isspace()),
+}
+
+# Joins the rows of a chunk for the pure-Python kernels; chunks whose rows
+# contain it are processed row by row instead
+_SEPARATOR = '\x00'
+_SEPARATOR_BYTE = _SEPARATOR.encode('latin-1')
+
+# Code points covered by the lookup tables; the rest (astral planes) are
+# looked up one distinct code point at a time
+_TABLE_SIZE = 0x10000
+
+
+class _TranslateWeights(dict):
+    """str.translate table that replaces each character by weight-many 'x's."""
+
+    def __init__(self, weight: Callable[[str], int]):
+        super().__init__()
+        self._weight = weight
+
+    def __missing__(self, code: int) -> Optional[str]:
+        weight = self._weight(chr(code))
+        self[code] = replacement = 'x' * weight if weight else None
+        return replacement
+
+
+@lru_cache(maxsize=None)
+def _translate_weights(function_name: str, case_sensitive: bool) -> _TranslateWeights:
+    weight = _CLASS_WEIGHTS[function_name]
+    table = _TranslateWeights(lambda char: weight(char, case_sensitive))
+    table[ord(_SEPARATOR)] = _SEPARATOR
+    return table
+
+
+@lru_cache(maxsize=None)
+def _byte_weights(function_name: str, case_sensitive: bool) -> Optional[Tuple[bytes, bytes]]:
+    """
+    bytes.translate (table, deletions) for Latin-1 text: counted characters
+    become b'x', the rest are deleted. None if a character counts more than once.
+    """
+    weights = [_CLASS_WEIGHTS[function_name](chr(code), case_sensitive) for code in range(256)]
+    if max(weights) > 1:
+        return None
+    separator = ord(_SEPARATOR)
+    table = bytes(code if code == separator or not weight else ord('x') for code, weight in enumerate(weights))
+    deletions = bytes(code for code, weight in enumerate(weights) if code != separator and not weight)
+    return table, deletions
+
+
+# bytes.translate table lowering Latin-1 text (each Latin-1 character lowers to one)
+_BYTE_LOWER = bytes(ord(chr(code).lower()) for code in range(256))
+
+
+def _join(texts: Sequence[str]) -> Optional[str]:
+    """Join a chunk's rows with the separator, or None if a row contains it."""
+    joined = _SEPARATOR.join(texts)
+    return joined if joined.count(_SEPARATOR) == len(texts) - 1 else None
+
+
+def _table(predicate: Callable[[str], Any], dtype) -> Any:
+    """Evaluate a per-character function over the Basic Multilingual Plane."""
+    return np.array([predicate(chr(code)) for code in range(_TABLE_SIZE)], dtype=dtype)
+
+
+@lru_cache(maxsize=None)
+def _weight_table(function_name: str, case_sensitive: bool):
+    weight = _CLASS_WEIGHTS[function_name]
+    return _table(lambda char: weight(char, case_sensitive), np.uint8)
+
+
+def _is_irregular(char: str) -> bool:
+    return len(char.lower()) != 1 or char == 'Σ'
+
+
+def _lower_code(char: str) -> int:
+    lowered = char.lower()
+    return ord(lowered) if len(lowered) == 1 else 0
+
+
+@lru_cache(maxsize=None)
+def _lower_tables():
+    """
+    (lowercase code point, irregular) for the BMP. Irregular characters
+    lower to several characters or, like 'Σ', depend on their neighbours.
+    """
+    return _table(_lower_code, np.uint32), _table(_is_irregular, bool)
+
+
+def _lookup(codes, table, function: Callable[[str], Any]):
+    """Map code points through a BMP table, computing astral code points with function."""
+    if codes.dtype == np.uint8:
+        return table[codes]
+    astral = codes >= _TABLE_SIZE
+    values = table[np.where(astral, 0, codes)]
+    if astral.any():
+        distinct = np.unique(codes[astral])
+        computed = np.array([function(chr(code)) for code in distinct.tolist()], dtype=table.dtype)
+        values[astral] = computed[np.searchsorted(distinct, codes[astral])]
+    return values
+
+
+class _CodeChunk:
+    """The code points of a chunk of rows, concatenated, with per-row offsets."""
+
+    def __init__(self, texts: Sequence[str]):
+        joined = ''.join(texts)
+        self.rows = len(texts)
+        self.lengths = np.fromiter(map(len, texts), dtype=np.int64, count=self.rows)
+        self.ends = np.cumsum(self.lengths)
+        self.starts = self.ends - self.lengths
+        if joined.isascii():
+            self.codes = np.frombuffer(joined.encode('ascii'), dtype=np.uint8)
+        else:
+            self.codes = np.frombuffer(joined.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+
+    def lookup(self, table, function: Callable[[str], Any]):
+        return _lookup(self.codes, table, function)
+
+    def row_sums(self, values, starts=None, ends=None):
+        """Sum per-character values within each row."""
+        totals = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum(values, out=totals[1:])
+        if starts is None:
+            starts, ends = self.starts, self.ends
+        return totals[ends] - totals[starts]
+
+
+def _count_class(texts: Sequence[str], tool: Callable, function_name: str, options: Dict[str, Any]) -> List[int]:
+    case_sensitive = options.get('case_sensitive', False)
+    joined = _join(texts)
+    if not texts or joined is None:
+        return [tool(text) for text in texts]
+    byte_weights = _byte_weights(function_name, case_sensitive)
+    if byte_weights is not None:
+        try:
+            return list(map(len, joined.encode('latin-1').translate(*byte_weights).split(_SEPARATOR_BYTE)))
+        except UnicodeEncodeError:
+            pass
+    if np is None:
+        return list(map(len, joined.translate(_translate_weights(function_name, case_sensitive)).split(_SEPARATOR)))
+    weight = _CLASS_WEIGHTS[function_name]
+    chunk = _CodeChunk(texts)
+    values = chunk.lookup(_weight_table(function_name, case_sensitive), lambda char: weight(char, case_sensitive))
+    return chunk.row_sums(values).tolist()
+
+
+def _count_spaces(texts: Sequence[str], tool: Callable, function_name: str, options: Dict[str, Any]) -> List[int]:
+    return [text.count(' ') for text in texts]
+
+
+def _count_characters(texts: Sequence[str], tool: Callable, function_name: str,
+                      options: Dict[str, Any]) -> List[int]:
+    if options['include_spaces']:
+        return list(map(len, texts))
+    return [len(text) - text.count(' ') for text in texts]
+
+
+def _count_words(texts: Sequence[str], tool: Callable, function_name: str, options: Dict[str, Any]) -> List[int]:
+    # str.split per row beats both a NumPy scan and a whole-chunk pass here
+    return list(map(len, map(str.split, texts)))
+
+
+def _is_palindrome(texts: Sequence[str], tool: Callable, function_name: str, options: Dict[str, Any]) -> List[bool]:
+    joined = _join(texts)
+    if not texts or joined is None:
+        return list(map(tool, texts))
+    separator = _SEPARATOR
+    try:
+        joined = joined.encode('latin-1').translate(_BYTE_LOWER if options['ignore_case'] else None,
+                                                    b' ' if options['ignore_spaces'] else b'')
+        separator = _SEPARATOR_BYTE
+    except UnicodeEncodeError:
+        if np is not None:
+            return _is_palindrome_numpy(texts, tool, options)
+        # A final 'Σ' lowers by context; leave chunks with it to the tool
+        if options['ignore_case'] and 'Σ' in joined:
+            return list(map(tool, texts))
+        if options['ignore_case']:
+            joined = joined.lower()
+        if options['ignore_spaces']:
+            joined = joined.replace(' ', '')
+    # Reversing the chunk reverses every row and the order of the rows
+    return list(map(operator.eq, joined.split(separator), joined[::-1].split(separator)[::-1]))
+
+
+def _is_palindrome_numpy(texts: Sequence[str], tool: Callable, options: Dict[str, Any]) -> List[bool]:
+    chunk = _CodeChunk(texts)
+    codes = chunk.codes
+
+    # Most rows are ruled out by their first and last characters (after
+    # dropping spaces and lowering); the tool checks the remaining rows
+    if options['ignore_spaces']:
+        kept = codes != ord(' ')
+        positions = np.flatnonzero(kept)
+        lengths = chunk.row_sums(kept)
+    else:
+        positions = None
+        lengths = chunk.lengths
+    ends = np.cumsum(lengths)
+    rows = np.flatnonzero(lengths)
+    first, last = ends[rows] - lengths[rows], ends[rows] - 1
+    if positions is not None:
+        first, last = positions[first], positions[last]
+
+    edges = np.concatenate((codes[first], codes[last]))
+    irregular = None
+    if options['ignore_case']:
+        lower, irregular_table = _lower_tables()
+        # Characters that do not lower to exactly one character cannot be compared here
+        irregular = _lookup(edges, irregular_table, _is_irregular)
+        edges = _lookup(edges, lower, _lower_code)
+    candidate = edges[:len(rows)] == edges[len(rows):]
+    if irregular is not None:
+        candidate |= irregular[:len(rows)] | irregular[len(rows):]
+
+    # Rows with nothing left after dropping spaces are palindromes
+    results = (lengths == 0).tolist()
+    for row in rows[candidate].tolist():
+        results[row] = tool(texts[row])
+    return results
+
+
+_KERNELS = dict.fromkeys(_CLASS_WEIGHTS, _count_class)
+_KERNELS.update({
+    'count_spaces': _count_spaces,
+    'count_characters': _count_characters,
+    'count_words': _count_words,
+    'is_palindrome': _is_palindrome,
+})
+
+
+def _map_chunk(function_name: str, texts: Sequence[str], args: tuple, kwargs: Dict[str, Any]) -> List[Any]:
+    """Apply a string tool to one chunk of rows."""
+    function = STRING_FUNCTIONS[function_name]
+    bound = inspect.signature(function).bind('', *args, **kwargs)
+    bound.apply_defaults()
+    options = dict(list(bound.arguments.items())[1:])
+
+    def tool(text: str) -> Any:
+        return function(text, *args, **kwargs)
+
+    kernel = _KERNELS.get(function_name)
+    if kernel is None:
+        return [tool(text) for text in texts]
+    return kernel(texts, tool, function_name, options)
+
+
+def map_string_function(function_name: str, texts: Sequence[str], *args,
+                        processes: int = 0, pool: Optional[Executor] = None,
+                        chunk_size: int = CHUNK_SIZE, **kwargs) -> List[Any]:
+    """
+    Apply a string tool to every string in a sequence.
+
+    Results are the same, in the same order, as calling the tool on each
+    string, but without one dispatcher call per row.
+
+    Args:
+        function_name: Name of a string tool (see STRING_FUNCTIONS)
+        texts: The strings to process
+        *args: Further positional arguments for the tool (same for every row)
+        processes: Spread chunks over this many worker processes (0 runs in this process)
+        pool: An existing executor to use instead of starting processes
+        chunk_size: Rows per vectorized chunk and per pool task
+        **kwargs: Keyword arguments for the tool (same for every row)
+
+    Returns:
+        A list with one result per string
+
+    Raises:
+        ValueError: If function name is not found
+        TypeError: If the arguments do not fit the tool
+    """
+    if function_name not in STRING_FUNCTIONS:
+        available = ', '.join(STRING_FUNCTIONS)
+        raise ValueError(f"Function '{function_name}' not found. Available functions: {available}")
+    inspect.signature(STRING_FUNCTIONS[function_name]).bind('', *args, **kwargs)
+
+    if not isinstance(texts, (list, tuple)):
+        texts = list(texts)
+    chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+
+    if pool is None and processes > 1 and len(chunks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(processes) as own_pool:
+            return map_string_function(function_name, texts, *args, pool=own_pool,
+                                       chunk_size=chunk_size, **kwargs)
+
+    if pool is not None and len(chunks) > 1:
+        futures = [pool.submit(_map_chunk, function_name, chunk, args, kwargs) for chunk in chunks]
+        parts = [future.result() for future in futures]
+    else:
+        parts = [_map_chunk(function_name, chunk, args, kwargs) for chunk in chunks]
+
+    results: List[Any] = []
+    for part in parts:
+        results.extend(part)
+    return results
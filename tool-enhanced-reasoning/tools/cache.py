@@ -0,0 +1,228 @@
+"""
+Result cache for the tool dispatchers.
+Memoizes calls to pure tools so repeated TOOL_CALLs skip recomputation.
+The cache is opt-in: call enable_result_cache() to turn it on.
+"""
+
+import copy
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+# Container results are copied on the way out so callers cannot mutate cached values
+_MUTABLE_RESULT_TYPES = (list, dict, set)
+
+_SCALAR_TYPES = (bool, int, float, complex, str, bytes, type(None))
+
+# Strings and bytes longer than this are keyed by their length and a digest,
+# so a cached call on a multi-megabyte text does not keep the text alive
+KEY_DIGEST_MIN_LENGTH = 256
+
+
+def _digest(value: Any) -> tuple:
+    """Return (length, BLAKE2b digest) of a str or bytes value."""
+    data = value.encode('utf-8', 'surrogatepass') if isinstance(value, str) else value
+    return (len(value), hashlib.blake2b(data, digest_size=32).digest())
+
+
+def _freeze(value: Any) -> Hashable:
+    """
+    Convert an argument into a hashable key component.
+
+    Each value is tagged with its type so that 1, 1.0 and True do not share
+    a cache entry. Lists, tuples, dicts and sets are frozen recursively.
+    Long strings and bytes are replaced by their length and digest.
+
+    Raises:
+        TypeError: If the value cannot be used as part of a cache key
+    """
+    value_type = type(value)
+    if value_type in (str, bytes) and len(value) > KEY_DIGEST_MIN_LENGTH:
+        return (value_type, _digest(value))
+    if value_type in _SCALAR_TYPES:
+        return (value_type, value)
+    if value_type in (list, tuple):
+        return (value_type, tuple(_freeze(item) for item in value))
+    if value_type is dict:
+        return (dict, tuple((_freeze(k), _freeze(v)) for k, v in value.items()))
+    if value_type in (set, frozenset):
+        return (value_type, frozenset(_freeze(item) for item in value))
+    raise TypeError(f"Cannot build a cache key from {value_type.__name__}")
+
+
+def make_key(namespace: str, function_name: str, args: tuple, kwargs: Dict[str, Any]) -> Hashable:
+    """Build a cache key for a tool call, including unhashable arguments such as lists."""
+    return (
+        namespace,
+        function_name,
+        tuple(_freeze(arg) for arg in args),
+        tuple(sorted((name, _freeze(value)) for name, value in kwargs.items()))
+    )
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimate the memory footprint of a result in bytes.
+
+    Integers are sized from their bit length rather than converted to a
+    string, so huge results such as factorial(100000) are cheap to measure.
+    Classes (the type tags in cache keys) are shared and count as nothing.
+    """
+    if isinstance(value, type):
+        return 0
+    if isinstance(value, int) and not isinstance(value, bool):
+        return 28 + value.bit_length() // 8
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k) + estimate_size(v) for k, v in value.items()
+        )
+    return sys.getsizeof(value)
+
+
+class ToolResultCache:
+    """
+    Thread-safe LRU cache of tool results.
+
+    Memory is bounded by the number of entries, the size of a single entry
+    and the total size of all entries; an entry's size counts its key (the
+    frozen arguments) as well as its result. Entries larger than
+    max_result_size are returned but not stored.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_result_size: int = 1_000_000,
+                 max_total_size: int = 64_000_000):
+        """
+        Create a tool result cache.
+
+        Args:
+            max_entries: Maximum number of cached results
+            max_result_size: Largest single entry, key plus result (estimated
+                bytes), that is cached
+            max_total_size: Maximum estimated bytes across all cached entries
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.max_entries = max_entries
+        self.max_result_size = max_result_size
+        self.max_total_size = max_total_size
+
+        self._entries = OrderedDict()
+        self._total_size = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._uncacheable = 0
+        self._function_stats: Dict[str, Dict[str, int]] = {}
+
+    def _record(self, name: str, outcome: str):
+        """Update the per-function counters (caller holds the lock)."""
+        counters = self._function_stats.setdefault(name, {'hits': 0, 'misses': 0})
+        counters[outcome] += 1
+
+    def call(self, namespace: str, function_name: str, func: Callable,
+             args: tuple, kwargs: Dict[str, Any]) -> Any:
+        """
+        Return the cached result of func(*args, **kwargs), computing it on a miss.
+
+        Calls whose arguments cannot be frozen into a key are executed
+        directly. Exceptions are never cached.
+        """
+        try:
+            key = make_key(namespace, function_name, args, kwargs)
+        except TypeError:
+            with self._lock:
+                self._uncacheable += 1
+            return func(*args, **kwargs)
+
+        qualified_name = f"{namespace}.{function_name}"
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                self._record(qualified_name, 'hits')
+                result = entry[0]
+            else:
+                self._misses += 1
+                self._record(qualified_name, 'misses')
+
+        if entry is not None:
+            return copy.copy(result) if isinstance(result, _MUTABLE_RESULT_TYPES) else result
+
+        result = func(*args, **kwargs)
+        size = estimate_size(key) + estimate_size(result)
+        if size <= self.max_result_size:
+            stored = copy.copy(result) if isinstance(result, _MUTABLE_RESULT_TYPES) else result
+            self._store(key, stored, size)
+        return result
+
+    def _store(self, key: Hashable, result: Any, size: int):
+        """Insert a result and evict least recently used entries over the limits."""
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_size -= previous[1]
+            self._entries[key] = (result, size)
+            self._total_size += size
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self._total_size > self.max_total_size):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._total_size -= evicted_size
+
+    def clear(self):
+        """Remove all cached results and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._total_size = 0
+            self._hits = 0
+            self._misses = 0
+            self._uncacheable = 0
+            self._function_stats = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters overall and per function."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            by_function = {}
+            for name, counters in self._function_stats.items():
+                total = counters['hits'] + counters['misses']
+                by_function[name] = dict(counters, hit_rate=counters['hits'] / total if total else 0.0)
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'uncacheable': self._uncacheable,
+                'entries': len(self._entries),
+                'size': self._total_size,
+                'by_function': by_function
+            }
+
+
+# The shared cache used by call_math_function and call_string_function
+_result_cache: Optional[ToolResultCache] = None
+
+
+def enable_result_cache(max_entries: int = 1024, max_result_size: int = 1_000_000,
+                        max_total_size: int = 64_000_000) -> ToolResultCache:
+    """Turn on memoization for the tool dispatchers and return the cache."""
+    global _result_cache
+    _result_cache = ToolResultCache(max_entries, max_result_size, max_total_size)
+    return _result_cache
+
+
+def disable_result_cache():
+    """Turn off memoization for the tool dispatchers."""
+    global _result_cache
+    _result_cache = None
+
+
+def get_result_cache() -> Optional[ToolResultCache]:
+    """Return the active tool result cache, or None if memoization is off."""
+    return _result_cache
@@ -0,0 +1,487 @@
+"""
+Chunked input for the string tools.
+Lets every string tool analyse a file (a path or an mmap) or an iterator of
+text chunks with bounded memory. Results are identical to calling the tool
+on the whole text at once.
+
+Chunks are re-aligned so that every chunk ends at whitespace. Words and
+numbers never span two aligned chunks, and str.lower() (whose final-sigma
+rule looks at neighbouring letters) gives the same result per chunk as on
+the whole text. A run without whitespace longer than MAX_CARRY is cut
+anyway, between two ASCII letters or digits (which leaves str.lower()
+unchanged), and the word and number functions join the pieces of the word
+it splits. Substring counts carry a short tail from one chunk to the
+next, and palindrome checks compare a forward and a backward stream.
+"""
+
+import codecs
+import functools
+import mmap
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .text_profile import TextProfile
+
+
+# Characters decoded per chunk
+CHUNK_SIZE = 1 << 20
+
+# Files are read as UTF-8
+ENCODING = 'utf-8'
+
+# Longest run without whitespace held back before a chunk is cut inside a word
+MAX_CARRY = CHUNK_SIZE
+
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+_NUMBER_RE = re.compile(r'\d+\.?\d*')
+_NUMBER_TAIL_RE = re.compile(r'[\d.]*\Z')
+_SPACE_RE = re.compile(r'\s')
+_LAST_SPACE_RE = re.compile(r'\s(?=\S*\Z)')
+# A cut between two ASCII letters or digits keeps the final-sigma rule of str.lower() intact
+_SAFE_PAIR_RE = re.compile(r'[0-9A-Za-z]{2}')
+# Characters searched at a time for a safe cut, from the end of a run
+_SAFE_CUT_WINDOW = 256
+
+
+def is_text_source(value: Any) -> bool:
+    """True for inputs handled here: paths, mmaps and iterables of text chunks (not str)."""
+    if isinstance(value, (str, bytes, bytearray, dict)):
+        return False
+    return isinstance(value, (os.PathLike, mmap.mmap)) or hasattr(value, '__iter__')
+
+
+def _decode_blocks(blocks: Iterable[bytes], errors: str = 'strict') -> Iterator[str]:
+    """Decode UTF-8 blocks whose boundaries may split a character."""
+    decoder = codecs.getincrementaldecoder(ENCODING)(errors)
+    for block in blocks:
+        text = decoder.decode(block)
+        if text:
+            yield text
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+
+def _file_blocks(path, block_size: int) -> Iterator[bytes]:
+    # Plain buffered reads rather than mmap: mapped pages count towards the
+    # process's RSS, reads keep memory flat however large the file is
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                return
+            yield block
+
+
+def _buffer_blocks(buffer, block_size: int) -> Iterator[bytes]:
+    for start in range(0, len(buffer), block_size):
+        yield buffer[start:start + block_size]
+
+
+def iter_chunks(source: Any, chunk_size: int = CHUNK_SIZE, errors: str = 'strict') -> Iterator[str]:
+    """Yield the text of a path, mmap or chunk iterator as str chunks."""
+    if isinstance(source, os.PathLike):
+        yield from _decode_blocks(_file_blocks(source, chunk_size), errors)
+    elif isinstance(source, mmap.mmap):
+        yield from _decode_blocks(_buffer_blocks(source, chunk_size), errors)
+    else:
+        for chunk in source:
+            if not isinstance(chunk, str):
+                raise TypeError(f"Text chunks must be strings, got {type(chunk).__name__}")
+            if chunk:
+                yield chunk
+
+
+def _last_space(chunk: str) -> int:
+    """Index just after the last whitespace character, or 0 if there is none."""
+    match = _LAST_SPACE_RE.search(chunk)
+    return match.end() if match else 0
+
+
+def _first_space(chunk: str) -> int:
+    """Index of the first whitespace character, or len(chunk) if there is none."""
+    match = _SPACE_RE.search(chunk)
+    return match.start() if match else len(chunk)
+
+
+def _forced_cut(run: str, backward: bool = False) -> int:
+    """
+    Where to cut a run without whitespace: as near its end (its start when
+    reading backward) as possible, between two ASCII letters or digits.
+    Runs without such a pair are not cut (the whole run is returned).
+    """
+    if backward:
+        match = _SAFE_PAIR_RE.search(run)
+        return match.start() + 1 if match else 0
+    end = len(run)
+    while end > 1:
+        start = max(0, end - _SAFE_CUT_WINDOW)
+        # The first pair in the reversed window is the last one in the run
+        match = _SAFE_PAIR_RE.search(run[start:end][::-1])
+        if match:
+            return end - 1 - match.start()
+        # Overlap by one character so pairs across windows are found
+        end = start + 1
+    return len(run)
+
+
+def _iter_aligned_pieces(chunks: Iterable[str], max_carry: int = MAX_CARRY) -> Iterator[Tuple[str, bool]]:
+    """
+    Re-chunk text so every chunk but the last ends with whitespace.
+
+    Yields (chunk, in_word) pairs: in_word is True for a chunk cut inside a
+    run without whitespace longer than max_carry, whose last word continues
+    in the next chunk.
+    """
+    run: List[str] = []
+    run_length = 0
+    for chunk in chunks:
+        # The run held back has no whitespace, so only the new chunk is searched
+        cut = _last_space(chunk)
+        if cut:
+            run.append(chunk[:cut])
+            yield ''.join(run), False
+            run = [chunk[cut:]]
+            run_length = len(chunk) - cut
+        else:
+            run.append(chunk)
+            run_length += len(chunk)
+            if run_length > max_carry:
+                text = ''.join(run)
+                cut = _forced_cut(text)
+                yield text[:cut], True
+                run = [text[cut:]]
+                run_length = len(text) - cut
+    if run_length:
+        yield ''.join(run), False
+
+
+def iter_aligned(chunks: Iterable[str], max_carry: int = MAX_CARRY) -> Iterator[str]:
+    """Re-chunk text so every chunk but the last ends with whitespace (see _iter_aligned_pieces)."""
+    for chunk, _ in _iter_aligned_pieces(chunks, max_carry):
+        yield chunk
+
+
+def iter_aligned_backward(chunks: Iterable[str], max_carry: int = MAX_CARRY) -> Iterator[str]:
+    """Re-chunk text read back to front so every chunk but the last starts with whitespace."""
+    # Pieces of the run held back, in reading (back to front) order
+    run: List[str] = []
+    run_length = 0
+    for chunk in chunks:
+        cut = _first_space(chunk)
+        if cut < len(chunk):
+            run.append(chunk[cut:])
+            yield ''.join(reversed(run))
+            run = [chunk[:cut]]
+            run_length = cut
+        else:
+            run.append(chunk)
+            run_length += len(chunk)
+            if run_length > max_carry:
+                text = ''.join(reversed(run))
+                cut = _forced_cut(text, backward=True)
+                yield text[cut:]
+                run = [text[:cut]]
+                run_length = cut
+    if run_length:
+        yield ''.join(reversed(run))
+
+
+def _aligned(source: Any) -> Iterator[str]:
+    return iter_aligned(iter_chunks(source))
+
+
+def _word_lists(source: Any) -> Iterator[List[str]]:
+    """Yield the words of each aligned chunk, joining a word split by a forced cut."""
+    fragment = ''
+    for chunk, in_word in _iter_aligned_pieces(iter_chunks(source)):
+        words = chunk.split()
+        if fragment:
+            if words and not chunk[0].isspace():
+                words[0] = fragment + words[0]
+            else:
+                words.insert(0, fragment)
+            fragment = ''
+        if in_word and words:
+            fragment = words.pop()
+        yield words
+    if fragment:
+        yield [fragment]
+
+
+# --- Backward reading (for is_palindrome) ---
+
+def _backward_blocks(read_range: Callable[[int, int], bytes], size: int, block_size: int) -> Iterator[bytes]:
+    """Yield UTF-8 blocks from the end of a byte source, each starting on a character boundary."""
+    end = size
+    pending = b''
+    while end > 0:
+        start = max(0, end - block_size)
+        block = read_range(start, end) + pending
+        end = start
+        boundary = 0
+        if start > 0:
+            # Leading continuation bytes belong to a character in the previous block
+            while boundary < len(block) and 0x80 <= block[boundary] < 0xC0:
+                boundary += 1
+        pending, block = block[:boundary], block[boundary:]
+        if block:
+            yield block
+    if pending:
+        yield pending
+
+
+def _iter_backward_chunks(path_or_buffer, block_size: int, errors: str) -> Iterator[str]:
+    """Yield the text of a file or mmap from the end, chunk by chunk (each chunk in normal order)."""
+    if isinstance(path_or_buffer, mmap.mmap):
+        buffer = path_or_buffer
+        for block in _backward_blocks(lambda start, end: buffer[start:end], len(buffer), block_size):
+            yield block.decode(ENCODING, errors)
+        return
+
+    with open(path_or_buffer, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+
+        def read_range(start: int, end: int) -> bytes:
+            f.seek(start)
+            return f.read(end - start)
+
+        for block in _backward_blocks(read_range, size, block_size):
+            yield block.decode(ENCODING, errors)
+
+
+def _streams_equal(first: Iterable[str], second: Iterable[str]) -> bool:
+    """Compare two chunked character streams without joining them."""
+    first_iter, second_iter = iter(first), iter(second)
+    a = b = ''
+    while True:
+        if not a:
+            a = next(first_iter, None)
+        if not b:
+            b = next(second_iter, None)
+        if a is None or b is None:
+            if a is None and b is None:
+                return True
+            # One stream ended; the other must have nothing left either
+            rest = b if a is None else a
+            other = second_iter if a is None else first_iter
+            return not rest and not any(other)
+        n = min(len(a), len(b))
+        if a[:n] != b[:n]:
+            return False
+        a, b = a[n:], b[n:]
+
+
+# --- Streaming implementations, named after the string tools ---
+
+def _profiles(source: Any) -> Iterator[TextProfile]:
+    for chunk in _aligned(source):
+        yield TextProfile(chunk)
+
+
+def count_vowels(source: Any, case_sensitive: bool = False) -> int:
+    return sum(profile.vowels(case_sensitive) for profile in _profiles(source))
+
+
+def count_consonants(source: Any, case_sensitive: bool = False) -> int:
+    return sum(profile.consonants(case_sensitive) for profile in _profiles(source))
+
+
+def count_letters(source: Any) -> int:
+    return sum(profile.letters for profile in _profiles(source))
+
+
+def count_words(source: Any) -> int:
+    total = 0
+    continued = False
+    for chunk, in_word in _iter_aligned_pieces(iter_chunks(source)):
+        total += len(chunk.split())
+        # The first word finishes a word already counted
+        if continued and chunk and not chunk[0].isspace():
+            total -= 1
+        continued = in_word
+    return total
+
+
+def count_characters(source: Any, include_spaces: bool = True) -> int:
+    total = 0
+    for chunk in iter_chunks(source):
+        total += len(chunk) if include_spaces else len(chunk) - chunk.count(' ')
+    return total
+
+
+def count_digits(source: Any) -> int:
+    return sum(profile.digits for profile in _profiles(source))
+
+
+def count_uppercase(source: Any) -> int:
+    return sum(profile.uppercase for profile in _profiles(source))
+
+
+def count_lowercase(source: Any) -> int:
+    return sum(profile.lowercase for profile in _profiles(source))
+
+
+def count_special_characters(source: Any) -> int:
+    return sum(profile.special_characters for profile in _profiles(source))
+
+
+def count_spaces(source: Any) -> int:
+    return sum(chunk.count(' ') for chunk in iter_chunks(source))
+
+
+def find_longest_word(source: Any) -> str:
+    best = ""
+    for words in _word_lists(source):
+        if words:
+            candidate = max(words, key=len)
+            # Strictly longer, so the first of equally long words wins
+            if len(candidate) > len(best):
+                best = candidate
+    return best
+
+
+def find_shortest_word(source: Any) -> str:
+    best: Optional[str] = None
+    for words in _word_lists(source):
+        if words:
+            candidate = min(words, key=len)
+            if best is None or len(candidate) < len(best):
+                best = candidate
+    return best if best is not None else ""
+
+
+def get_word_lengths(source: Any) -> List[int]:
+    lengths: List[int] = []
+    continued = False
+    for chunk, in_word in _iter_aligned_pieces(iter_chunks(source)):
+        words = chunk.split()
+        if continued and words and not chunk[0].isspace():
+            lengths[-1] += len(words.pop(0))
+        lengths.extend(map(len, words))
+        continued = in_word
+    return lengths
+
+
+def count_substring(source: Any, substring: str, case_sensitive: bool = False) -> int:
+    """Non-overlapping occurrences, counted exactly as str.count would on the whole text."""
+    if not case_sensitive:
+        substring = substring.lower()
+    chunks = _aligned(source)
+    if not case_sensitive:
+        chunks = (chunk.lower() for chunk in chunks)
+
+    if not substring:
+        return sum(len(chunk) for chunk in chunks) + 1
+
+    keep = len(substring) - 1
+    total = 0
+    carry = ''
+    for chunk in chunks:
+        buffer = carry + chunk
+        parts = buffer.split(substring)
+        total += len(parts) - 1
+        # Only the text after the last match, and at most len(substring) - 1
+        # characters of it, can start a match that continues in the next chunk
+        tail = parts[-1]
+        carry = tail[len(tail) - keep:] if len(tail) > keep else tail
+    return total
+
+
+def count_specific_character(source: Any, character: str, case_sensitive: bool = False) -> int:
+    return count_substring(source, character, case_sensitive)
+
+
+def reverse_string(source: Any) -> str:
+    # The result is as large as the input, so it is built in memory
+    return ''.join(chunk for chunk in iter_chunks(source))[::-1]
+
+
+def _spill(source: Any) -> str:
+    """Write a chunk iterator to a temporary UTF-8 file so it can be read backwards."""
+    with tempfile.NamedTemporaryFile('w', encoding=ENCODING, errors='surrogatepass',
+                                     suffix='.txt', delete=False) as f:
+        for chunk in iter_chunks(source):
+            f.write(chunk)
+        return f.name
+
+
+def is_palindrome(source: Any, ignore_case: bool = True, ignore_spaces: bool = True) -> bool:
+    def processed(chunks: Iterable[str], backward: bool) -> Iterator[str]:
+        for chunk in chunks:
+            if ignore_case:
+                chunk = chunk.lower()
+            if ignore_spaces:
+                chunk = chunk.replace(' ', '')
+            yield chunk[::-1] if backward else chunk
+
+    spilled = None
+    errors = 'strict'
+    if not isinstance(source, (os.PathLike, mmap.mmap)):
+        spilled = Path(_spill(source))
+        source = spilled
+        errors = 'surrogatepass'
+    try:
+        forward = iter_aligned(iter_chunks(source, errors=errors))
+        backward = iter_aligned_backward(_iter_backward_chunks(source, CHUNK_SIZE, errors))
+        return _streams_equal(processed(forward, False), processed(backward, True))
+    finally:
+        if spilled is not None:
+            spilled.unlink()
+
+
+def get_character_frequency(source: Any, case_sensitive: bool = False) -> Dict[str, int]:
+    frequency: Dict[str, int] = {}
+    for profile in _profiles(source):
+        counts = profile.character_frequency if case_sensitive else profile.lowercase_frequency
+        for char, count in counts.items():
+            frequency[char] = frequency.get(char, 0) + count
+    return frequency
+
+
+def get_vowel_consonant_ratio(source: Any) -> float:
+    vowel_count = consonant_count = 0
+    for profile in _profiles(source):
+        vowel_count += profile.vowels()
+        consonant_count += profile.consonants()
+    if consonant_count == 0:
+        return float('inf') if vowel_count > 0 else 0
+    return vowel_count / consonant_count
+
+
+def extract_numbers(source: Any) -> List[str]:
+    numbers: List[str] = []
+    tail = ''
+    for chunk, in_word in _iter_aligned_pieces(iter_chunks(source)):
+        text = tail + chunk
+        tail = ''
+        if in_word:
+            # A number at the cut may continue in the next chunk
+            split = _NUMBER_TAIL_RE.search(text).start()
+            text, tail = text[:split], text[split:]
+        numbers.extend(_NUMBER_RE.findall(text))
+    numbers.extend(_NUMBER_RE.findall(tail))
+    return numbers
+
+
+def remove_punctuation(source: Any) -> str:
+    # The result is as large as the input, so it is built in memory
+    return ''.join(_PUNCTUATION_RE.sub('', chunk) for chunk in iter_chunks(source))
+
+
+def accepts_text_source(streaming_function: Callable) -> Callable:
+    """
+    Decorator for a string tool: route paths, mmaps and chunk iterators to
+    its streaming implementation, and plain strings to the tool itself.
+    """
+    def decorate(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(text, *args, **kwargs):
+            if not isinstance(text, str) and is_text_source(text):
+                return streaming_function(text, *args, **kwargs)
+            return func(text, *args, **kwargs)
+        return wrapper
+    return decorate
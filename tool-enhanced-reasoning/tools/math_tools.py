@@ -3,8 +3,24 @@ Mathematical tools for the tool-enhanced reasoning script.
 These functions can be called by the LLM to perform mathematical operations.
 """
 
+import array
+import ast
+import functools
 import math
-from typing import Union, List
+import operator
+from typing import Any, Callable, Dict, FrozenSet, List, Tuple, Union
+from .cache import get_result_cache
+from .numpy_support import np
+
+
+# A list of numbers, a NumPy array, an array.array or a numeric memoryview
+NumberSeries = Union[List[Union[int, float]], Any]
+
+# Lists at least this long are handed to NumPy where that avoids a full sort
+NUMPY_MIN_SIZE = 2048
+
+# Range of integers NumPy holds exactly (int64)
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
 
 
 def add(a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
@@ -41,36 +57,96 @@ def square_root(number: Union[int, float]) -> float:
     return math.sqrt(number)
 
 
-def average(numbers: List[Union[int, float]]) -> float:
-    """Calculate the average of a list of numbers."""
-    if not numbers:
+def _as_array(numbers: NumberSeries, lists: bool = False):
+    """
+    Return a NumPy view of array-like input, or None to use the pure-Python path.
+
+    NumPy arrays are used as they are; array.array and memoryview objects
+    are wrapped without copying. Lists are only converted (which copies
+    them) when lists=True, they are large enough for vectorized code to
+    pay off, and NumPy holds their values exactly: all ints within int64,
+    or all floats.
+    """
+    if np is None:
+        return None
+    # Lists are checked first so that small ones never load NumPy
+    if isinstance(numbers, list):
+        if not lists or len(numbers) < NUMPY_MIN_SIZE:
+            return None
+        kinds = set(map(type, numbers))
+        if kinds == {int}:
+            if min(numbers) < INT64_MIN or max(numbers) > INT64_MAX:
+                return None
+            values = np.asarray(numbers, dtype=np.int64)
+        elif kinds == {float}:
+            values = np.asarray(numbers, dtype=np.float64)
+        else:
+            return None
+    elif isinstance(numbers, (array.array, memoryview)):
+        values = np.asarray(numbers)
+    elif isinstance(numbers, np.ndarray):
+        values = numbers
+    else:
+        return None
+    if values.dtype.kind not in 'biuf':
+        # e.g. object arrays of huge integers; keep exact Python arithmetic
+        return None
+    return values.ravel()
+
+
+def average(numbers: NumberSeries) -> float:
+    """Calculate the average of a list (or array/buffer) of numbers."""
+    if len(numbers) == 0:
         raise ValueError("Cannot calculate average of empty list")
+    values = _as_array(numbers)
+    if values is not None:
+        return values.mean(dtype=np.float64).item()
     return sum(numbers) / len(numbers)
 
 
-def median(numbers: List[Union[int, float]]) -> Union[int, float]:
-    """Calculate the median of a list of numbers."""
-    if not numbers:
+def median(numbers: NumberSeries) -> Union[int, float]:
+    """
+    Calculate the median of a list (or array/buffer) of numbers.
+
+    Large inputs use linear-time selection (np.partition) when NumPy is
+    installed; small lists are sorted, which is faster at that size.
+    """
+    if len(numbers) == 0:
         raise ValueError("Cannot calculate median of empty list")
+    n = len(numbers)
+    values = _as_array(numbers, lists=True)
+    if values is not None:
+        n = len(values)
+        if n % 2 == 0:
+            lower, upper = np.partition(values, [n//2 - 1, n//2])[n//2 - 1:n//2 + 1].tolist()
+            return (lower + upper) / 2
+        middle = np.argpartition(values, n//2)[n//2]
+        # The selected element itself, so an int median stays an int
+        return numbers[middle] if isinstance(numbers, list) else values[middle].item()
     sorted_numbers = sorted(numbers)
-    n = len(sorted_numbers)
     if n % 2 == 0:
         return (sorted_numbers[n//2 - 1] + sorted_numbers[n//2]) / 2
     else:
         return sorted_numbers[n//2]
 
 
-def maximum(numbers: List[Union[int, float]]) -> Union[int, float]:
-    """Find the maximum value in a list of numbers."""
-    if not numbers:
+def maximum(numbers: NumberSeries) -> Union[int, float]:
+    """Find the maximum value in a list (or array/buffer) of numbers."""
+    if len(numbers) == 0:
         raise ValueError("Cannot find maximum of empty list")
+    values = _as_array(numbers)
+    if values is not None:
+        return values.max().item()
     return max(numbers)
 
 
-def minimum(numbers: List[Union[int, float]]) -> Union[int, float]:
-    """Find the minimum value in a list of numbers."""
-    if not numbers:
+def minimum(numbers: NumberSeries) -> Union[int, float]:
+    """Find the minimum value in a list (or array/buffer) of numbers."""
+    if len(numbers) == 0:
         raise ValueError("Cannot find minimum of empty list")
+    values = _as_array(numbers)
+    if values is not None:
+        return values.min().item()
     return min(numbers)
 
 
@@ -98,6 +174,333 @@ def round_number(number: Union[int, float], decimals: int = 0) -> Union[int, flo
     return round(number, decimals)
 
 
+# Limits of evaluate_expression: source length, syntax tree size, and the
+# size in bits of an integer power
+EXPRESSION_MAX_LENGTH = 1000
+EXPRESSION_MAX_NODES = 300
+EXPRESSION_MAX_POWER_BITS = 100_000
+
+# Compiled expressions kept in the LRU cache
+EXPRESSION_CACHE_SIZE = 256
+
+# Named constants an expression may use
+EXPRESSION_CONSTANTS = {'pi': math.pi, 'e': math.e, 'tau': math.tau}
+
+# Other common names of the math tools
+EXPRESSION_ALIASES = {'sqrt': 'square_root', 'abs': 'absolute_value', 'round': 'round_number',
+                      'pow': 'power', 'mean': 'average', 'avg': 'average'}
+
+
+def _checked_power(base, exponent):
+    """base ** exponent, refusing integer results too large to compute in reasonable time."""
+    if (isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and abs(base) > 1
+            and exponent * (abs(base).bit_length() - 1) > EXPRESSION_MAX_POWER_BITS):
+        raise ValueError(f"{base} ** {exponent} is too large")
+    if base != base or exponent != exponent:
+        # nan marks a failed row; do not let nan ** 0 turn it back into 1
+        return math.nan
+    result = base ** exponent
+    if isinstance(result, complex):
+        raise ValueError(f"{base} ** {exponent} is not a real number")
+    return result
+
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _checked_power,
+}
+
+_UNARY_OPERATORS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+
+def _operand(value: Any) -> Any:
+    """Refuse arithmetic on lists and text (e.g. [0] * 10**9)."""
+    if value is None or isinstance(value, (bool, str, bytes, list, tuple, dict, set)):
+        raise TypeError(f"Arithmetic needs numbers, got {type(value).__name__}")
+    return value
+
+
+def _nan_where_zero(divide: Callable) -> Callable:
+    """Elementwise division that gives nan (not inf) for a zero divisor, like a failed row."""
+    def vector_divide(a, b):
+        return np.where(np.asarray(b) == 0, np.nan, divide(a, b))
+    return vector_divide
+
+
+def _vector_power(base, exponent):
+    """Elementwise power with nan where _checked_power would give nan or fail (e.g. 0 ** -1, overflow)."""
+    base, exponent = np.asarray(base), np.asarray(exponent)
+    result = np.power(base, exponent)
+    failed = np.isnan(base) | np.isnan(exponent) | (~np.isfinite(result) & np.isfinite(base) & np.isfinite(exponent))
+    return np.where(failed, np.nan, result)
+
+
+def _vector_operators() -> Dict[type, Callable]:
+    return {
+        **_BINARY_OPERATORS,
+        ast.Pow: _vector_power,
+        ast.Div: _nan_where_zero(np.true_divide),
+        ast.FloorDiv: _nan_where_zero(np.floor_divide),
+        ast.Mod: _nan_where_zero(np.mod),
+    }
+
+
+def _vector_functions() -> Dict[str, Callable]:
+    """Elementwise NumPy versions of the math tools that have one."""
+    divide = _nan_where_zero(np.true_divide)
+    return {
+        'add': np.add,
+        'subtract': np.subtract,
+        'multiply': np.multiply,
+        'divide': divide,
+        'power': _vector_power,
+        'square_root': np.sqrt,
+        'absolute_value': np.abs,
+        'percentage': lambda part, whole: divide(part, whole) * 100,
+        'round_number': np.round,
+    }
+
+
+# The math tools with an elementwise version (the keys of _vector_functions)
+ELEMENTWISE_FUNCTIONS = frozenset({'add', 'subtract', 'multiply', 'divide', 'power', 'square_root',
+                                   'absolute_value', 'percentage', 'round_number'})
+
+# Integers up to this magnitude are exact in float64
+FLOAT64_EXACT_INT = 2 ** 53
+
+
+def _is_elementwise(tree: ast.AST) -> bool:
+    """Tell whether an expression gives one number per row using only arithmetic and elementwise tools."""
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.List, ast.Tuple)):
+            return False
+        if isinstance(node, ast.Call):
+            target = node.func
+            function_name = target.attr if isinstance(target, ast.Attribute) else getattr(target, 'id', None)
+            if EXPRESSION_ALIASES.get(function_name, function_name) not in ELEMENTWISE_FUNCTIONS:
+                return False
+    return True
+
+
+def _fits_float64(values: NumberSeries) -> bool:
+    """Tell whether every value of a column is a float or an integer float64 holds exactly."""
+    if np is not None and isinstance(values, np.ndarray):
+        if values.ndim != 1:
+            return False
+        if values.dtype.kind == 'f':
+            return values.dtype.itemsize <= 8
+        if values.dtype.kind in 'iu':
+            return values.size == 0 or (int(values.min()) >= -FLOAT64_EXACT_INT
+                                        and int(values.max()) <= FLOAT64_EXACT_INT)
+        return False
+    return all(isinstance(value, float)
+               or (isinstance(value, int) and not isinstance(value, bool) and abs(value) <= FLOAT64_EXACT_INT)
+               for value in values)
+
+
+def _row_result(value: Any, as_float: bool) -> Any:
+    """A row result, with nan for complex, infinite or (when as_float) non-float results."""
+    if isinstance(value, complex):
+        return math.nan
+    if as_float or isinstance(value, float):
+        try:
+            value = float(value)
+        except (TypeError, OverflowError):
+            return math.nan
+        return value if math.isfinite(value) else math.nan
+    return value
+
+
+def _compile_node(node: ast.AST, operators: Dict[type, Callable], functions: Dict[str, Callable],
+                  names: set) -> Callable[[Dict[str, Any]], Any]:
+    """Turn a syntax tree node into a closure that evaluates it against variable bindings."""
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"Unsupported value in expression: {value!r}")
+        return lambda env: value
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        constant = EXPRESSION_CONSTANTS.get(name)
+        if constant is None:
+            names.add(name)
+
+        def lookup(env):
+            value = env.get(name, constant)
+            if value is None:
+                raise ValueError(f"Unknown variable '{name}' in expression")
+            return value
+        return lookup
+
+    if isinstance(node, ast.BinOp) and type(node.op) in operators:
+        apply = operators[type(node.op)]
+        left = _compile_node(node.left, operators, functions, names)
+        right = _compile_node(node.right, operators, functions, names)
+        return lambda env: apply(_operand(left(env)), _operand(right(env)))
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        apply = _UNARY_OPERATORS[type(node.op)]
+        operand = _compile_node(node.operand, operators, functions, names)
+        return lambda env: apply(_operand(operand(env)))
+
+    if isinstance(node, (ast.List, ast.Tuple)):
+        items = [_compile_node(item, operators, functions, names) for item in node.elts]
+        return lambda env: [item(env) for item in items]
+
+    if isinstance(node, ast.Call):
+        target = node.func
+        if isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name) and target.value.id == 'math':
+            function_name = target.attr
+        elif isinstance(target, ast.Name):
+            function_name = target.id
+        else:
+            raise ValueError("Only math tools can be called in an expression")
+        function_name = EXPRESSION_ALIASES.get(function_name, function_name)
+        if function_name not in MATH_FUNCTIONS or function_name == 'evaluate_expression':
+            raise ValueError(f"Unknown function '{function_name}' in expression")
+        function = functions[function_name]
+        if any(keyword.arg is None for keyword in node.keywords):
+            raise ValueError("Unsupported syntax in expression: **")
+        args = [_compile_node(arg, operators, functions, names) for arg in node.args]
+        kwargs = {keyword.arg: _compile_node(keyword.value, operators, functions, names) for keyword in node.keywords}
+        return lambda env: function(*[arg(env) for arg in args], **{key: value(env) for key, value in kwargs.items()})
+
+    raise ValueError(f"Unsupported syntax in expression: {type(node).__name__}")
+
+
+@functools.lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def _compile_expression(expression: str, vector: bool = False
+                        ) -> Tuple[Callable[[Dict[str, Any]], Any], FrozenSet[str], bool]:
+    """
+    Parse and compile an expression once; later calls with the same text are cache hits.
+
+    Returns the evaluator, the variable names it uses and whether the
+    expression is elementwise (see _is_elementwise). vector compiles
+    the NumPy version, for elementwise expressions only.
+    """
+    if len(expression) > EXPRESSION_MAX_LENGTH:
+        raise ValueError(f"Expression is longer than {EXPRESSION_MAX_LENGTH} characters")
+    try:
+        # In arithmetic "2 ^ 10" is a power; expressions hold no strings, so
+        # the text can be rewritten before parsing (keeping ** precedence)
+        tree = ast.parse(expression.strip().replace('^', '**'), mode='eval')
+    except (SyntaxError, RecursionError):
+        raise ValueError(f"Invalid expression: {expression}") from None
+    if sum(1 for _ in ast.walk(tree)) > EXPRESSION_MAX_NODES:
+        raise ValueError("Expression is too complex")
+
+    names = set()
+    if vector:
+        evaluate = _compile_node(tree.body, _vector_operators(), _vector_functions(), names)
+    else:
+        # power() and pow() calls get the same size check as **
+        evaluate = _compile_node(tree.body, _BINARY_OPERATORS, dict(MATH_FUNCTIONS, power=_checked_power), names)
+    return evaluate, frozenset(names), _is_elementwise(tree.body)
+
+
+def evaluate_expression(expression: str) -> Union[int, float]:
+    """
+    Evaluate an arithmetic expression, e.g. "(15 + 27) * 3 - square_root(16)".
+
+    Supports numbers, + - * / // % and ** (or ^), parentheses, the
+    constants pi, e and tau, and calls to the other math tools (e.g.
+    average([4, 8, 15])). The expression is parsed into a syntax tree and
+    only these constructs are evaluated; nothing is passed to eval().
+    Compiled expressions are cached, so repeated expressions skip parsing.
+    Variables are supported by evaluate_expression_batch.
+
+    Raises:
+        ValueError: If the expression is invalid, uses an unknown name,
+            passes a tool arguments it does not accept, divides by zero,
+            or has a result that is too large or not a real number
+    """
+    evaluate, _, _ = _compile_expression(expression)
+    try:
+        result = evaluate({})
+    except ZeroDivisionError:
+        raise ValueError("Cannot divide by zero") from None
+    except OverflowError:
+        raise ValueError("Result is too large") from None
+    except TypeError as e:
+        # e.g. factorial(2.5), or a tool given the wrong number of arguments
+        raise ValueError(f"Invalid arguments in expression: {e}") from None
+    if isinstance(result, bool) or not isinstance(result, (int, float)):
+        raise ValueError(f"Expression does not evaluate to a real number: {expression}")
+    if math.isinf(result):
+        raise ValueError("Result is too large")
+    if math.isnan(result):
+        raise ValueError(f"Expression has no defined result: {expression}")
+    return result
+
+
+def evaluate_expression_batch(expression: str, columns: Dict[str, NumberSeries]) -> List[Union[int, float]]:
+    """
+    Evaluate one expression for every row of a set of variable columns.
+
+    Expressions using only arithmetic and elementwise tools (add,
+    subtract, multiply, divide, power, square_root, absolute_value,
+    percentage, round_number) over columns of floats, or of integers
+    within +/-2**53, give float64 results; with NumPy installed they are
+    evaluated once over whole arrays. Other expressions and columns are
+    evaluated row by row with the compiled evaluator, so integer results
+    stay exact. Rows with no defined real result (division by zero,
+    square root of a negative number, overflow) are nan.
+
+    Args:
+        expression: The expression (see evaluate_expression), using
+            variable names, e.g. "price * quantity * (1 - discount)"
+        columns: Variable name -> values, all of the same length
+
+    Returns:
+        One result per row
+
+    Raises:
+        ValueError: If the expression is invalid, a variable has no column,
+            or the columns differ in length
+    """
+    if not columns:
+        raise ValueError("At least one column of variable values is required")
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("All columns must have the same length")
+    rows = lengths.pop()
+
+    evaluate, names, elementwise = _compile_expression(expression)
+    missing = names - set(columns)
+    if missing:
+        raise ValueError(f"No values for variable(s): {', '.join(sorted(missing))}")
+
+    as_float = elementwise and all(_fits_float64(values) for values in columns.values())
+    if as_float and np is not None:
+        vector_evaluate = _compile_expression(expression, vector=True)[0]
+        arrays = {name: np.asarray(values, dtype=np.float64) for name, values in columns.items()}
+        try:
+            with np.errstate(all='ignore'):
+                result = np.asarray(vector_evaluate(arrays), dtype=np.float64)
+        except (TypeError, ValueError):
+            # e.g. round_number with a column of decimals
+            result = None
+        if result is not None and result.shape in ((), (rows,)):
+            result = np.broadcast_to(result, (rows,))
+            return np.where(np.isfinite(result), result, np.nan).tolist()
+
+    results = []
+    column_names = list(columns)
+    for row in zip(*columns.values()):
+        try:
+            value = evaluate(dict(zip(column_names, row)))
+        except (ArithmeticError, TypeError, ValueError):
+            value = math.nan
+        results.append(_row_result(value, as_float))
+    return results
+
+
 # Dictionary mapping function names to actual functions for easy lookup
 MATH_FUNCTIONS = {
     'add': add,
@@ -113,10 +516,15 @@ MATH_FUNCTIONS = {
     'absolute_value': absolute_value,
     'factorial': factorial,
     'percentage': percentage,
-    'round_number': round_number
+    'round_number': round_number,
+    'evaluate_expression': evaluate_expression
 }
 
 
+# Tools whose result depends only on their arguments, so they can be memoized
+PURE_FUNCTIONS = frozenset(MATH_FUNCTIONS)
+
+
 def get_available_functions() -> List[str]:
     """Return a list of available mathematical functions."""
     return list(MATH_FUNCTIONS.keys())
@@ -125,6 +533,9 @@ def get_available_functions() -> List[str]:
 def call_math_function(function_name: str, *args, **kwargs):
     """
     Call a mathematical function by name with given arguments.
+
+    Results of pure functions are memoized when the tool result cache is
+    enabled (see tools.cache.enable_result_cache).
     
     Args:
         function_name: Name of the function to call
@@ -141,4 +552,8 @@ def call_math_function(function_name: str, *args, **kwargs):
         available = ', '.join(get_available_functions())
         raise ValueError(f"Function '{function_name}' not found. Available functions: {available}")
     
+    cache = get_result_cache()
+    if cache is not None and function_name in PURE_FUNCTIONS:
+        return cache.call('math', function_name, MATH_FUNCTIONS[function_name], args, kwargs)
+
     return MATH_FUNCTIONS[function_name](*args, **kwargs)
@@ -0,0 +1,25 @@
+"""
+Optional NumPy import shared by the tool modules.
+NumPy is optional (every tool also works on plain lists) and is imported
+lazily, so startup and list-only tool calls do not pay for it.
+"""
+
+import importlib.util
+import sys
+
+
+def _lazy_import(name: str):
+    """Return a module that is only executed on first attribute access, or None if it is not installed."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        return None
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+np = _lazy_import('numpy')
@@ -0,0 +1,244 @@
+"""
+Streaming (online) statistics for numeric series that do not fit in memory.
+Values can be fed one at a time or in chunks (lists, NumPy arrays,
+array.array or memoryview), and memory use stays constant.
+"""
+
+import array
+import math
+import re
+from typing import Any, Iterable, Iterator, List, Optional, Union
+
+from .math_tools import median, np
+
+Number = Union[int, float]
+
+_NUMBER_RE = re.compile(rb'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+
+
+def _is_chunk(value: Any) -> bool:
+    """Tell a chunk of values apart from a single number."""
+    if isinstance(value, (list, tuple, array.array, memoryview)):
+        return True
+    return np is not None and isinstance(value, np.ndarray)
+
+
+def iter_values(source: Iterable[Any]) -> Iterator[Number]:
+    """Flatten a stream of numbers and/or chunks of numbers into single values."""
+    for item in source:
+        if _is_chunk(item):
+            if np is not None and not isinstance(item, (list, tuple)):
+                yield from np.asarray(item).ravel().tolist()
+            else:
+                yield from item
+        else:
+            yield item
+
+
+class RunningStats:
+    """
+    Running count, mean, variance, minimum and maximum.
+
+    Single values use Welford's update; chunks are summarized on their own
+    and merged with Chan et al.'s parallel formula, so a NumPy chunk is
+    processed with vectorized code.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.minimum: Optional[Number] = None
+        self.maximum: Optional[Number] = None
+
+    def update(self, value: Any) -> 'RunningStats':
+        """Add a single number or a chunk of numbers."""
+        if _is_chunk(value):
+            return self._update_chunk(value)
+
+        self.count += 1
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+        return self
+
+    def _update_chunk(self, chunk: Any) -> 'RunningStats':
+        if len(chunk) == 0:
+            return self
+        if np is not None:
+            values = np.asarray(chunk).ravel()
+            count = len(values)
+            mean = values.mean(dtype=np.float64).item()
+            m2 = float(np.square(values - mean, dtype=np.float64).sum())
+            low, high = values.min().item(), values.max().item()
+        else:
+            count = len(chunk)
+            mean = math.fsum(chunk) / count
+            m2 = math.fsum((x - mean) ** 2 for x in chunk)
+            low, high = min(chunk), max(chunk)
+        return self._merge(count, mean, m2, low, high)
+
+    def _merge(self, count: int, mean: float, m2: float, low: Number, high: Number) -> 'RunningStats':
+        total = self.count + count
+        delta = mean - self._mean
+        self._mean += delta * count / total
+        self._m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.minimum = low if self.minimum is None else min(self.minimum, low)
+        self.maximum = high if self.maximum is None else max(self.maximum, high)
+        return self
+
+    def merge(self, other: 'RunningStats') -> 'RunningStats':
+        """Combine the statistics of another stream into this one."""
+        if other.count:
+            self._merge(other.count, other._mean, other._m2, other.minimum, other.maximum)
+        return self
+
+    @property
+    def mean(self) -> float:
+        if not self.count:
+            raise ValueError("Cannot calculate average of empty list")
+        return self._mean
+
+    @property
+    def variance(self) -> float:
+        """Population variance."""
+        if not self.count:
+            raise ValueError("Cannot calculate variance of empty list")
+        return self._m2 / self.count
+
+
+class P2Quantile:
+    """
+    Approximate quantile with the P-squared algorithm (Jain & Chlamtac, 1985).
+
+    Keeps five markers whose heights are adjusted with piecewise-parabolic
+    interpolation, so memory is constant however long the stream is. The
+    result is exact for up to five values.
+    """
+
+    def __init__(self, quantile: float = 0.5):
+        if not 0 < quantile < 1:
+            raise ValueError("quantile must be between 0 and 1")
+        self.quantile = quantile
+        self.count = 0
+        self._initial: List[Number] = []
+        self._heights: List[float] = []
+        self._positions = [0, 1, 2, 3, 4]
+        p = quantile
+        self._desired = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+        self._increments = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def update(self, value: Any) -> 'P2Quantile':
+        """Add a single number or a chunk of numbers."""
+        if _is_chunk(value):
+            for item in iter_values([value]):
+                self._add(item)
+        else:
+            self._add(value)
+        return self
+
+    def _add(self, value: Number):
+        self.count += 1
+        if len(self._initial) < 5:
+            self._initial.append(value)
+            if len(self._initial) == 5:
+                self._heights = sorted(float(v) for v in self._initial)
+            return
+
+        heights = self._heights
+        positions = self._positions
+
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = 0
+            while value >= heights[cell + 1]:
+                cell += 1
+
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        for i in (1, 2, 3):
+            offset = self._desired[i] - positions[i]
+            if ((offset >= 1 and positions[i + 1] - positions[i] > 1)
+                    or (offset <= -1 and positions[i - 1] - positions[i] < -1)):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        q, n = self._heights, self._positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self) -> float:
+        """Return the current estimate."""
+        if not self.count:
+            raise ValueError("Cannot calculate quantile of empty list")
+        if self.count <= 5:
+            ordered = sorted(self._initial)
+            if self.quantile == 0.5:
+                return median(ordered)
+            return ordered[min(len(ordered) - 1, int(self.quantile * len(ordered)))]
+        return self._heights[2]
+
+
+def running_mean(source: Iterable[Any]) -> float:
+    """Mean of a stream of numbers and/or chunks, in constant memory."""
+    stats = RunningStats()
+    for item in source:
+        stats.update(item)
+    return stats.mean
+
+
+def approximate_median(source: Iterable[Any]) -> float:
+    """Approximate median of a stream of numbers and/or chunks, in constant memory."""
+    sketch = P2Quantile(0.5)
+    for item in source:
+        sketch.update(item)
+    return sketch.value()
+
+
+def iter_number_chunks(path: str, chunk_values: int = 65536,
+                       block_size: int = 1 << 20) -> Iterator[Union[List[float], Any]]:
+    """
+    Read the numbers in a text file as chunks, without loading the whole file.
+
+    Numbers may be separated by any non-numeric text (spaces, commas,
+    newlines). Chunks are NumPy arrays when NumPy is installed, otherwise
+    lists of floats.
+    """
+    pending: List[float] = []
+    carry = b''
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            data = carry + block
+            if block:
+                # Keep a number that may continue in the next block
+                cut = len(data)
+                while cut and (data[cut - 1:cut].isdigit() or data[cut - 1:cut] in b'+-.eE'):
+                    cut -= 1
+                data, carry = data[:cut], data[cut:]
+            pending.extend(float(match) for match in _NUMBER_RE.findall(data))
+            while len(pending) >= chunk_values or (not block and pending):
+                chunk, pending = pending[:chunk_values], pending[chunk_values:]
+                yield np.array(chunk) if np is not None else chunk
+            if not block:
+                break
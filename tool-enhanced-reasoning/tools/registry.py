@@ -0,0 +1,448 @@
+"""
+Registry of tool families.
+A tool family is a module with a dict of functions (FUNCTIONS, or e.g.
+MATH_FUNCTIONS for the "math" family) and optionally PURE_FUNCTIONS, the
+names of tools whose results may be memoized. Families are found without
+importing them: the built-in math and string tools, any *_tools.py module
+in this package, and entry points in the "tool_reasoning.tools" group from
+installed packages. A family is imported the first time one of its tools is
+called, and its tools are then added to a single flat table keyed by
+(family, function). Each tool gets an argument validator compiled once from
+its type hints, so bad arguments are rejected (or coerced, e.g. "12" -> 12
+for an int parameter) before the tool runs.
+"""
+
+import importlib
+import inspect
+import os
+import threading
+import typing
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .cache import get_result_cache
+
+
+# Entry point group for tool families from other packages; the entry point
+# name is the family and its value a module ("pkg.date_tools") or a dict
+# of functions ("pkg.date_tools:FUNCTIONS")
+ENTRY_POINT_GROUP = 'tool_reasoning.tools'
+
+# Families that ship with the project, in prompt order
+BUILTIN_FAMILIES = {'math': 'tools.math_tools', 'string': 'tools.string_tools'}
+
+# Modules in this package with this suffix are tool families ("date_tools.py" -> "date")
+FAMILY_MODULE_SUFFIX = '_tools.py'
+
+
+class ToolArgumentError(ValueError):
+    """Raised when a tool is called with arguments that do not fit its signature."""
+
+
+class _Invalid(Exception):
+    """An argument (or an item of it) does not match the expected type."""
+
+    def __init__(self, expected: str, value: Any, where: str = ''):
+        super().__init__(expected)
+        self.expected = expected
+        self.value = value
+        self.where = where
+
+
+def _describe(value: Any) -> str:
+    return 'None' if value is None else type(value).__name__
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _parse_number(text: str, integer: bool):
+    """Parse a numeric string, or return None."""
+    try:
+        number = float(text.strip())
+    except ValueError:
+        return None
+    if integer or number.is_integer() and '.' not in text and 'e' not in text.lower():
+        return int(number) if number.is_integer() else None
+    return number
+
+
+def _coerce_int(value: Any) -> int:
+    if type(value) is int:
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        number = _parse_number(value, integer=True)
+        if number is not None:
+            return number
+    raise _Invalid('an integer', value)
+
+
+def _coerce_float(value: Any) -> float:
+    if _is_number(value):
+        return value
+    if isinstance(value, str):
+        number = _parse_number(value, integer=False)
+        if number is not None:
+            return number
+    raise _Invalid('a number', value)
+
+
+def _coerce_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if value in (0, 1) and _is_number(value):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in ('true', 'false'):
+        return value.strip().lower() == 'true'
+    raise _Invalid('true or false', value)
+
+
+def _coerce_str(value: Any) -> Any:
+    if isinstance(value, str):
+        return value
+    if _is_number(value):
+        return str(value)
+    if value is None or isinstance(value, (bool, list, tuple, dict, set)):
+        raise _Invalid('a string', value)
+    # Files, paths and chunk iterators are text sources for the string tools
+    return value
+
+
+def _pass(value: Any) -> Any:
+    return value
+
+
+_EXACT_TYPES = {
+    _coerce_int: frozenset({int}),
+    _coerce_float: frozenset({int, float}),
+    _coerce_bool: frozenset({bool}),
+    _coerce_str: frozenset({str}),
+}
+
+
+def _compile_coercer(annotation: Any) -> Callable[[Any], Any]:
+    """Build the function that checks and converts one argument of a given type."""
+    if annotation is Any or annotation is inspect.Parameter.empty:
+        return _pass
+    if annotation is bool:
+        return _coerce_bool
+    if annotation is int:
+        return _coerce_int
+    if annotation is float:
+        return _coerce_float
+    if annotation is str:
+        return _coerce_str
+
+    origin = typing.get_origin(annotation)
+    arguments = typing.get_args(annotation)
+    if origin is list:
+        item = _compile_coercer(arguments[0]) if arguments else _pass
+        # Item types that need no conversion, checked at C speed before
+        # falling back to converting item by item
+        exact = _EXACT_TYPES.get(item, frozenset())
+
+        def coerce_list(value):
+            if not isinstance(value, (list, tuple)):
+                raise _Invalid('a list', value)
+            if item is _pass or set(map(type, value)) <= exact:
+                return value if type(value) is list else list(value)
+            items = []
+            for index, element in enumerate(value):
+                try:
+                    items.append(item(element))
+                except _Invalid as e:
+                    raise _Invalid(e.expected, e.value, f" item {index}{e.where}") from None
+            return items
+        return coerce_list
+
+    if origin is dict:
+        def coerce_dict(value):
+            if not isinstance(value, dict):
+                raise _Invalid('an object', value)
+            return value
+        return coerce_dict
+
+    if origin is typing.Union:
+        members = [member for member in arguments if member is not type(None)]
+        optional = len(members) < len(arguments)
+        if set(members) <= {int, float}:
+            # Union[int, float]: keep ints and floats, parse numeric strings
+            single = _coerce_float
+        elif len(members) == 1:
+            single = _compile_coercer(members[0])
+        else:
+            # e.g. NumberSeries = Union[List[number], Any]: check lists, pass anything else through
+            lists = [_compile_coercer(member) for member in members if typing.get_origin(member) is list]
+            open_ended = Any in members
+            if not lists or not open_ended:
+                return _pass
+
+            def single(value):
+                if isinstance(value, (list, tuple)):
+                    return lists[0](value)
+                if value is None or isinstance(value, (str, bool, int, float, dict)):
+                    # Arrays and buffers pass; scalars and text never fit
+                    raise _Invalid('a list', value)
+                return value
+
+        if not optional:
+            return single
+        return lambda value: None if value is None else single(value)
+
+    return _pass
+
+
+def compile_validator(label: str, function: Callable) -> Callable[[tuple, dict], Tuple[list, dict]]:
+    """
+    Build a validator for calls to a function, from its signature and type hints.
+
+    The validator takes (args, kwargs), checks the argument count and names,
+    converts each value to its parameter's type where that is unambiguous,
+    and returns the new (args, kwargs).
+
+    Args:
+        label: Name used in error messages (e.g. "math.factorial")
+        function: The tool
+
+    Raises:
+        ToolArgumentError: From the validator, for arguments that do not fit
+    """
+    try:
+        hints = typing.get_type_hints(function)
+    except Exception:
+        hints = {}
+    parameters = list(inspect.signature(function).parameters.values())
+    if any(p.kind in (p.VAR_POSITIONAL, p.VAR_KEYWORD, p.POSITIONAL_ONLY) for p in parameters):
+        # Not worth compiling; let the call itself check the arguments
+        return lambda args, kwargs: (args, kwargs)
+
+    names = [p.name for p in parameters]
+    positions = {name: index for index, name in enumerate(names)}
+    coercers = [_compile_coercer(hints.get(p.name, Any)) for p in parameters]
+    max_positional = sum(p.kind is p.POSITIONAL_OR_KEYWORD for p in parameters)
+    required = [index for index, p in enumerate(parameters) if p.default is p.empty]
+    min_positional = required[-1] + 1 if required else 0
+
+    def invalid(index: int, error: _Invalid) -> ToolArgumentError:
+        return ToolArgumentError(f"{label}: argument '{names[index]}'{error.where} must be {error.expected}, "
+                                 f"got {_describe(error.value)}")
+
+    def validate(args: tuple, kwargs: dict) -> Tuple[list, dict]:
+        count = len(args)
+        if count > max_positional:
+            raise ToolArgumentError(f"{label} takes at most {max_positional} arguments ({count} given)")
+        checked_args = []
+        try:
+            for coerce, value in zip(coercers, args):
+                checked_args.append(coerce(value))
+        except _Invalid as e:
+            raise invalid(len(checked_args), e) from None
+        if kwargs:
+            checked = {}
+            for name, value in kwargs.items():
+                index = positions.get(name)
+                if index is None:
+                    raise ToolArgumentError(f"{label} got an unexpected argument '{name}'")
+                if index < count:
+                    raise ToolArgumentError(f"{label} got multiple values for argument '{name}'")
+                try:
+                    checked[name] = coercers[index](value)
+                except _Invalid as e:
+                    raise invalid(index, e) from None
+            kwargs = checked
+        if count < min_positional:
+            for index in required:
+                if index >= count and names[index] not in kwargs:
+                    raise ToolArgumentError(f"{label} is missing argument '{names[index]}'")
+        return checked_args, kwargs
+
+    return validate
+
+
+class _Tool:
+    """One registered tool."""
+
+    __slots__ = ('family', 'name', 'function', 'validate', 'pure')
+
+    def __init__(self, family: str, name: str, function: Callable, pure: bool):
+        self.family = family
+        self.name = name
+        self.function = function
+        self.validate = compile_validator(f"{family}.{name}", function)
+        self.pure = pure
+
+
+def _scan_package() -> Dict[str, str]:
+    """Find *_tools.py modules in this package without importing them."""
+    families = {}
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for entry in sorted(os.listdir(directory)):
+        if entry.endswith(FAMILY_MODULE_SUFFIX) and not entry.startswith('_'):
+            families[entry[:-len(FAMILY_MODULE_SUFFIX)]] = f"{__package__}.{entry[:-3]}"
+    return families
+
+
+def _entry_points() -> Dict[str, Any]:
+    """Find tool families published by installed packages."""
+    from importlib.metadata import entry_points
+
+    try:
+        found = entry_points(group=ENTRY_POINT_GROUP)
+    except Exception:
+        return {}
+    return {entry_point.name: entry_point for entry_point in sorted(found, key=lambda ep: ep.name)}
+
+
+class ToolRegistry:
+    """
+    Tool families, loaded on first use, behind one dispatch table.
+
+    Thread-safe: families are loaded under a lock, and calls only read the
+    table.
+    """
+
+    def __init__(self, families: Optional[Mapping] = None, discover: bool = True):
+        """
+        Set up the registry (no family is imported yet).
+
+        Args:
+            families: Family name -> module path, module or dict of functions;
+                defaults to BUILTIN_FAMILIES
+            discover: Also add *_tools.py modules of this package and
+                entry point families
+        """
+        self._sources: Dict[str, Any] = dict(BUILTIN_FAMILIES if families is None else families)
+        if discover:
+            for name, source in _scan_package().items():
+                self._sources.setdefault(name, source)
+        # Reading package metadata is slow, so entry points are only looked
+        # up when the full list of families (or an unknown one) is needed
+        self._entry_points_pending = discover
+        self._families: Dict[str, Dict[str, Callable]] = {}
+        self._table: Dict[Tuple[str, str], _Tool] = {}
+        self._lock = threading.Lock()
+
+    def register_family(self, name: str, source: Any):
+        """
+        Add (or replace) a tool family.
+
+        Args:
+            name: Family name, the tool_type of its TOOL_CALLs
+            source: Module path, module or dict of functions
+        """
+        with self._lock:
+            self._sources[name] = source
+            if name in self._families:
+                del self._families[name]
+                self._table = {key: tool for key, tool in self._table.items() if tool.family != name}
+
+    def _discover_entry_points(self):
+        if not self._entry_points_pending:
+            return
+        found = _entry_points()
+        with self._lock:
+            for name, source in found.items():
+                self._sources.setdefault(name, source)
+            self._entry_points_pending = False
+
+    def families(self) -> List[str]:
+        """Return the names of all known families (without loading them)."""
+        self._discover_entry_points()
+        return list(self._sources)
+
+    def _load(self, family: str) -> Dict[str, Callable]:
+        """Import a family and add its tools to the table."""
+        with self._lock:
+            if family in self._families:
+                return self._families[family]
+        if family not in self._sources:
+            self._discover_entry_points()
+        with self._lock:
+            if family in self._families:
+                return self._families[family]
+            if family not in self._sources:
+                raise ValueError(f"Unknown tool type: {family}")
+
+            source = self._sources[family]
+            if hasattr(source, 'load') and hasattr(source, 'group'):
+                source = source.load()
+            if isinstance(source, str):
+                source = importlib.import_module(source)
+            if isinstance(source, Mapping):
+                functions, pure = dict(source), frozenset()
+            else:
+                functions = getattr(source, 'FUNCTIONS', None) or getattr(source, f"{family.upper()}_FUNCTIONS")
+                pure = getattr(source, 'PURE_FUNCTIONS', frozenset())
+
+            table = dict(self._table)
+            for name, function in functions.items():
+                table[family, name] = _Tool(family, name, function, name in pure)
+            # Swap in a new table so lock-free readers never see a half-updated one
+            self._table = table
+            self._families[family] = functions
+            return functions
+
+    def functions(self, family: str) -> Dict[str, Callable]:
+        """Return the tools of a family by name (loading it if needed)."""
+        functions = self._families.get(family)
+        return functions if functions is not None else self._load(family)
+
+    def all_functions(self) -> Dict[str, Dict[str, Callable]]:
+        """Return every family's tools (loading them all)."""
+        return {family: self.functions(family) for family in self.families()}
+
+    def get(self, tool_type: str, function_name: str) -> _Tool:
+        """
+        Look up a tool.
+
+        Raises:
+            ValueError: If the family or the function does not exist
+        """
+        tool = self._table.get((tool_type, function_name))
+        if tool is not None:
+            return tool
+        functions = self.functions(tool_type)
+        tool = self._table.get((tool_type, function_name))
+        if tool is None:
+            raise ValueError(f"Function '{function_name}' not found. Available functions: {', '.join(functions)}")
+        return tool
+
+    def call(self, tool_type: str, function_name: str, *args, **kwargs) -> Any:
+        """
+        Validate the arguments and call a tool.
+
+        Results of pure tools are memoized when the tool result cache is
+        enabled, exactly as by call_math_function/call_string_function.
+
+        Raises:
+            ValueError: If the tool does not exist
+            ToolArgumentError: If the arguments do not fit its signature
+        """
+        tool = self._table.get((tool_type, function_name)) or self.get(tool_type, function_name)
+        args, kwargs = tool.validate(args, kwargs)
+        cache = get_result_cache()
+        if cache is not None and tool.pure:
+            return cache.call(tool.family, tool.name, tool.function, args, kwargs)
+        return tool.function(*args, **kwargs)
+
+
+_registry: Optional[ToolRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ToolRegistry:
+    """Return the shared registry, creating it on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ToolRegistry()
+    return _registry
+
+
+def register_family(name: str, source: Any):
+    """Add a tool family to the shared registry (see ToolRegistry.register_family)."""
+    get_registry().register_family(name, source)
@@ -1,113 +1,180 @@
 """
 String analysis tools for the tool-enhanced reasoning script.
 These functions can be called by the LLM to perform string operations and analysis.
+The counting functions are views over a cached TextProfile (see
+text_profile.py), so each text is scanned once however many are called.
+Texts shorter than PROFILE_MIN_LENGTH are counted directly instead, since
+building a profile costs more than one plain pass over a short string.
+Every tool also accepts a file path (os.PathLike), an mmap or an iterator of
+text chunks instead of a string, and then streams it in bounded memory
+(see chunked.py). Substring counts on large documents use a suffix-array
+index when it is enabled (see text_index.py).
 """
 
 import re
-from typing import List, Dict
+from typing import List, Dict, Optional
+from . import chunked
+from .cache import get_result_cache
+from .chunked import accepts_text_source
+from .text_index import get_text_index
+from .text_profile import CONSONANTS, VOWELS, get_text_profile
 
 
+# Shorter texts skip the profile (whose fixed cost is a few microseconds)
+PROFILE_MIN_LENGTH = 256
+
+
+@accepts_text_source(chunked.count_vowels)
 def count_vowels(text: str, case_sensitive: bool = False) -> int:
     """Count the number of vowels in a string."""
-    if not case_sensitive:
-        text = text.lower()
-    vowels = 'aeiou'
-    return sum(1 for char in text if char in vowels)
+    if len(text) < PROFILE_MIN_LENGTH:
+        if not case_sensitive:
+            text = text.lower()
+        return sum(1 for char in text if char in VOWELS)
+    return get_text_profile(text).vowels(case_sensitive)
 
 
+@accepts_text_source(chunked.count_consonants)
 def count_consonants(text: str, case_sensitive: bool = False) -> int:
     """Count the number of consonants in a string."""
-    if not case_sensitive:
-        text = text.lower()
-    consonants = 'bcdfghjklmnpqrstvwxyz'
-    return sum(1 for char in text if char in consonants)
+    if len(text) < PROFILE_MIN_LENGTH:
+        if not case_sensitive:
+            text = text.lower()
+        return sum(1 for char in text if char in CONSONANTS)
+    return get_text_profile(text).consonants(case_sensitive)
 
 
+@accepts_text_source(chunked.count_letters)
 def count_letters(text: str) -> int:
     """Count the number of letters (alphabetic characters) in a string."""
-    return sum(1 for char in text if char.isalpha())
+    if len(text) < PROFILE_MIN_LENGTH:
+        return sum(1 for char in text if char.isalpha())
+    return get_text_profile(text).letters
 
 
+@accepts_text_source(chunked.count_words)
 def count_words(text: str) -> int:
     """Count the number of words in a string."""
-    return len(text.split())
+    if len(text) < PROFILE_MIN_LENGTH:
+        return len(text.split())
+    return get_text_profile(text).word_count
 
 
+@accepts_text_source(chunked.count_characters)
 def count_characters(text: str, include_spaces: bool = True) -> int:
     """Count the total number of characters in a string."""
+    if len(text) < PROFILE_MIN_LENGTH:
+        return len(text) if include_spaces else len(text) - text.count(' ')
+    profile = get_text_profile(text)
     if include_spaces:
-        return len(text)
+        return profile.length
     else:
-        return len(text.replace(' ', ''))
+        return profile.length - profile.spaces
 
 
+@accepts_text_source(chunked.count_digits)
 def count_digits(text: str) -> int:
     """Count the number of digits in a string."""
-    return sum(1 for char in text if char.isdigit())
+    if len(text) < PROFILE_MIN_LENGTH:
+        return sum(1 for char in text if char.isdigit())
+    return get_text_profile(text).digits
 
 
+@accepts_text_source(chunked.count_uppercase)
 def count_uppercase(text: str) -> int:
     """Count the number of uppercase letters in a string."""
-    return sum(1 for char in text if char.isupper())
+    if len(text) < PROFILE_MIN_LENGTH:
+        return sum(1 for char in text if char.isupper())
+    return get_text_profile(text).uppercase
 
 
+@accepts_text_source(chunked.count_lowercase)
 def count_lowercase(text: str) -> int:
     """Count the number of lowercase letters in a string."""
-    return sum(1 for char in text if char.islower())
+    if len(text) < PROFILE_MIN_LENGTH:
+        return sum(1 for char in text if char.islower())
+    return get_text_profile(text).lowercase
 
 
+@accepts_text_source(chunked.count_special_characters)
 def count_special_characters(text: str) -> int:
     """Count the number of special characters (non-alphanumeric) in a string."""
-    return sum(1 for char in text if not char.isalnum() and not char.isspace())
+    if len(text) < PROFILE_MIN_LENGTH:
+        return sum(1 for char in text if not char.isalnum() and not char.isspace())
+    return get_text_profile(text).special_characters
 
 
+@accepts_text_source(chunked.count_spaces)
 def count_spaces(text: str) -> int:
     """Count the number of spaces in a string."""
-    return text.count(' ')
+    if len(text) < PROFILE_MIN_LENGTH:
+        return text.count(' ')
+    return get_text_profile(text).spaces
 
 
+@accepts_text_source(chunked.find_longest_word)
 def find_longest_word(text: str) -> str:
     """Find the longest word in a string."""
-    words = text.split()
-    if not words:
-        return ""
-    return max(words, key=len)
+    if len(text) < PROFILE_MIN_LENGTH:
+        return max(text.split(), key=len, default="")
+    return get_text_profile(text).longest_word
 
 
+@accepts_text_source(chunked.find_shortest_word)
 def find_shortest_word(text: str) -> str:
     """Find the shortest word in a string."""
-    words = text.split()
-    if not words:
-        return ""
-    return min(words, key=len)
+    if len(text) < PROFILE_MIN_LENGTH:
+        return min(text.split(), key=len, default="")
+    return get_text_profile(text).shortest_word
 
 
+@accepts_text_source(chunked.get_word_lengths)
 def get_word_lengths(text: str) -> List[int]:
     """Get a list of lengths for each word in the string."""
-    return [len(word) for word in text.split()]
+    if len(text) < PROFILE_MIN_LENGTH:
+        return [len(word) for word in text.split()]
+    return list(get_text_profile(text).word_lengths)
+
 
+def _indexed_count(text: str, substring: str, case_sensitive: bool) -> Optional[int]:
+    """Count through the text index when one is enabled and covers the text (see text_index.py)."""
+    index = get_text_index()
+    if index is None:
+        return None
+    return index.count(text, substring, case_sensitive)
 
+
+@accepts_text_source(chunked.count_specific_character)
 def count_specific_character(text: str, character: str, case_sensitive: bool = False) -> int:
     """Count occurrences of a specific character in a string."""
+    count = _indexed_count(text, character, case_sensitive)
+    if count is not None:
+        return count
     if not case_sensitive:
         text = text.lower()
         character = character.lower()
     return text.count(character)
 
 
+@accepts_text_source(chunked.count_substring)
 def count_substring(text: str, substring: str, case_sensitive: bool = False) -> int:
     """Count occurrences of a substring in a string."""
+    count = _indexed_count(text, substring, case_sensitive)
+    if count is not None:
+        return count
     if not case_sensitive:
         text = text.lower()
         substring = substring.lower()
     return text.count(substring)
 
 
+@accepts_text_source(chunked.reverse_string)
 def reverse_string(text: str) -> str:
     """Reverse a string."""
     return text[::-1]
 
 
+@accepts_text_source(chunked.is_palindrome)
 def is_palindrome(text: str, ignore_case: bool = True, ignore_spaces: bool = True) -> bool:
     """Check if a string is a palindrome."""
     processed_text = text
@@ -118,30 +185,42 @@ def is_palindrome(text: str, ignore_case: bool = True, ignore_spaces: bool = Tru
     return processed_text == processed_text[::-1]
 
 
+@accepts_text_source(chunked.get_character_frequency)
 def get_character_frequency(text: str, case_sensitive: bool = False) -> Dict[str, int]:
     """Get frequency count of each character in the string."""
-    if not case_sensitive:
-        text = text.lower()
-    frequency = {}
-    for char in text:
-        frequency[char] = frequency.get(char, 0) + 1
-    return frequency
-
-
+    if len(text) < PROFILE_MIN_LENGTH:
+        if not case_sensitive:
+            text = text.lower()
+        frequency = {}
+        for char in text:
+            frequency[char] = frequency.get(char, 0) + 1
+        return frequency
+    profile = get_text_profile(text)
+    return dict(profile.character_frequency if case_sensitive else profile.lowercase_frequency)
+
+
+@accepts_text_source(chunked.get_vowel_consonant_ratio)
 def get_vowel_consonant_ratio(text: str) -> float:
     """Calculate the ratio of vowels to consonants in a string."""
-    vowel_count = count_vowels(text)
-    consonant_count = count_consonants(text)
+    if len(text) < PROFILE_MIN_LENGTH:
+        vowel_count = count_vowels(text)
+        consonant_count = count_consonants(text)
+    else:
+        profile = get_text_profile(text)
+        vowel_count = profile.vowels()
+        consonant_count = profile.consonants()
     if consonant_count == 0:
         return float('inf') if vowel_count > 0 else 0
     return vowel_count / consonant_count
 
 
+@accepts_text_source(chunked.extract_numbers)
 def extract_numbers(text: str) -> List[str]:
     """Extract all numbers from a string."""
     return re.findall(r'\d+\.?\d*', text)
 
 
+@accepts_text_source(chunked.remove_punctuation)
 def remove_punctuation(text: str) -> str:
     """Remove all punctuation from a string."""
     return re.sub(r'[^\w\s]', '', text)
@@ -173,6 +252,10 @@ STRING_FUNCTIONS = {
 }
 
 
+# Tools whose result depends only on their arguments, so they can be memoized
+PURE_FUNCTIONS = frozenset(STRING_FUNCTIONS)
+
+
 def get_available_functions() -> List[str]:
     """Return a list of available string functions."""
     return list(STRING_FUNCTIONS.keys())
@@ -181,6 +264,9 @@ def get_available_functions() -> List[str]:
 def call_string_function(function_name: str, *args, **kwargs):
     """
     Call a string function by name with given arguments.
+
+    Results of pure functions are memoized when the tool result cache is
+    enabled (see tools.cache.enable_result_cache).
     
     Args:
         function_name: Name of the function to call
@@ -197,4 +283,8 @@ def call_string_function(function_name: str, *args, **kwargs):
         available = ', '.join(get_available_functions())
         raise ValueError(f"Function '{function_name}' not found. Available functions: {available}")
     
+    cache = get_result_cache()
+    if cache is not None and function_name in PURE_FUNCTIONS:
+        return cache.call('string', function_name, STRING_FUNCTIONS[function_name], args, kwargs)
+
     return STRING_FUNCTIONS[function_name](*args, **kwargs)
@@ -0,0 +1,345 @@
+"""
+Suffix-array index for repeated substring counts over one document.
+The index of a text is built once (on its second substring query, or
+explicitly with build()), kept in memory and saved to disk under the
+SHA-256 of the text, so later runs load it instead of rebuilding. Counting
+a substring is then a binary search rather than a scan of the whole text.
+The index is opt-in: call enable_text_index() to turn it on.
+"""
+
+import array
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .numpy_support import np
+
+
+_MAGIC = b'TXTSA1\x00\x00'
+
+# Characters of each suffix compared in the first sorting round
+_INITIAL_PREFIX = 8
+
+
+def _suffix_array(text: str) -> array.array:
+    """Build the suffix array of a text by prefix doubling."""
+    typecode = 'I' if len(text) < 1 << 32 else 'Q'
+    if np is None or not text:
+        return array.array(typecode, _suffix_array_python(text))
+    positions = array.array(typecode)
+    positions.frombytes(_suffix_array_numpy(text).astype(np.uint32 if typecode == 'I' else np.uint64).tobytes())
+    return positions
+
+
+def _suffix_array_python(text: str) -> List[int]:
+    n = len(text)
+    # Rank suffixes by their first few characters, then double the compared length
+    sa = sorted(range(n), key=lambda i: text[i:i + _INITIAL_PREFIX])
+    rank = [0] * n
+    rank_count = _rerank(sa, rank, lambda i: text[i:i + _INITIAL_PREFIX])
+    step = _INITIAL_PREFIX
+    while rank_count < n:
+        keys = [rank[i] * (n + 1) + (rank[i + step] + 1 if i + step < n else 0) for i in range(n)]
+        sa.sort(key=keys.__getitem__)
+        rank_count = _rerank(sa, rank, keys.__getitem__)
+        step *= 2
+    return sa
+
+
+def _rerank(sa: List[int], rank: List[int], key) -> int:
+    """Give equal-keyed suffixes equal ranks, in suffix-array order; return the number of ranks."""
+    current = -1
+    previous = None
+    for position in sa:
+        value = key(position)
+        if value != previous:
+            current += 1
+            previous = value
+        rank[position] = current
+    return current + 1
+
+
+def _suffix_array_numpy(text: str):
+    codes = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+    n = len(codes)
+    _, rank = np.unique(codes, return_inverse=True)
+    rank = rank.astype(np.int64)
+    step = 1
+    while True:
+        # Pack (rank of the first half, rank of the second half) into one sort key
+        key = rank * (n + 1)
+        key[:n - step] += rank[step:] + 1
+        sa = np.argsort(key, kind='stable')
+        sorted_key = key[sa]
+        rank = np.empty(n, dtype=np.int64)
+        rank[sa] = np.concatenate(([0], np.cumsum(sorted_key[1:] != sorted_key[:-1])))
+        if rank[sa[-1]] == n - 1:
+            return sa
+        step *= 2
+
+
+def _has_border(pattern: str) -> bool:
+    """True if a proper prefix of the pattern is also its suffix, so occurrences can overlap."""
+    return any(pattern[:k] == pattern[-k:] for k in range(1, len(pattern)))
+
+
+class TextIndex:
+    """
+    Suffix array of a text.
+
+    count() returns the same number as text.count(pattern): occurrences
+    that cannot overlap are counted straight from the suffix-array range,
+    and only patterns that can overlap themselves (such as 'aa') walk
+    their sorted positions to keep str.count's non-overlapping semantics.
+    """
+
+    def __init__(self, text: str, suffix_array: Optional[array.array] = None):
+        self.text = text
+        self.suffix_array = suffix_array if suffix_array is not None else _suffix_array(text)
+        if len(self.suffix_array) != len(text):
+            raise ValueError("Suffix array does not match the text")
+
+    def _range(self, pattern: str):
+        """Return the [low, high) range of suffixes that start with the pattern."""
+        text, sa, m = self.text, self.suffix_array, len(pattern)
+        low, high = 0, len(sa)
+        while low < high:
+            mid = (low + high) // 2
+            if text[sa[mid]:sa[mid] + m] < pattern:
+                low = mid + 1
+            else:
+                high = mid
+        start, high = low, len(sa)
+        while low < high:
+            mid = (low + high) // 2
+            if text[sa[mid]:sa[mid] + m] <= pattern:
+                low = mid + 1
+            else:
+                high = mid
+        return start, low
+
+    def positions(self, pattern: str) -> List[int]:
+        """Start positions of every (possibly overlapping) occurrence, in text order."""
+        start, end = self._range(pattern)
+        return sorted(self.suffix_array[start:end])
+
+    def count(self, pattern: str) -> int:
+        """Number of non-overlapping occurrences, exactly like str.count."""
+        if not pattern:
+            return len(self.text) + 1
+        start, end = self._range(pattern)
+        if end - start < 2 or not _has_border(pattern):
+            return end - start
+        total = 0
+        next_free = 0
+        for position in sorted(self.suffix_array[start:end]):
+            if position >= next_free:
+                total += 1
+                next_free = position + len(pattern)
+        return total
+
+    def save(self, path: str):
+        """Write the suffix array to a file (atomically)."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_MAGIC)
+                f.write(self.suffix_array.typecode.encode('ascii'))
+                self.suffix_array.tofile(f)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str, text: str) -> 'TextIndex':
+        """
+        Read a suffix array saved by save() for this text.
+
+        Raises:
+            ValueError: If the file is not an index of a text of this length
+        """
+        with open(path, 'rb') as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a text index")
+            suffix_array = array.array(f.read(1).decode('ascii'))
+            suffix_array.frombytes(f.read())
+        return cls(text, suffix_array)
+
+
+class _Document:
+    __slots__ = ('digest', 'queries', 'indexes', 'lock')
+
+    def __init__(self, digest: str):
+        self.digest = digest
+        self.queries = 0
+        self.indexes: Dict[bool, TextIndex] = {}
+        self.lock = threading.Lock()
+
+
+class TextIndexStore:
+    """
+    Indexes of recently queried large documents, in memory and on disk.
+
+    Texts shorter than min_length are never indexed: a scan is cheaper
+    than the lookup. A document is indexed on its build_after-th substring
+    query, or straight away if an index for its content is found on disk.
+    Case-insensitive queries use a separate index of text.lower().
+    """
+
+    def __init__(self, directory: Optional[str] = None, min_length: int = 1 << 18,
+                 build_after: int = 2, max_documents: int = 8):
+        """
+        Create an index store.
+
+        Args:
+            directory: Where indexes are saved (None keeps them in memory only)
+            min_length: Shortest text, in characters, that is indexed
+            build_after: Build the index on this many queries of a document
+            max_documents: Number of documents kept in memory
+        """
+        if max_documents < 1:
+            raise ValueError("max_documents must be at least 1")
+        self.directory = directory
+        self.min_length = min_length
+        self.build_after = build_after
+        self.max_documents = max_documents
+
+        # Keyed by the text itself: str caches its hash, so repeated lookups
+        # of the same string object do not rescan it
+        self._documents: 'OrderedDict[str, _Document]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._indexed_queries = 0
+        self._scanned_queries = 0
+        self._builds = 0
+        self._loads = 0
+
+    def _path(self, digest: str, lowercase: bool) -> Optional[str]:
+        if self.directory is None:
+            return None
+        return os.path.join(self.directory, f"{digest}{'.lower' if lowercase else ''}.sa")
+
+    def _document(self, text: str) -> _Document:
+        with self._lock:
+            document = self._documents.get(text)
+            if document is not None:
+                self._documents.move_to_end(text)
+                return document
+        document = _Document(hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest())
+        with self._lock:
+            document = self._documents.setdefault(text, document)
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+        return document
+
+    def get(self, text: str, lowercase: bool = False, build: bool = False) -> Optional[TextIndex]:
+        """
+        Return the index of a text (or of text.lower()), or None if there is none yet.
+
+        Each call counts as one query of the document. The index is loaded
+        from disk, or built and saved, when available or due.
+        """
+        if len(text) < self.min_length:
+            return None
+        document = self._document(text)
+        with document.lock:
+            document.queries += 1
+            index = document.indexes.get(lowercase)
+            if index is None:
+                index = self._load_or_build(text, document, lowercase,
+                                            build or document.queries >= self.build_after)
+        with self._lock:
+            if index is None:
+                self._scanned_queries += 1
+            else:
+                self._indexed_queries += 1
+        return index
+
+    def _load_or_build(self, text: str, document: _Document, lowercase: bool,
+                       build: bool) -> Optional[TextIndex]:
+        """Load the saved index of a document, or build it if build is set (caller holds document.lock)."""
+        path = self._path(document.digest, lowercase)
+        if not build and (path is None or not os.path.exists(path)):
+            return None
+        indexed_text = text.lower() if lowercase else text
+        index = None
+        if path is not None and os.path.exists(path):
+            try:
+                index = TextIndex.load(path, indexed_text)
+            except (OSError, ValueError):
+                index = None
+            else:
+                with self._lock:
+                    self._loads += 1
+        if index is None and build:
+            index = TextIndex(indexed_text)
+            with self._lock:
+                self._builds += 1
+            if path is not None:
+                try:
+                    index.save(path)
+                except OSError:
+                    pass
+        if index is not None:
+            document.indexes[lowercase] = index
+        return index
+
+    def build(self, text: str, lowercase: bool = False) -> TextIndex:
+        """Index a text now, regardless of min_length and build_after."""
+        document = self._document(text)
+        with document.lock:
+            index = document.indexes.get(lowercase)
+            if index is None:
+                index = self._load_or_build(text, document, lowercase, build=True)
+        return index
+
+    def count(self, text: str, substring: str, case_sensitive: bool = True) -> Optional[int]:
+        """
+        Count non-overlapping occurrences through the index, as str.count would.
+
+        Returns:
+            The count, or None if the text has no index (the caller scans instead)
+        """
+        index = self.get(text, lowercase=not case_sensitive)
+        if index is None:
+            return None
+        return index.count(substring if case_sensitive else substring.lower())
+
+    def stats(self) -> Dict[str, Any]:
+        """Return how many queries used an index and how many indexes were built or loaded."""
+        with self._lock:
+            return {
+                'indexed_queries': self._indexed_queries,
+                'scanned_queries': self._scanned_queries,
+                'builds': self._builds,
+                'loads': self._loads,
+                'documents': len(self._documents)
+            }
+
+
+# The shared store used by count_substring and count_specific_character
+_text_index: Optional[TextIndexStore] = None
+
+
+def enable_text_index(directory: Optional[str] = None, min_length: int = 1 << 18,
+                      build_after: int = 2) -> TextIndexStore:
+    """Turn on substring indexing for the string tools and return the store."""
+    global _text_index
+    _text_index = TextIndexStore(directory, min_length=min_length, build_after=build_after)
+    return _text_index
+
+
+def disable_text_index():
+    """Turn off substring indexing for the string tools."""
+    global _text_index
+    _text_index = None
+
+
+def get_text_index() -> Optional[TextIndexStore]:
+    """Return the active text index store, or None if indexing is off."""
+    return _text_index
@@ -0,0 +1,212 @@
+"""
+Single-pass text profiles for the string tools.
+A TextProfile computes the character-class counts of a text in one pass
+of C-level primitives, and its word statistics and frequency table, each
+on first use. The string tools read their answers from a shared, cached
+profile, so several questions about the same text scan it only once.
+"""
+
+from collections import Counter
+from functools import cached_property, lru_cache
+from typing import Dict, List, NamedTuple
+
+
+VOWELS = 'aeiou'
+CONSONANTS = 'bcdfghjklmnpqrstvwxyz'
+
+# Disjoint character classes for ASCII text. Every byte maps to one class
+# code with bytes.translate, and the classes are then counted at C speed.
+_LOWER_VOWEL, _UPPER_VOWEL, _LOWER_CONSONANT, _UPPER_CONSONANT, _DIGIT, _SPACE, _OTHER = range(7)
+
+
+def _build_class_table() -> bytes:
+    table = bytearray([_OTHER]) * 256
+    for code in range(128):
+        char = chr(code)
+        if char in VOWELS:
+            table[code] = _LOWER_VOWEL
+        elif char.lower() in VOWELS:
+            table[code] = _UPPER_VOWEL
+        elif char in CONSONANTS:
+            table[code] = _LOWER_CONSONANT
+        elif char.lower() in CONSONANTS:
+            table[code] = _UPPER_CONSONANT
+        elif char.isdigit():
+            table[code] = _DIGIT
+        elif char.isspace():
+            table[code] = _SPACE
+    return bytes(table)
+
+
+_CLASS_TABLE = _build_class_table()
+
+# Count the most common classes first so each deletion pass scans less
+_COUNT_ORDER = (_LOWER_CONSONANT, _SPACE, _LOWER_VOWEL, _UPPER_CONSONANT, _UPPER_VOWEL, _DIGIT)
+
+
+class _ClassCounts(NamedTuple):
+    vowels: int
+    other_vowels: int
+    consonants: int
+    other_consonants: int
+    letters: int
+    digits: int
+    uppercase: int
+    lowercase: int
+    special_characters: int
+
+
+class TextProfile:
+    """
+    Character-class counts, word statistics and frequency tables of a text.
+
+    Each group is computed on first use: the character-class counts in one
+    scan when any of them is asked for, the words when a word statistic
+    is. Counts match the definitions used by tools/string_tools.py exactly,
+    including case-insensitive counts, which follow str.lower().
+    """
+
+    def __init__(self, text: str):
+        if not isinstance(text, str):
+            raise TypeError(f"Expected a string, got {type(text).__name__}")
+        self.text = text
+        self.length = len(text)
+
+    @cached_property
+    def spaces(self) -> int:
+        return self.text.count(' ')
+
+    @cached_property
+    def _classes(self) -> _ClassCounts:
+        if self.text.isascii():
+            return self._count_ascii_classes()
+        return self._count_unicode_classes()
+
+    def _count_ascii_classes(self) -> _ClassCounts:
+        """Map every byte to its class with one translate, then count classes with shrinking delete passes."""
+        classes = self.text.encode('ascii').translate(_CLASS_TABLE)
+        counts = [0] * 7
+        for code in _COUNT_ORDER:
+            remaining = classes.translate(None, bytes((code,)))
+            counts[code] = len(classes) - len(remaining)
+            classes = remaining
+        counts[_OTHER] = len(classes)
+
+        return _ClassCounts(
+            vowels=counts[_LOWER_VOWEL],
+            other_vowels=counts[_UPPER_VOWEL],
+            consonants=counts[_LOWER_CONSONANT],
+            other_consonants=counts[_UPPER_CONSONANT],
+            letters=sum(counts[:_DIGIT]),
+            digits=counts[_DIGIT],
+            uppercase=counts[_UPPER_VOWEL] + counts[_UPPER_CONSONANT],
+            lowercase=counts[_LOWER_VOWEL] + counts[_LOWER_CONSONANT],
+            special_characters=counts[_OTHER],
+        )
+
+    def _count_unicode_classes(self) -> _ClassCounts:
+        """Classify each distinct character once and weight it by its frequency."""
+        vowels = other_vowels = consonants = other_consonants = 0
+        letters = digits = uppercase = lowercase = special = 0
+        for char, count in self.character_frequency.items():
+            if char in VOWELS:
+                vowels += count
+            elif char in CONSONANTS:
+                consonants += count
+            else:
+                # Characters whose lowercase form contains ASCII vowels or
+                # consonants (e.g. 'E', or 'İ' -> 'i̇') count case-insensitively
+                lowered = char.lower()
+                other_vowels += count * sum(1 for c in lowered if c in VOWELS)
+                other_consonants += count * sum(1 for c in lowered if c in CONSONANTS)
+            if char.isalpha():
+                letters += count
+            if char.isdigit():
+                digits += count
+            if char.isupper():
+                uppercase += count
+            if char.islower():
+                lowercase += count
+            if not char.isalnum() and not char.isspace():
+                special += count
+
+        return _ClassCounts(vowels, other_vowels, consonants, other_consonants,
+                            letters, digits, uppercase, lowercase, special)
+
+    def vowels(self, case_sensitive: bool = False) -> int:
+        """Number of vowels (a, e, i, o, u; also upper case unless case_sensitive)."""
+        classes = self._classes
+        return classes.vowels if case_sensitive else classes.vowels + classes.other_vowels
+
+    def consonants(self, case_sensitive: bool = False) -> int:
+        """Number of consonants (also upper case unless case_sensitive)."""
+        classes = self._classes
+        return classes.consonants if case_sensitive else classes.consonants + classes.other_consonants
+
+    @property
+    def letters(self) -> int:
+        return self._classes.letters
+
+    @property
+    def digits(self) -> int:
+        return self._classes.digits
+
+    @property
+    def uppercase(self) -> int:
+        return self._classes.uppercase
+
+    @property
+    def lowercase(self) -> int:
+        return self._classes.lowercase
+
+    @property
+    def special_characters(self) -> int:
+        return self._classes.special_characters
+
+    @cached_property
+    def words(self) -> List[str]:
+        return self.text.split()
+
+    @cached_property
+    def word_lengths(self) -> List[int]:
+        return list(map(len, self.words))
+
+    @property
+    def word_count(self) -> int:
+        return len(self.words)
+
+    @property
+    def longest_word(self) -> str:
+        """The first of the longest words, or '' if there are none."""
+        words = self.words
+        return max(words, key=len) if words else ""
+
+    @property
+    def shortest_word(self) -> str:
+        """The first of the shortest words, or '' if there are none."""
+        words = self.words
+        return min(words, key=len) if words else ""
+
+    @cached_property
+    def character_frequency(self) -> Dict[str, int]:
+        """Case-sensitive character counts, in order of first appearance."""
+        return dict(Counter(self.text))
+
+    @cached_property
+    def lowercase_frequency(self) -> Dict[str, int]:
+        """Counts of the characters of text.lower(), in order of first appearance."""
+        if 'Σ' in self.text:
+            # Final sigma lowers differently depending on its position
+            return dict(Counter(self.text.lower()))
+        frequency: Dict[str, int] = {}
+        for char, count in self.character_frequency.items():
+            for lowered in char.lower():
+                frequency[lowered] = frequency.get(lowered, 0) + count
+        return frequency
+
+
+# Profiles of large texts hold their word lists, so only a few are kept
+@lru_cache(maxsize=8)
+def get_text_profile(text: str) -> TextProfile:
+    """Return the (cached) profile of a text, so each text is profiled once."""
+    return TextProfile(text)